@@ -1,63 +1,256 @@
-from typing import Dict, List, Optional
+from typing import Dict, Iterator, List, Optional
+from pathlib import Path
+import hashlib
+import json
+import random
+import shutil
+import numpy as np
 import torch
-from torch.utils.data import Dataset
+from torch.utils.data import Dataset, Sampler
 from transformers import PreTrainedTokenizer
 
+# BIO label map shared by the dataset, the model config and inference
+LABEL2ID = {
+    "O": 0,  # Outside any entity
+    "B-PARTNER": 1,
+    "I-PARTNER": 2,
+    "B-GEO": 3,
+    "I-GEO": 4,
+    "B-PRICE": 5,
+    "I-PRICE": 6,
+    "B-SOURCE": 7,
+    "I-SOURCE": 8,
+    "B-FUNNEL": 9,
+    "I-FUNNEL": 10
+}
+ID2LABEL = {v: k for k, v in LABEL2ID.items()}
+
+# Label id ignored by the token classification loss
+IGNORE_INDEX = -100
+
 class DealNERDataset(Dataset):
+    """Token classification dataset tokenized once at construction.
+
+    Sequences are stored unpadded in flat int32 arrays with offsets; padding
+    happens per batch in DynamicPaddingCollator. With cache_path set, the
+    arrays are written as .npy files and memory-mapped on later runs.
+    """
+
     def __init__(
-        self, 
-        texts: List[str],
-        labels: List[List[str]], 
+        self,
+        texts: List[List[str]],
+        labels: Optional[List[List[str]]],
         tokenizer: PreTrainedTokenizer,
-        max_length: int = 128
+        max_length: int = 128,
+        cache_path: Optional[str] = None
     ):
+        # Texts are pre-split into words; labels hold one BIO tag per word
         self.texts = texts
         self.labels = labels
         self.tokenizer = tokenizer
         self.max_length = max_length
-        
+
         # Create label map
-        self.label2id = {
-            "O": 0,  # Outside any entity
-            "B-PARTNER": 1,
-            "I-PARTNER": 2, 
-            "B-GEO": 3,
-            "I-GEO": 4,
-            "B-PRICE": 5,
-            "I-PRICE": 6,
-            "B-SOURCE": 7,
-            "I-SOURCE": 8,
-            "B-FUNNEL": 9,
-            "I-FUNNEL": 10
-        }
-        self.id2label = {v: k for k, v in self.label2id.items()}
+        self.label2id = LABEL2ID
+        self.id2label = ID2LABEL
+
+        cache_key = self._cache_key()
+        if cache_path and self._cache_valid(cache_path, cache_key):
+            self._load_cache(cache_path)
+        else:
+            self._encode_all()
+            if cache_path:
+                self._save_cache(cache_path, cache_key)
 
     def __len__(self):
-        return len(self.texts)
+        return len(self.offsets) - 1
 
     def __getitem__(self, idx) -> Dict[str, torch.Tensor]:
-        text = self.texts[idx]
-        label = self.labels[idx]
+        start, end = self.offsets[idx], self.offsets[idx + 1]
+        input_ids = torch.from_numpy(np.array(self.input_ids[start:end], dtype=np.int64))
+        item = {
+            "input_ids": input_ids,
+            "attention_mask": torch.ones_like(input_ids)
+        }
+        if self.label_ids is not None:
+            item["labels"] = torch.from_numpy(np.array(self.label_ids[start:end], dtype=np.int64))
+        return item
+
+    @property
+    def lengths(self) -> np.ndarray:
+        """Unpadded token count of every example"""
+        return np.diff(self.offsets)
 
-        # Tokenize text and align labels
+    def _encode_all(self):
+        """Tokenize every example in one batched call and flatten the results"""
         encoding = self.tokenizer(
-            text,
+            self.texts,
+            is_split_into_words=True,
             max_length=self.max_length,
-            padding="max_length",
-            truncation=True,
-            return_tensors="pt"
+            truncation=True
         )
 
-        # Convert labels to ids and align with tokens
-        label_ids = self._align_labels_with_tokens(label, encoding)
+        input_ids = encoding["input_ids"]
+        offsets = np.zeros(len(input_ids) + 1, dtype=np.int64)
+        offsets[1:] = np.cumsum([len(ids) for ids in input_ids])
+        self.offsets = offsets
+        self.input_ids = np.fromiter(
+            (token for ids in input_ids for token in ids),
+            dtype=np.int32,
+            count=int(offsets[-1])
+        )
 
-        return {
-            "input_ids": encoding["input_ids"].squeeze(),
-            "attention_mask": encoding["attention_mask"].squeeze(),
-            "labels": torch.tensor(label_ids)
-        }
+        self.label_ids = None
+        if self.labels is not None:
+            self.label_ids = np.fromiter(
+                (
+                    label
+                    for i, label_list in enumerate(self.labels)
+                    for label in self._align_labels_with_tokens(label_list, encoding, i)
+                ),
+                dtype=np.int32,
+                count=int(offsets[-1])
+            )
+
+    def _align_labels_with_tokens(self, labels: List[str], encoding, batch_index: int = 0) -> List[int]:
+        """Spread word-level BIO labels over subword tokens.
+
+        Special tokens get IGNORE_INDEX. The first subword of a word keeps
+        the word's label, later subwords continue the entity as I-<TYPE> so
+        spans stay contiguous after decoding.
+        """
+        label_ids = []
+        previous_word = None
+        for word_id in encoding.word_ids(batch_index):
+            if word_id is None:
+                label_ids.append(IGNORE_INDEX)
+            elif word_id != previous_word:
+                label_ids.append(self.label2id[labels[word_id]])
+            else:
+                label = labels[word_id]
+                if label.startswith("B-"):
+                    label = f"I-{label[2:]}"
+                label_ids.append(self.label2id[label])
+            previous_word = word_id
+        return label_ids
+
+    def _cache_key(self) -> str:
+        """Fingerprint of the inputs that determine the encoded arrays"""
+        digest = hashlib.sha256()
+        digest.update(f"{self.tokenizer.name_or_path}|{self.max_length}".encode())
+        digest.update(json.dumps(self.texts, ensure_ascii=False).encode())
+        digest.update(json.dumps(self.labels, ensure_ascii=False).encode())
+        return digest.hexdigest()
+
+    def _cache_valid(self, cache_path: str, cache_key: str) -> bool:
+        meta_path = Path(cache_path) / "meta.json"
+        if not meta_path.exists():
+            return False
+        with open(meta_path, 'r', encoding='utf-8') as f:
+            return json.load(f).get("key") == cache_key
+
+    def _load_cache(self, cache_path: str):
+        cache_dir = Path(cache_path)
+        self.offsets = np.load(cache_dir / "offsets.npy")
+        self.input_ids = np.load(cache_dir / "input_ids.npy", mmap_mode="r")
+        labels_file = cache_dir / "label_ids.npy"
+        self.label_ids = np.load(labels_file, mmap_mode="r") if labels_file.exists() else None
+
+    def _save_cache(self, cache_path: str, cache_key: str):
+        cache_dir = Path(cache_path)
+        tmp_dir = cache_dir.with_name(cache_dir.name + '.tmp')
+        if tmp_dir.exists():
+            shutil.rmtree(tmp_dir)
+        tmp_dir.mkdir(parents=True)
+        np.save(tmp_dir / "offsets.npy", self.offsets)
+        np.save(tmp_dir / "input_ids.npy", self.input_ids)
+        if self.label_ids is not None:
+            np.save(tmp_dir / "label_ids.npy", self.label_ids)
+        with open(tmp_dir / "meta.json", 'w', encoding='utf-8') as f:
+            json.dump({"key": cache_key, "examples": len(self)}, f)
 
-    def _align_labels_with_tokens(self, labels: List[str], encoding) -> List[int]:
-        # Implementation for aligning labels with tokenized text
-        # This needs careful handling of subwords and special tokens
-        pass 
\ No newline at end of file
+        # Swap in the finished cache so no array of an older build is left behind
+        if cache_dir.exists():
+            shutil.rmtree(cache_dir)
+        tmp_dir.rename(cache_dir)
+
+class LengthBucketSampler(Sampler[List[int]]):
+    """Batch sampler that groups examples of similar length.
+
+    Indices are shuffled, cut into pools of batch_size * pool_factor,
+    sorted by length inside each pool and split into batches; batch order
+    is shuffled again so training still sees a random mix of lengths.
+    """
+
+    def __init__(
+        self,
+        lengths: np.ndarray,
+        batch_size: int,
+        shuffle: bool = True,
+        pool_factor: int = 50,
+        seed: int = 0
+    ):
+        self.lengths = np.asarray(lengths)
+        self.batch_size = batch_size
+        self.shuffle = shuffle
+        self.pool_size = batch_size * pool_factor
+        self.seed = seed
+        self.epoch = 0
+
+    def set_epoch(self, epoch: int):
+        self.epoch = epoch
+
+    def __iter__(self) -> Iterator[List[int]]:
+        rng = random.Random(self.seed + self.epoch)
+        self.epoch += 1
+
+        if not self.shuffle:
+            # Deterministic order for evaluation and inference
+            order = np.argsort(self.lengths, kind="stable")
+            for start in range(0, len(order), self.batch_size):
+                yield order[start:start + self.batch_size].tolist()
+            return
+
+        indices = list(range(len(self.lengths)))
+        rng.shuffle(indices)
+
+        batches = []
+        for start in range(0, len(indices), self.pool_size):
+            pool = np.array(indices[start:start + self.pool_size])
+            pool = pool[np.argsort(self.lengths[pool], kind="stable")]
+            for batch_start in range(0, len(pool), self.batch_size):
+                batches.append(pool[batch_start:batch_start + self.batch_size].tolist())
+
+        rng.shuffle(batches)
+        yield from batches
+
+    def __len__(self) -> int:
+        return (len(self.lengths) + self.batch_size - 1) // self.batch_size
+
+class DynamicPaddingCollator:
+    """Pad a batch only up to its longest sequence"""
+
+    def __init__(self, pad_token_id: int, pad_to_multiple_of: Optional[int] = None):
+        self.pad_token_id = pad_token_id
+        self.pad_to_multiple_of = pad_to_multiple_of
+
+    def __call__(self, features: List[Dict[str, torch.Tensor]]) -> Dict[str, torch.Tensor]:
+        max_length = max(len(f["input_ids"]) for f in features)
+        if self.pad_to_multiple_of:
+            multiple = self.pad_to_multiple_of
+            max_length = (max_length + multiple - 1) // multiple * multiple
+
+        pad_values = {
+            "input_ids": self.pad_token_id,
+            "attention_mask": 0,
+            "labels": IGNORE_INDEX
+        }
+        batch = {}
+        for key, pad_value in pad_values.items():
+            if key not in features[0]:
+                continue
+            padded = torch.full((len(features), max_length), pad_value, dtype=torch.long)
+            for i, feature in enumerate(features):
+                padded[i, :len(feature[key])] = feature[key]
+            batch[key] = padded
+        return batch
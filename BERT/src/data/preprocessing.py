@@ -1,8 +1,34 @@
 import json
-from typing import Dict, List, Tuple
+from typing import Dict, List, Optional, Tuple
 import pandas as pd
 import re
 
+# Words are runs of word characters (keeping "1,350" and "9.5" together) or
+# single punctuation/emoji characters, so "1350$+13%" splits into
+# "1350", "$", "+", "13", "%".
+WORD_PATTERN = re.compile(r'\w+(?:[.,]\w+)*|[^\w\s]')
+
+# Source aliases as they appear in raw deal text
+SOURCE_ALIASES = {
+    'Facebook': ['fb', 'facebook', 'fb traffic'],
+    'Google': ['ggl', 'google', 'gg'],
+    'Google Display': ['search.display'],
+    'SEO': ['seo'],
+    'MSN': ['msn'],
+    'Taboola': ['taboola'],
+    'Native': ['native'],
+    'Native Ads': ['nativeads'],
+    'Bing': ['bing']
+}
+
+PRICE_PATTERN = re.compile(
+    r'\$?\d[\d,]*(?:\.\d+)?\s*(?:\$|USD)?\s*\+\s*\d+(?:\.\d+)?\s*%'
+)
+
+def split_words(text: str) -> List[Tuple[str, int, int]]:
+    """Split text into (word, start, end) tuples used for labelling and inference."""
+    return [(m.group(), m.start(), m.end()) for m in WORD_PATTERN.finditer(text)]
+
 class DealDataPreprocessor:
     def __init__(self):
         self.entity_patterns = {
@@ -74,4 +100,111 @@ class DealDataPreprocessor:
             texts.append(deal_text)
             labels.append(self.create_token_labels(deal_text, deal))
             
-        return texts, labels 
\ No newline at end of file
+        return texts, labels
+
+    def create_span_labels(self, words: List[Tuple[str, int, int]], spans: List[Tuple[int, int, str]]) -> List[str]:
+        """Create word-level BIO labels from character spans."""
+        labels = ['O'] * len(words)
+
+        for start, end, entity_type in spans:
+            inside = False
+            for i, (_, word_start, word_end) in enumerate(words):
+                if word_end <= start or word_start >= end:
+                    continue
+                if labels[i] != 'O':
+                    # Overlapping spans: the first entity found wins
+                    break
+                labels[i] = f'I-{entity_type}' if inside else f'B-{entity_type}'
+                inside = True
+
+        return labels
+
+    def find_entity_spans(self, text: str, parsed_data: Dict) -> List[Tuple[int, int, str]]:
+        """Locate the parsed field values in the raw deal text."""
+        spans = []
+
+        def add(pattern: str, entity_type: str, flags: int = re.IGNORECASE):
+            match = re.search(pattern, text, flags)
+            if match:
+                spans.append((match.start(), match.end(), entity_type))
+
+        partner = parsed_data.get('partner')
+        if partner and partner != '&':
+            add(re.escape(partner), 'PARTNER')
+
+        for geo in (parsed_data.get('geo') or '').split('|'):
+            if len(geo) == 2 and geo.isalpha():
+                # Country codes are matched case-sensitively to skip language codes
+                add(rf'(?<![A-Za-z]){re.escape(geo)}(?![A-Za-z])', 'GEO', 0)
+
+        if parsed_data.get('cpa') is not None and parsed_data.get('crg') is not None:
+            match = PRICE_PATTERN.search(text)
+            if match:
+                spans.append((match.start(), match.end(), 'PRICE'))
+        else:
+            value = parsed_data.get('cpa') or parsed_data.get('cpl')
+            if value:
+                add(rf'(?<![\d,.]){int(value):,}(?![\d])|(?<![\d,.]){int(value)}(?![\d])', 'PRICE')
+
+        for source in (parsed_data.get('source') or '').split('|'):
+            for alias in SOURCE_ALIASES.get(source, []):
+                add(rf'(?<![\w.]){re.escape(alias)}(?![\w.])', 'SOURCE')
+
+        for funnel in parsed_data.get('funnels') or []:
+            if funnel:
+                add(re.escape(funnel), 'FUNNEL')
+
+        return sorted(spans)
+
+    def _iter_deals(self, jsonl_file: str, use_cache: bool):
+        """Yield (raw_text, parsed_data) for every example in the file"""
+        if use_cache:
+            from tools.corpus_cache import load_cache
+            cache = load_cache(jsonl_file)
+            raw_texts = cache.texts('raw_text')
+            for i, raw_text in enumerate(raw_texts):
+                yield raw_text, cache.parsed_data(i)
+            return
+
+        with open(jsonl_file, 'r', encoding='utf-8') as f:
+            for line in f:
+                if not line.strip():
+                    continue
+                example = json.loads(line)
+                assistant = next(
+                    (m for m in example['messages'] if m['role'] == 'assistant'),
+                    None
+                )
+                if not assistant:
+                    continue
+                deal = json.loads(assistant['content'])
+                yield deal.get('raw_text', ''), deal.get('parsed_data', {})
+
+    def prepare_from_jsonl(self, jsonl_file: str, limit: Optional[int] = None, use_cache: bool = False) -> Tuple[List[List[str]], List[List[str]]]:
+        """Prepare word/label pairs from chat-format training data.
+
+        Each assistant message carries the deal's raw_text and parsed_data.
+        Variations of the same block share one raw_text, so examples are
+        de-duplicated on it. With use_cache the columnar corpus cache is
+        read instead of decoding JSON.
+        """
+        texts = []
+        labels = []
+        seen = set()
+
+        for raw_text, parsed_data in self._iter_deals(jsonl_file, use_cache):
+            if not raw_text or raw_text in seen:
+                continue
+            seen.add(raw_text)
+
+            words = split_words(raw_text)
+            if not words:
+                continue
+            spans = self.find_entity_spans(raw_text, parsed_data)
+            texts.append([w for w, _, _ in words])
+            labels.append(self.create_span_labels(words, spans))
+
+            if limit and len(texts) >= limit:
+                break
+
+        return texts, labels
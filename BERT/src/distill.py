@@ -0,0 +1,173 @@
+from rich.console import Console
+from typing import Dict, List
+from pathlib import Path
+import argparse
+import asyncio
+import hashlib
+import json
+import os
+import sys
+
+# Add project root to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from core.prompts import SYSTEM_PROMPT
+from tools.evaluate import evaluate, print_report
+from tools.training_client import TrainingDealParser
+
+console = Console()
+
+TEACHERS = ("rules", "finetuned")
+
+def load_user_texts(jsonl_file: str) -> List[str]:
+    """Unique user messages from a chat-format JSONL file, in file order"""
+    texts = {}
+    with open(jsonl_file, 'r', encoding='utf-8') as f:
+        for line in f:
+            if not line.strip():
+                continue
+            for message in json.loads(line)['messages']:
+                if message['role'] == 'user':
+                    texts.setdefault(message['content'], None)
+    return list(texts)
+
+async def _label_with_finetuned(texts: List[str], cache_file: Path, concurrency: int) -> Dict[str, List[Dict]]:
+    """Collect fine-tuned model outputs, reusing answers cached on disk"""
+    from core.ft_client import FineTunedDealParser
+
+    cache = {}
+    if cache_file.exists():
+        with open(cache_file, 'r', encoding='utf-8') as f:
+            for line in f:
+                entry = json.loads(line)
+                cache[entry['key']] = entry['deals']
+
+    parser = FineTunedDealParser()
+    semaphore = asyncio.Semaphore(concurrency)
+    cache_file.parent.mkdir(parents=True, exist_ok=True)
+
+    async def label(text: str):
+        key = hashlib.sha256(text.encode()).hexdigest()
+        if key in cache:
+            return
+        async with semaphore:
+            deals = await parser.parse_deals(text)
+        cache[key] = deals
+        with open(cache_file, 'a', encoding='utf-8') as f:
+            f.write(json.dumps({'key': key, 'deals': deals}, ensure_ascii=False) + '\n')
+
+    await asyncio.gather(*(label(text) for text in texts))
+    return {text: cache.get(hashlib.sha256(text.encode()).hexdigest(), []) for text in texts}
+
+def build_teacher_dataset(
+    teacher: str = "rules",
+    source_data: str = "data/training_data.jsonl",
+    output_file: str = "data/distill_data.jsonl",
+    cache_file: str = "BERT/cache/teacher_outputs.jsonl",
+    concurrency: int = 4
+) -> int:
+    """Write teacher predictions in the chat format the NER trainer reads"""
+    texts = load_user_texts(source_data)
+    console.print(f"[green]Labelling {len(texts)} unique messages with the {teacher} teacher[/]")
+
+    if teacher == "rules":
+        parser = TrainingDealParser()
+        outputs = {text: parser.parse_deals(text) for text in texts}
+    elif teacher == "finetuned":
+        outputs = asyncio.run(_label_with_finetuned(texts, Path(cache_file), concurrency))
+    else:
+        raise ValueError(f"Unknown teacher '{teacher}'. Must be one of: {', '.join(TEACHERS)}")
+
+    output_path = Path(output_file)
+    output_path.parent.mkdir(exist_ok=True)
+    count = 0
+    with open(output_path, 'w', encoding='utf-8') as f:
+        for text, deals in outputs.items():
+            for deal in deals:
+                if not isinstance(deal, dict) or 'parsed_data' not in deal:
+                    continue
+                example = {
+                    "messages": [
+                        {"role": "system", "content": SYSTEM_PROMPT},
+                        {"role": "user", "content": text},
+                        {"role": "assistant", "content": json.dumps(deal, ensure_ascii=False)}
+                    ]
+                }
+                f.write(json.dumps(example, ensure_ascii=False) + '\n')
+                count += 1
+
+    console.print(f"[green]Wrote {count} teacher-labelled deals to {output_path}[/]")
+    return count
+
+def print_distill_report(report: Dict[str, Dict]):
+    """Print the harness table plus the speed/accuracy trade-off"""
+    print_report(report, title="Distillation report")
+
+    if report['student']['latency_ms_mean']:
+        speedup = report['teacher']['latency_ms_mean'] / report['student']['latency_ms_mean']
+        drop = report['teacher']['mean_accuracy'] - report['student']['mean_accuracy']
+        console.print(f"Student is {speedup:.1f}× faster at {drop:+.1%} accuracy cost vs teacher")
+
+def distill(
+    teacher: str = "rules",
+    source_data: str = "data/training_data.jsonl",
+    validation_data: str = "data/validation_data.jsonl",
+    distill_data: str = "data/distill_data.jsonl",
+    output_dir: str = "BERT/models/deal-ner",
+    model_name: str = "bert-base-cased",
+    epochs: int = 5,
+    skip_training: bool = False
+) -> Dict[str, Dict]:
+    """Label data with the teacher, train the student and compare both"""
+    from train import train
+
+    if not skip_training:
+        build_teacher_dataset(teacher, source_data, distill_data)
+        train(
+            training_data=distill_data,
+            validation_data=validation_data,
+            output_dir=output_dir,
+            model_name=model_name,
+            epochs=epochs
+        )
+
+    from core.bert_client import BertDealParser
+    student = BertDealParser(output_dir)
+
+    # Single worker so latencies are per-request rather than pooled
+    report = {
+        'teacher': evaluate(teacher, validation_data, workers=1),
+        'student': evaluate("bert", validation_data, workers=1, parser=student)
+    }
+    print_distill_report(report)
+
+    report_path = Path(output_dir) / "distill_report.json"
+    report_path.parent.mkdir(parents=True, exist_ok=True)
+    with open(report_path, 'w', encoding='utf-8') as f:
+        json.dump({'teacher_backend': teacher, **report}, f, indent=2)
+    console.print(f"[bold green]✓ Saved report to {report_path}[/]")
+
+    return report
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Distill a deal parser into the BERT token classifier")
+    parser.add_argument("--teacher", choices=TEACHERS, default="rules")
+    parser.add_argument("--source-data", default="data/training_data.jsonl")
+    parser.add_argument("--validation-data", default="data/validation_data.jsonl")
+    parser.add_argument("--distill-data", default="data/distill_data.jsonl")
+    parser.add_argument("--output-dir", default="BERT/models/deal-ner")
+    parser.add_argument("--model-name", default="bert-base-cased")
+    parser.add_argument("--epochs", type=int, default=5)
+    parser.add_argument("--skip-training", action="store_true", help="Only evaluate an existing student")
+    args = parser.parse_args()
+
+    distill(
+        teacher=args.teacher,
+        source_data=args.source_data,
+        validation_data=args.validation_data,
+        distill_data=args.distill_data,
+        output_dir=args.output_dir,
+        model_name=args.model_name,
+        epochs=args.epochs,
+        skip_training=args.skip_training
+    )
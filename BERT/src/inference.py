@@ -1 +1,205 @@
- 
\ No newline at end of file
+from transformers import AutoTokenizer, BertForTokenClassification
+from typing import Dict, List, Optional, Tuple
+from pathlib import Path
+import logging
+import os
+import re
+import sys
+import torch
+
+# Add project root to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from core.deal import DealData
+from core.geo import region_for, split_geos
+from tools.training_client import TrainingDealParser
+from data.preprocessing import split_words
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MODEL_DIR = Path(__file__).resolve().parents[1] / "models" / "deal-ner"
+
+PRICE_CRG_PATTERN = re.compile(r'(\d[\d,]*(?:\.\d+)?)\s*(?:\$|USD)?\s*\+\s*(\d+(?:\.\d+)?)\s*%')
+NUMBER_PATTERN = re.compile(r'\d[\d,]*(?:\.\d+)?')
+
+class DealNERExtractor:
+    """Batched CPU inference for the deal token classifier"""
+
+    def __init__(
+        self,
+        model_dir: Optional[str] = None,
+        batch_size: int = 32,
+        max_length: int = 128,
+        num_threads: Optional[int] = None
+    ):
+        model_dir = model_dir or DEFAULT_MODEL_DIR
+        if num_threads:
+            torch.set_num_threads(num_threads)
+
+        self.tokenizer = AutoTokenizer.from_pretrained(model_dir)
+        self.model = BertForTokenClassification.from_pretrained(model_dir)
+        self.model.to("cpu")
+        self.model.eval()
+        self.id2label = {int(k): v for k, v in self.model.config.id2label.items()}
+        self.batch_size = batch_size
+        self.max_length = max_length
+
+        # Regex helpers for the fields the tagger does not cover
+        self.rules = TrainingDealParser()
+
+    def extract(self, texts: List[str]) -> List[Dict[str, List[str]]]:
+        """Tag texts and return entity spans grouped by type"""
+        words_per_text = [split_words(text) for text in texts]
+        results: List[Optional[Dict[str, List[str]]]] = [None] * len(texts)
+
+        # Batch similar lengths together so padding stays minimal
+        order = sorted(range(len(texts)), key=lambda i: len(words_per_text[i]))
+        for start in range(0, len(order), self.batch_size):
+            batch_indices = order[start:start + self.batch_size]
+            word_labels = self._predict_word_labels(
+                [[w for w, _, _ in words_per_text[i]] for i in batch_indices]
+            )
+
+            for i, labels in zip(batch_indices, word_labels):
+                results[i] = self._decode_spans(texts[i], words_per_text[i], labels)
+
+        return results
+
+    @torch.inference_mode()
+    def _predict_word_labels(self, batch: List[List[str]]) -> List[List[str]]:
+        """Run one forward pass and read the label of each word's first subword"""
+        if not any(batch):
+            return [[] for _ in batch]
+
+        encoding = self.tokenizer(
+            batch,
+            is_split_into_words=True,
+            max_length=self.max_length,
+            padding=True,
+            truncation=True,
+            return_tensors="pt"
+        )
+        logits = self.model(
+            input_ids=encoding["input_ids"],
+            attention_mask=encoding["attention_mask"]
+        ).logits
+        predictions = logits.argmax(dim=-1).tolist()
+
+        word_labels = []
+        for i, words in enumerate(batch):
+            labels = ['O'] * len(words)
+            previous_word = None
+            for token_index, word_id in enumerate(encoding.word_ids(i)):
+                if word_id is not None and word_id != previous_word:
+                    labels[word_id] = self.id2label[predictions[i][token_index]]
+                previous_word = word_id
+            word_labels.append(labels)
+
+        return word_labels
+
+    def _decode_spans(self, text: str, words: List[Tuple[str, int, int]], labels: List[str]) -> Dict[str, List[str]]:
+        """Group BIO word labels into entity strings sliced from the original text"""
+        entities: Dict[str, List[str]] = {}
+        current_type = None
+        span_start = span_end = 0
+
+        def close():
+            if current_type:
+                entities.setdefault(current_type, []).append(text[span_start:span_end].strip())
+
+        for (_, word_start, word_end), label in zip(words, labels):
+            prefix, _, entity_type = label.partition('-')
+            if prefix == 'I' and entity_type == current_type:
+                span_end = word_end
+                continue
+            close()
+            if prefix in ('B', 'I'):
+                # A stray I- tag starts a new span rather than being dropped
+                current_type = entity_type
+                span_start, span_end = word_start, word_end
+            else:
+                current_type = None
+        close()
+
+        return entities
+
+    def to_parsed_data(self, text: str, entities: Dict[str, List[str]], shared_context: Optional[Dict] = None) -> Dict:
+        """Turn tagged spans into DealData fields"""
+        shared_context = shared_context or {}
+
+        partner = (entities.get('PARTNER') or [None])[0] or shared_context.get('partner') or '&'
+
+        geos = []
+        for span in entities.get('GEO', []):
+            geos.extend(split_geos(span))
+        geo = '|'.join(dict.fromkeys(geos)) or '&'
+
+        cpa = crg = cpl = None
+        pricing_model = self.rules._determine_pricing_model(text)
+        for span in entities.get('PRICE', []):
+            match = PRICE_CRG_PATTERN.search(span)
+            if match:
+                cpa = float(match.group(1).replace(',', ''))
+                crg = float(match.group(2)) / 100
+                break
+            number = NUMBER_PATTERN.search(span)
+            if number:
+                value = float(number.group().replace(',', ''))
+                if pricing_model == 'CPL':
+                    cpl = value
+                else:
+                    cpa = value
+                break
+
+        sources = set()
+        for span in entities.get('SOURCE', []):
+            source = self.rules.SOURCE_MAPPINGS.get(span.lower())
+            if source:
+                sources.add(source)
+        source = '|'.join(sorted(sources)) or shared_context.get('source') or 'Facebook'
+
+        funnels = []
+        for span in entities.get('FUNNEL', []):
+            funnels.extend(f.strip() for f in re.split(r'[,/]', span) if f.strip())
+
+        fields = {
+            'partner': partner,
+            'region': region_for(geo),
+            'geo': geo,
+            'language': self.rules._extract_language(text) or shared_context.get('language') or 'Native',
+            'source': source,
+            'pricing_model': pricing_model,
+            'cpa': cpa,
+            'crg': crg,
+            'cpl': cpl,
+            'funnels': funnels,
+            'cr': self.rules._extract_cr(text),
+            'deduction_limit': self.rules._extract_deduction_limit(text) or shared_context.get('deduction_limit')
+        }
+
+        try:
+            return DealData(**fields).dict()
+        except ValueError as e:
+            logger.warning(f"Tagged deal failed validation: {str(e)}")
+            return fields
+
+    def parse(self, texts: List[str], shared_context: Optional[Dict] = None) -> List[Dict]:
+        """Parse deal blocks into the same shape the LLM parsers return"""
+        entities = self.extract(texts)
+        return [
+            {
+                'raw_text': text,
+                'parsed_data': self.to_parsed_data(text, deal_entities, shared_context)
+            }
+            for text, deal_entities in zip(texts, entities)
+        ]
+
+if __name__ == "__main__":
+    import json
+    import time
+
+    extractor = DealNERExtractor(sys.argv[1] if len(sys.argv) > 1 else None)
+    sample = "Partner: Sutra\nAU - 1,300+13% - mainly Beatskai iq (fb)"
+    start = time.time()
+    print(json.dumps(extractor.parse([sample]), indent=2))
+    print(f"Parsed in {(time.time() - start) * 1000:.1f} ms")
@@ -1,24 +1,33 @@
 from transformers import BertForTokenClassification, BertConfig
 from typing import Dict, Optional
 import torch
+from data.dataset import ID2LABEL, LABEL2ID
 
 class DealNERModel:
     def __init__(
         self,
         model_name: str = "dbmdz/bert-large-cased-finetuned-conll03-english",
-        num_labels: int = 11,
+        num_labels: int = len(LABEL2ID),
         dropout: float = 0.1
     ):
         self.config = BertConfig.from_pretrained(
             model_name,
             num_labels=num_labels,
-            hidden_dropout_prob=dropout
+            hidden_dropout_prob=dropout,
+            id2label=ID2LABEL,
+            label2id=LABEL2ID
         )
         
+        # Base checkpoints may ship a classifier head for a different label set
         self.model = BertForTokenClassification.from_pretrained(
             model_name,
-            config=self.config
+            config=self.config,
+            ignore_mismatched_sizes=True
         )
+
+    def save(self, output_dir: str):
+        """Save weights and config so inference can load them with from_pretrained"""
+        self.model.save_pretrained(output_dir)
     
     def forward(
         self,
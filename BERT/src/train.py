@@ -0,0 +1,130 @@
+from transformers import (
+    AutoTokenizer,
+    Trainer,
+    TrainingArguments
+)
+from torch.utils.data import DataLoader
+from rich.console import Console
+from pathlib import Path
+import argparse
+import os
+import sys
+import time
+
+# Add project root to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from data.dataset import DealNERDataset, DynamicPaddingCollator, LengthBucketSampler
+from data.preprocessing import DealDataPreprocessor
+from models.token_classifier import DealNERModel
+
+class BucketedTrainer(Trainer):
+    """Trainer that batches similar-length examples instead of random ones"""
+
+    def get_train_dataloader(self) -> DataLoader:
+        sampler = LengthBucketSampler(
+            self.train_dataset.lengths,
+            batch_size=self.args.per_device_train_batch_size,
+            seed=self.args.seed
+        )
+        return DataLoader(
+            self.train_dataset,
+            batch_sampler=sampler,
+            collate_fn=self.data_collator,
+            num_workers=self.args.dataloader_num_workers
+        )
+
+def train(
+    training_data="data/training_data.jsonl",
+    validation_data="data/validation_data.jsonl",
+    output_dir="BERT/models/deal-ner",
+    model_name="bert-base-cased",
+    epochs=5,
+    batch_size=16,
+    learning_rate=5e-5,
+    max_length=128,
+    cache_dir="BERT/cache"
+):
+    """Train the deal token classifier on the chat-format training data"""
+    console = Console()
+    console.print("\n[bold cyan]Starting NER training...[/]")
+
+    preprocessor = DealDataPreprocessor()
+    train_texts, train_labels = preprocessor.prepare_from_jsonl(training_data, use_cache=bool(cache_dir))
+    console.print(f"[green]Loaded {len(train_texts)} unique training deals[/]")
+
+    eval_dataset = None
+    tokenizer = AutoTokenizer.from_pretrained(model_name)
+    if validation_data and Path(validation_data).exists():
+        val_texts, val_labels = preprocessor.prepare_from_jsonl(validation_data)
+        eval_dataset = DealNERDataset(
+            val_texts, val_labels, tokenizer, max_length,
+            cache_path=f"{cache_dir}/validation" if cache_dir else None
+        )
+        console.print(f"[green]Loaded {len(val_texts)} unique validation deals[/]")
+
+    train_dataset = DealNERDataset(
+        train_texts, train_labels, tokenizer, max_length,
+        cache_path=f"{cache_dir}/train" if cache_dir else None
+    )
+    lengths = train_dataset.lengths
+    console.print(
+        f"[green]Mean sequence length {lengths.mean():.1f} tokens "
+        f"(max {lengths.max()}, padded length {max_length})[/]"
+    )
+    ner_model = DealNERModel(model_name=model_name)
+
+    training_args = TrainingArguments(
+        output_dir=output_dir,
+        num_train_epochs=epochs,
+        per_device_train_batch_size=batch_size,
+        per_device_eval_batch_size=batch_size,
+        learning_rate=learning_rate,
+        weight_decay=0.01,
+        logging_steps=10,
+        eval_strategy="epoch" if eval_dataset is not None else "no",
+        save_strategy="no",
+        use_cpu=True,
+        report_to="none"
+    )
+
+    trainer = BucketedTrainer(
+        model=ner_model.model,
+        args=training_args,
+        data_collator=DynamicPaddingCollator(tokenizer.pad_token_id),
+        train_dataset=train_dataset,
+        eval_dataset=eval_dataset
+    )
+    trainer.train()
+
+    # Save model and tokenizer together for inference
+    ner_model.save(output_dir)
+    tokenizer.save_pretrained(output_dir)
+    console.print(f"[bold green]✓ Saved model to {output_dir}[/]")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Train the deal NER model")
+    parser.add_argument("--training-data", default="data/training_data.jsonl")
+    parser.add_argument("--validation-data", default="data/validation_data.jsonl")
+    parser.add_argument("--output-dir", default="BERT/models/deal-ner")
+    parser.add_argument("--model-name", default="bert-base-cased")
+    parser.add_argument("--epochs", type=int, default=5)
+    parser.add_argument("--batch-size", type=int, default=16)
+    parser.add_argument("--learning-rate", type=float, default=5e-5)
+    parser.add_argument("--cache-dir", default="BERT/cache", help="Tokenized dataset cache; empty string disables it")
+    args = parser.parse_args()
+
+    console = Console()
+    start_time = time.time()
+    train(
+        training_data=args.training_data,
+        validation_data=args.validation_data,
+        output_dir=args.output_dir,
+        model_name=args.model_name,
+        epochs=args.epochs,
+        batch_size=args.batch_size,
+        learning_rate=args.learning_rate,
+        cache_dir=args.cache_dir or None
+    )
+    duration = time.time() - start_time
+    console.print(f"\n✨ NER training completed in {duration:.2f} seconds")
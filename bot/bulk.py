@@ -0,0 +1,140 @@
+import hashlib
+from typing import Dict, List, Optional, Tuple
+
+from telegram import InlineKeyboardButton, InlineKeyboardMarkup
+
+from bot.session import DealRecord, DealSession
+
+PAGE_SIZE = 8
+
+# Weight of each confidence flag when scoring a deal
+FLAG_SCORES = {'explicit': 1.0, 'inherited': 0.75, 'inferred': 0.5, 'empty': 0.0}
+CONFIDENCE_THRESHOLDS = (1.0, 0.75, 0.5)
+
+# Callback codes for filter dimensions (callback data is limited to 64 bytes)
+DIMENSIONS = {'p': 'partner', 'g': 'geo', 'm': 'pricing_model', 'c': 'confidence'}
+DIMENSION_LABELS = {'p': "🤝 Partner", 'g': "🗺 GEO", 'm': "💰 Pricing Model", 'c': "🎯 Confidence"}
+STATUS_ICONS = {'approved': "✅", 'rejected': "❌", None: "▫️"}
+
+def confidence_score(deal: DealRecord) -> Optional[float]:
+    """Mean flag score, or None when the parser gave no confidence flags"""
+    if not deal.confidence:
+        return None
+    return sum(FLAG_SCORES.get(flag, 0.0) for _, flag in deal.confidence) / len(deal.confidence)
+
+def filter_values(session: DealSession, code: str) -> List[Tuple[str, int]]:
+    """Distinct values of a dimension with their deal counts, in a stable order"""
+    if code == 'c':
+        scores = [confidence_score(deal) for deal in session.deals]
+        return [
+            (f"≥ {threshold:.0%}", sum(1 for score in scores if score is not None and score >= threshold))
+            for threshold in CONFIDENCE_THRESHOLDS
+        ]
+    counts: Dict[str, int] = {}
+    for deal in session.deals:
+        value = deal.get(DIMENSIONS[code], 'N/A')
+        counts[value] = counts.get(value, 0) + 1
+    return sorted(counts.items())
+
+def value_digest(value) -> str:
+    """Short hash of a filter value, so a button can check it still means the same value"""
+    return hashlib.blake2s(str(value).encode('utf-8'), digest_size=4).hexdigest()
+
+def matching_indices(session: DealSession, code: str, value_index: int,
+                     digest: Optional[str] = None) -> Optional[List[int]]:
+    """Indices of the deals selected by the value_index-th value of a dimension.
+
+    Values are listed afresh on every call, so an edit since the menu was
+    rendered can shift them; with a digest, None is returned when the
+    value at value_index is no longer the one the button was made for.
+    """
+    values = filter_values(session, code)
+    if value_index >= len(values):
+        return None if digest else []
+    value = values[value_index][0]
+    if digest and value_digest(value) != digest:
+        return None
+    if code == 'c':
+        threshold = CONFIDENCE_THRESHOLDS[value_index]
+        return [
+            i for i, deal in enumerate(session.deals)
+            if (score := confidence_score(deal)) is not None and score >= threshold
+        ]
+    field = DIMENSIONS[code]
+    return [i for i, deal in enumerate(session.deals) if deal.get(field, 'N/A') == value]
+
+def _row_label(index: int, deal: DealRecord, status: Optional[str]) -> str:
+    if deal.crg:
+        price = f"{f'{deal.cpa:g}' if deal.cpa else '?'}+{deal.crg * 100:g}%"
+    elif deal.cpl:
+        price = f"{deal.cpl:g} CPL"
+    elif deal.cpa:
+        price = f"{deal.cpa:g} CPA"
+    else:
+        price = ''
+    label = f"{STATUS_ICONS.get(status)} {index + 1}. {deal.get('partner', 'N/A')} {deal.get('geo', 'N/A')} {price}"
+    return label if len(label) <= 48 else label[:47] + "…"
+
+def page_count(session: DealSession) -> int:
+    return max(1, -(-len(session) // PAGE_SIZE))
+
+def render_list(session: DealSession, statuses: Dict[int, str], page: int) -> Tuple[str, InlineKeyboardMarkup]:
+    """One page of the compact review list; tapping a row cycles its status"""
+    pages = page_count(session)
+    page = min(max(page, 0), pages - 1)
+    start = page * PAGE_SIZE
+    indices = range(start, min(start + PAGE_SIZE, len(session)))
+
+    approved = sum(1 for status in statuses.values() if status == 'approved')
+    rejected = sum(1 for status in statuses.values() if status == 'rejected')
+    text = (
+        f"📋 Deals {start + 1}-{indices[-1] + 1} of {len(session)} (page {page + 1}/{pages})\n\n"
+        f"✅ {approved} approved · ❌ {rejected} rejected · ▫️ {len(session) - approved - rejected} open\n\n"
+        "Tap a deal to cycle its status."
+    )
+
+    keyboard = [
+        [InlineKeyboardButton(_row_label(i, session.deals[i], statuses.get(i)), callback_data=f"toggle_{page}_{i}")]
+        for i in indices
+    ]
+    keyboard.append([
+        InlineKeyboardButton("✅ Page", callback_data=f"pageset_a_{page}"),
+        InlineKeyboardButton("❌ Page", callback_data=f"pageset_r_{page}")
+    ])
+    nav_row = []
+    if page > 0:
+        nav_row.append(InlineKeyboardButton("⬅️", callback_data=f"list_{page - 1}"))
+    nav_row.append(InlineKeyboardButton("⚡ Bulk", callback_data=f"bulkmenu_{page}"))
+    if page < pages - 1:
+        nav_row.append(InlineKeyboardButton("➡️", callback_data=f"list_{page + 1}"))
+    keyboard.append(nav_row)
+    keyboard.append([
+        InlineKeyboardButton("🔍 Card view", callback_data=f"cards_{start}"),
+        InlineKeyboardButton("🏁 Finish", callback_data="finish_0")
+    ])
+    return text, InlineKeyboardMarkup(keyboard)
+
+def render_bulk_menu(page: int) -> Tuple[str, InlineKeyboardMarkup]:
+    keyboard = [
+        [InlineKeyboardButton(label, callback_data=f"bulkdim_{code}_{page}")]
+        for code, label in DIMENSION_LABELS.items()
+    ]
+    keyboard.append([InlineKeyboardButton("🔙 Back", callback_data=f"list_{page}")])
+    return "⚡ Bulk review\n\nChoose what to filter deals by:", InlineKeyboardMarkup(keyboard)
+
+def render_bulk_values(session: DealSession, code: str, page: int,
+                       notice: str = "") -> Tuple[str, InlineKeyboardMarkup]:
+    keyboard = []
+    for i, (value, count) in enumerate(filter_values(session, code)):
+        label = f"{value} ({count})"
+        digest = value_digest(value)
+        keyboard.append([
+            InlineKeyboardButton(f"✅ {label}"[:48], callback_data=f"bulkset_{code}_a_{digest}_{page}_{i}"),
+            InlineKeyboardButton(f"❌ {label}"[:48], callback_data=f"bulkset_{code}_r_{digest}_{page}_{i}")
+        ])
+    keyboard.append([InlineKeyboardButton("🔙 Back", callback_data=f"bulkmenu_{page}")])
+    return (
+        f"{notice}⚡ Bulk review by {DIMENSION_LABELS[code]}\n\n"
+        "Approve or reject every deal with a value:",
+        InlineKeyboardMarkup(keyboard)
+    )
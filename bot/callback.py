@@ -29,10 +29,10 @@ class CallbackHandler:
             if action in ['prev', 'next']:
                 user_data = self.message_handler.current_deals.get(user_id)
                 if user_data:
-                    if action == 'next' and index < len(user_data['deals']) - 1:
-                        user_data['current_index'] = index + 1
+                    if action == 'next' and index < len(user_data.deals) - 1:
+                        user_data.current_index = index + 1
                     elif action == 'prev' and index > 0:
-                        user_data['current_index'] = index - 1
+                        user_data.current_index = index - 1
                     await self.message_handler._display_current_deal(update, query.message, user_id)
                     
             elif action == 'confirm':
@@ -0,0 +1,92 @@
+import asyncio
+import logging
+import time
+from collections import Counter
+from functools import wraps
+from typing import Awaitable, Callable, Dict
+
+from telegram import Update
+from telegram.ext import ContextTypes
+
+logger = logging.getLogger(__name__)
+
+Callback = Callable[[Update, ContextTypes.DEFAULT_TYPE], Awaitable]
+
+class _UserSlot:
+    __slots__ = ('lock', 'depth')
+
+    def __init__(self):
+        self.lock = asyncio.Lock()
+        self.depth = 0
+
+class UserDispatcher:
+    """Runs one user's updates in arrival order and different users in parallel.
+
+    Wrapped callbacks take the user's lock first (asyncio locks wake
+    waiters FIFO), then a slot from a global semaphore. A user with a
+    backlog waits without holding a slot, so at most max_concurrency
+    handlers run at once. The application should use concurrent_updates
+    so updates reach the dispatcher without being serialized upstream.
+    """
+
+    def __init__(self, max_concurrency: int = 16):
+        self.max_concurrency = max_concurrency
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+        self._users: Dict[int, _UserSlot] = {}
+        self.active = 0
+        self.max_depth = 0
+        self.processed = Counter()
+        self.total_wait = 0.0
+
+    def wrap(self, callback: Callback) -> Callback:
+        @wraps(callback)
+        async def dispatch(update: Update, context: ContextTypes.DEFAULT_TYPE):
+            user = update.effective_user
+            if user is None:
+                async with self._semaphore:
+                    return await callback(update, context)
+            return await self._run(user.id, callback, update, context)
+        return dispatch
+
+    async def _run(self, user_id: int, callback: Callback, update: Update, context):
+        slot = self._users.get(user_id)
+        if slot is None:
+            slot = self._users[user_id] = _UserSlot()
+        slot.depth += 1
+        self.max_depth = max(self.max_depth, slot.depth)
+        queued_at = time.perf_counter()
+
+        try:
+            async with slot.lock:
+                async with self._semaphore:
+                    self.total_wait += time.perf_counter() - queued_at
+                    self.active += 1
+                    try:
+                        return await callback(update, context)
+                    finally:
+                        self.active -= 1
+                        self.processed[callback.__name__] += 1
+        finally:
+            slot.depth -= 1
+            # Drop idle users so the table only holds users with work queued
+            if slot.depth == 0 and self._users.get(user_id) is slot:
+                del self._users[user_id]
+
+    def queue_depth(self, user_id: int) -> int:
+        """Updates of a user that are running or waiting"""
+        slot = self._users.get(user_id)
+        return slot.depth if slot else 0
+
+    def metrics(self) -> Dict:
+        depths = [slot.depth for slot in self._users.values()]
+        processed = sum(self.processed.values())
+        return {
+            'active': self.active,
+            'max_concurrency': self.max_concurrency,
+            'users_with_work': len(depths),
+            'queued': sum(depths) - self.active,
+            'deepest_user_queue': max(depths, default=0),
+            'max_depth_seen': self.max_depth,
+            'processed': dict(self.processed),
+            'mean_wait_ms': round(1000 * self.total_wait / processed, 2) if processed else 0.0
+        }
@@ -1,20 +1,44 @@
 from telegram import Update, InlineKeyboardButton, InlineKeyboardMarkup
 from telegram.ext import ContextTypes
-from core.client import DealParser
+from core.backends import create_deal_parser
+from core.deal import Deal
+from core.notion import NotionExporter
+from core.corrections import CorrectionLog
+from core.routing import ConfidenceRouter
+from core.canonical import Canonicalizer
+from core.geo import lookup as lookup_geo, normalize_geo, region_for
+from core.analytics import METRICS, PriceAnalytics
+from bot.sender import OutboundSender
+from bot.render import DealRenderer, render_keyboard, render_prices
+from bot.session import DealSession
+from bot.bulk import PAGE_SIZE, matching_indices, render_bulk_menu, render_bulk_values, render_list
+import asyncio
 import logging
+import shlex
+import sqlite3
 import time
-from typing import Any
+from typing import Any, Dict, List, Optional
 
 logger = logging.getLogger(__name__)
 
+PRICE_OPTIONS = ('geo', 'partner', 'days', 'metric')
+PRICES_USAGE = 'Usage: /prices geo=DE partner="Bitcoin 360 Ai" days=90 metric=cpa\nAll options can be left out.'
+
 class MessageHandler:
     def __init__(self):
-        self.deal_parser = DealParser()
+        self.deal_parser = create_deal_parser()
         self.current_deals = {}
         self.deal_statuses = {}  # Track status of each deal
         self.user_states = {}  # Track user states
         self.session_timeout = 3600  # 1 hour
         self.editing_state = {}  # Track who's editing what
+        self.notion = NotionExporter()
+        self.sender = OutboundSender()  # Bot is attached when the application starts
+        self.renderer = DealRenderer()
+        self.corrections = CorrectionLog()
+        self.router = ConfidenceRouter(known_hashes=self.notion.outbox.known)
+        self.canonical = Canonicalizer()
+        self.analytics = PriceAnalytics()
         
     def _cleanup_old_sessions(self):
         """Remove expired sessions"""
@@ -26,69 +50,23 @@ class MessageHandler:
         for user_id in expired:
             del self.user_states[user_id]
             del self.current_deals[user_id]
+            self.renderer.clear(user_id)
 
-    async def _format_deal_message(self, deal, index: int, total: int, user_id: int) -> str:
-        """Format deal with status emoji and raw text"""
-        # Get deal status
-        status = self.deal_statuses.get(user_id, {}).get(index-1)
-        
-        # Choose status emoji
-        status_emoji = "📋"  # Default
-        if status == 'approved':
-            status_emoji = "✅"
-        elif status == 'rejected':
-            status_emoji = "❌"
-            
-        # Get parsed data from correct location
-        parsed_data = deal.get('parsed_data', deal)
-        raw_text = deal.get('raw_text', '')
-            
-        return (
-            f"{status_emoji} Deal {index} of {total}\n\n"
-            f"📝 Original Text:\n{raw_text}\n\n"
-            f"📊 Deal Details:\n"
-            f"━━━━━━━━━━━━━━━\n"
-            f"🤝 Partner: {parsed_data.get('partner', 'N/A')}\n"
-            f"🌍 Region: {parsed_data.get('region', 'N/A')}\n"
-            f"🗺 GEO: {parsed_data.get('geo', 'N/A')}\n"
-            f"🗣 Language: {parsed_data.get('language', 'Native')}\n"
-            f"📱 Source: {parsed_data.get('source', 'N/A')}\n"
-            f"💰 Pricing Model: {parsed_data.get('pricing_model', 'N/A')}\n"
-            f"💵 CPA: {parsed_data.get('cpa', 'N/A')}\n"
-            f"📈 CRG: {f'{parsed_data.get('crg')*100}%' if parsed_data.get('crg') else 'N/A'}\n"
-            f"🎯 CPL: {parsed_data.get('cpl', 'N/A')}\n"
-            f"🔄 Funnels: {', '.join(parsed_data.get('funnels', [])) or 'N/A'}\n"
-            f"📊 CR: {f'{parsed_data.get('cr')*100}%' if parsed_data.get('cr') else 'N/A'}\n"
-            f"━━━━━━━━━━━━━━━"
+    async def _edit(self, query, text: str = None, reply_markup: InlineKeyboardMarkup = None):
+        """Edit the message a button belongs to through the rate-limited sender"""
+        return await self.sender.edit_message(
+            query.message.chat_id, query.message.message_id, text, reply_markup=reply_markup
         )
 
-    async def _create_keyboard(self, current_index: int, total_deals: int, statuses: dict) -> InlineKeyboardMarkup:
-        keyboard = []
-        
-        # Navigation buttons
-        if total_deals > 1:
-            nav_row = []
-            if current_index > 0:
-                nav_row.append(InlineKeyboardButton("⬅️ Previous", callback_data=f"prev_{current_index}"))
-            if current_index < total_deals - 1:
-                nav_row.append(InlineKeyboardButton("➡️ Next", callback_data=f"next_{current_index}"))
-            if nav_row:
-                keyboard.append(nav_row)
-
-        # Action buttons with status
-        status = statuses.get(current_index)
-        approve_text = "✅ Approved" if status == 'approved' else "Approve ?"
-        reject_text = "❌ Rejected" if status == 'rejected' else "Reject ?"
-        
-        keyboard.extend([
-            [
-                InlineKeyboardButton(approve_text, callback_data=f"approve_{current_index}"),
-                InlineKeyboardButton(reject_text, callback_data=f"reject_{current_index}")
-            ],
-            [InlineKeyboardButton("✏️ Edit", callback_data=f"edit_{current_index}")]
-        ])
+    def _format_deal_message(self, user_id: int, index: int) -> str:
+        """Format the deal at index with status emoji and raw text"""
+        status = self.deal_statuses.get(user_id, {}).get(index)
+        return self.renderer.message(user_id, self.current_deals[user_id], index, status)
 
-        return InlineKeyboardMarkup(keyboard)
+    def _create_keyboard(self, user_id: int, index: int) -> InlineKeyboardMarkup:
+        session = self.current_deals[user_id]
+        suggestions = tuple(canonical for _, _, canonical in session.deals[index].suggestions)
+        return render_keyboard(index, len(session), self.deal_statuses.get(user_id, {}).get(index), suggestions)
 
     async def _update_field_value(self, field: str, value: str) -> Any:
         """Validate and convert field values"""
@@ -100,6 +78,12 @@ class MessageHandler:
             elif field in ['cpa', 'cpl']:
                 # Convert to float
                 return float(value)
+            elif field == 'geo':
+                # Codes, names and flags all become ISO codes
+                geo = normalize_geo(value)
+                if geo == '&' or region_for(geo) == '&':
+                    raise ValueError("No country recognized")
+                return geo
             elif field == 'pricing_model':
                 # Validate pricing model
                 valid_models = ['CPA/CRG', 'CPA', 'CPL']
@@ -127,48 +111,44 @@ class MessageHandler:
                 deal_index = edit_info['deal_index']
                 field = edit_info['field']
                 
+                if field == 'text':
+                    # Corrected deal text: re-parse only this block
+                    del self.editing_state[user_id]
+                    await self._reparse_block(update, user_id, deal_index, message)
+                    return
+
                 # Validate and convert value
                 try:
                     validated_value = await self._update_field_value(field, message)
                 except ValueError as e:
-                    await update.message.reply_text(f"❌ {str(e)}\nPlease try again.")
+                    await self.sender.send_message(update.effective_chat.id, f"❌ {str(e)}\nPlease try again.")
                     return
                 
-                # Update the deal
-                deal = self.current_deals[user_id]['deals'][deal_index]
-                if 'parsed_data' in deal:
-                    deal['parsed_data'][field] = validated_value
-                else:
-                    deal[field] = validated_value
+                # Update the deal and every deal sharing the field
+                changed = self._apply_edit(user_id, deal_index, field, validated_value)
                 
                 # Clear editing state
                 del self.editing_state[user_id]
                 
                 # Show updated deal
-                await update.message.reply_text(
-                    await self._format_deal_message(
-                        deal,
-                        deal_index + 1,
-                        len(self.current_deals[user_id]['deals']),
-                        user_id
-                    ),
-                    reply_markup=await self._create_keyboard(
-                        deal_index,
-                        len(self.current_deals[user_id]['deals']),
-                        self.deal_statuses.get(user_id, {})
-                    )
+                notice = f"🔗 Also updated {len(changed) - 1} deal(s) sharing this {field}.\n\n" if len(changed) > 1 else ""
+                await self.sender.send_message(
+                    update.effective_chat.id,
+                    notice + self._format_deal_message(user_id, deal_index),
+                    reply_markup=self._create_keyboard(user_id, deal_index)
                 )
                 return
                 
             except Exception as e:
                 logger.error(f"Error updating field: {str(e)}")
-                await update.message.reply_text("❌ Error updating field. Please try again.")
+                await self.sender.send_message(update.effective_chat.id, "❌ Error updating field. Please try again.")
                 return
         
         # Normal deal processing
         try:
             # Send processing message
-            processing_message = await update.message.reply_text(
+            processing_message = await self.sender.send_message(
+                update.effective_chat.id,
                 "🔄 Processing your deals...\n"
                 "Please wait while I analyze the information."
             )
@@ -178,7 +158,8 @@ class MessageHandler:
             logger.debug(f"Received from Mistral: {formatted_deals}")  # Added debug log
             
             if not formatted_deals:
-                await processing_message.edit_text(
+                await self.sender.edit_message(
+                    processing_message.chat_id, processing_message.message_id,
                     "❌ No valid deals found.\n\n"
                     "Please format your deals like this:\n"
                     "Partner: Name\n"
@@ -186,50 +167,109 @@ class MessageHandler:
                 )
                 return
                 
+            # Map partner and funnel spellings to their canonical names before dedup
+            self._canonicalize(formatted_deals, update.effective_chat.id)
+            
             # Store deals for this user
-            self.current_deals[user_id] = {
-                'deals': formatted_deals,
-                'current_index': 0
-            }
+            self.renderer.clear(user_id)
+            session = self.current_deals[user_id] = DealSession(message, formatted_deals)
             
             logger.debug(f"Stored deals for user {user_id}: {self.current_deals[user_id]}")  # Added debug log
             
-            # Show first deal
+            # Outlying prices and names close to a known one are shown on the card
+            # and keep the deal out of auto-approval
+            tenant = str(update.effective_chat.id)
+            for deal in session.deals:
+                deal.warnings = tuple(self.router.processor.anomalies.score(deal.parsed_data()))
+                deal.suggestions = tuple(self.canonical.suggestions(deal.parsed_data(), tenant))
+            
+            # Confident, valid, new deals skip manual review
+            reasons = await asyncio.to_thread(self.router.route, [
+                (session.raw_text(deal), deal.parsed_data(), deal.confidence_flags()) for deal in session.deals
+            ], ["unconfirmed name" if deal.suggestions else None for deal in session.deals])
+            review = [i for i, reason in enumerate(reasons) if reason is not None]
+            self.deal_statuses[user_id] = {i: 'approved' for i, reason in enumerate(reasons) if reason is None}
+            
+            if not review:
+                await self.sender.edit_message(
+                    processing_message.chat_id, processing_message.message_id,
+                    f"⚡ All {len(session)} deal(s) were parsed with explicit fields and auto-approved."
+                )
+                await self._show_summary(update, user_id)
+                return
+            
+            if len(review) < len(session):
+                await self.sender.send_message(
+                    update.effective_chat.id,
+                    f"⚡ Auto-approved {len(session) - len(review)} of {len(session)} deals; "
+                    f"{len(review)} need review."
+                )
+            session.current_index = review[0]
+            
+            # Show first deal that needs review
             await self._display_current_deal(update, processing_message, user_id)
             
         except Exception as e:
             logger.error(f"Error processing message: {str(e)}", exc_info=True)
-            await update.message.reply_text(
+            await self.sender.send_message(
+                update.effective_chat.id,
                 "❌ Error processing your message.\n"
                 "Please check the format and try again."
             )
 
+    async def handle_prices(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
+        """/prices [geo=DE] [partner="…"] [days=90] [metric=cpa|crg|cpl]: price history from stored deals"""
+        chat_id = update.effective_chat.id
+        options = {}
+        try:
+            # Options are explicit so partner names like "Bitcoin 360 Ai" are not read as days or a GEO
+            text = (update.effective_message.text or '').partition(' ')[2]
+            for arg in shlex.split(text.replace('“', '"').replace('”', '"')):
+                key, separator, value = arg.partition('=')
+                if not separator or key.lower() not in PRICE_OPTIONS or not value.strip():
+                    raise ValueError(arg)
+                options[key.lower()] = value.strip()
+            metric = options.get('metric', 'cpa').lower()
+            days = int(options.get('days', '90').lower().removesuffix('d'))
+            geo = lookup_geo(options['geo']) if 'geo' in options else None
+            if metric not in METRICS or days <= 0 or ('geo' in options and not geo):
+                raise ValueError(options)
+        except ValueError:
+            await self.sender.send_message(chat_id, f"❌ {PRICES_USAGE}")
+            return
+        partner = options.get('partner')
+
+        filters = {}
+        if geo:
+            filters['geo'] = geo
+        if partner:
+            filters['partner'] = self.canonical.canonical('partner', partner, str(chat_id))
+        bucket = 'week' if days <= 120 else 'month'
+
+        rows = await asyncio.to_thread(self.analytics.distribution, metric, filters, None, None, bucket, days)
+        title = f"{metric.upper()} per {bucket}, last {days} days" + (
+            f" ({', '.join(filters.values())})" if filters else ""
+        )
+        await self.sender.send_message(chat_id, render_prices(title, rows), parse_mode='HTML')
+
     async def _display_current_deal(self, update: Update, message, user_id: int):
         """Display current deal with navigation"""
         user_data = self.current_deals.get(user_id)
         if not user_data:
             return
 
-        current_index = user_data['current_index']
-        total_deals = len(user_data['deals'])
-        deal = user_data['deals'][current_index]
+        current_index = user_data.current_index
 
-        # Pass user_id to _format_deal_message
-        deal_text = await self._format_deal_message(
-            deal, 
-            current_index + 1, 
-            total_deals,
-            user_id
-        )
+        deal_text = self._format_deal_message(user_id, current_index)
         
         # Create keyboard
-        reply_markup = await self._create_keyboard(current_index, total_deals, self.deal_statuses.get(user_id, {}))
+        reply_markup = self._create_keyboard(user_id, current_index)
 
         try:
             if message:
-                await message.edit_text(deal_text, reply_markup=reply_markup)
+                await self.sender.edit_message(message.chat_id, message.message_id, deal_text, reply_markup=reply_markup)
             else:
-                await update.message.reply_text(deal_text, reply_markup=reply_markup)
+                await self.sender.send_message(update.effective_chat.id, deal_text, reply_markup=reply_markup)
         except Exception as e:
             logger.error(f"Error displaying deal: {str(e)}")
 
@@ -249,16 +289,19 @@ class MessageHandler:
                     # Clear user data
                     if user_id in self.current_deals:
                         del self.current_deals[user_id]
+                        self.renderer.clear(user_id)
                     if user_id in self.deal_statuses:
                         del self.deal_statuses[user_id]
                         
-                    await query.edit_message_text(
+                    await self._edit(
+                        query,
                         "🗑️ Deals Discarded Successfully\n\n"
                         "Your deals have been cleared from the system. "
                         "Thank you for using the Deal Parser."
                     )
                     
-                    await update.effective_chat.send_message(
+                    await self.sender.send_message(
+                        update.effective_chat.id,
                         "🎯 Ready for New Deals\n\n"
                         "I'm standing by to assist with your next batch of deals.\n"
                         "Simply paste your deals when ready, and I'll help process them with precision."
@@ -271,7 +314,8 @@ class MessageHandler:
                         del self.deal_statuses[user_id]
                     
                     # First show confirmation
-                    await query.edit_message_text(
+                    await self._edit(
+                        query,
                         "♺ Reprocessing Deals\n\n"
                         "Starting fresh with your original deals. "
                         "Let's review them again."
@@ -279,35 +323,17 @@ class MessageHandler:
                     
                     # Then send new message with first deal
                     if user_id in self.current_deals:
-                        self.current_deals[user_id]['current_index'] = 0
+                        self.current_deals[user_id].current_index = 0
                         # Create new message instead of editing
-                        await update.effective_chat.send_message(
-                            text=await self._format_deal_message(
-                                self.current_deals[user_id]['deals'][0],
-                                1,
-                                len(self.current_deals[user_id]['deals']),
-                                user_id
-                            ),
-                            reply_markup=await self._create_keyboard(
-                                0,
-                                len(self.current_deals[user_id]['deals']),
-                                {}  # Reset statuses
-                            )
+                        await self.sender.send_message(
+                            update.effective_chat.id,
+                            text=self._format_deal_message(user_id, 0),
+                            reply_markup=self._create_keyboard(user_id, 0)
                         )
                     return
                     
                 elif action == 'notion':
-                    await query.edit_message_text(
-                        "⚪️ Deals Successfully Submitted\n\n"
-                        "Your approved deals have been securely transferred to Notion. "
-                        "You can now access them in your workspace."
-                    )
-                    
-                    await update.effective_chat.send_message(
-                        "📋 Ready for Your Next Submission\n\n"
-                        "The Deal Parser is ready to assist with more deals.\n"
-                        "Feel free to submit your next batch whenever you're ready."
-                    )
+                    await self._submit_to_notion(update, user_id)
                     return
             
             # Split callback data
@@ -319,8 +345,7 @@ class MessageHandler:
             if not user_data:
                 return
                 
-            total_deals = len(user_data['deals'])
-            current_deal = user_data['deals'][index]
+            total_deals = len(user_data.deals)
             
             if action == 'edit':
                 # Show edit options keyboard
@@ -345,9 +370,10 @@ class MessageHandler:
                         InlineKeyboardButton("Language", callback_data=f"editfield_language_{index}"),
                         InlineKeyboardButton("Pricing Model", callback_data=f"editmodel_{index}")
                     ],
+                    [InlineKeyboardButton("📝 Deal Text", callback_data=f"editfield_text_{index}")],
                     [InlineKeyboardButton("🔙 Back", callback_data=f"back_{index}")]
                 ]
-                await query.edit_message_reply_markup(InlineKeyboardMarkup(keyboard))
+                await self._edit(query, reply_markup=InlineKeyboardMarkup(keyboard))
                 
             elif action == 'editmodel':
                 # Show pricing model options
@@ -357,23 +383,32 @@ class MessageHandler:
                     [InlineKeyboardButton("CPL", callback_data=f"setmodel_CPL_{index}")],
                     [InlineKeyboardButton("🔙 Back", callback_data=f"edit_{index}")]
                 ]
-                await query.edit_message_reply_markup(InlineKeyboardMarkup(keyboard))
+                await self._edit(query, reply_markup=InlineKeyboardMarkup(keyboard))
                 
             elif action == 'setmodel':
                 # Update pricing model
                 model = parts[1]
-                deal = self.current_deals[user_id]['deals'][index]
-                if 'parsed_data' in deal:
-                    deal['parsed_data']['pricing_model'] = model
-                else:
-                    deal['pricing_model'] = model
+                self._apply_edit(user_id, index, 'pricing_model', model)
                     
                 # Show updated deal
-                await query.edit_message_text(
-                    await self._format_deal_message(deal, index + 1, total_deals, user_id),
-                    reply_markup=await self._create_keyboard(index, total_deals, self.deal_statuses.get(user_id, {}))
+                await self._edit(
+                    query,
+                    self._format_deal_message(user_id, index),
+                    reply_markup=self._create_keyboard(user_id, index)
                 )
                 
+            elif action == 'canon':
+                # Reviewer confirmed a suggested canonical name
+                suggestions = user_data.deals[index].suggestions
+                if int(parts[1]) < len(suggestions):
+                    kind, name, canonical = suggestions[int(parts[1])]
+                    self._confirm_name(user_id, str(update.effective_chat.id), kind, name, canonical)
+                await self._edit(
+                    query,
+                    self._format_deal_message(user_id, index),
+                    reply_markup=self._create_keyboard(user_id, index)
+                )
+
             elif action == 'editfield':
                 # Store editing state
                 self.editing_state[user_id] = {
@@ -382,9 +417,10 @@ class MessageHandler:
                 }
                 
                 # Show edit prompt
-                await query.edit_message_text(
+                await self._edit(
+                    query,
                     f"Please enter new value for {parts[1]}:\n\n" +
-                    (await self._format_deal_message(current_deal, index + 1, total_deals, user_id)) +
+                    self._format_deal_message(user_id, index) +
                     "\n\nType your new value or click Back to cancel.",
                     reply_markup=InlineKeyboardMarkup([[
                         InlineKeyboardButton("🔙 Back", callback_data=f"back_{index}")
@@ -395,68 +431,103 @@ class MessageHandler:
                 # Return to main deal view
                 await self._display_current_deal(update, query.message, user_id)
                 
-            # Handle regular deal buttons (approve, reject, next, prev, back)
-            elif action == 'approve':
-                # Update status
-                if user_id not in self.deal_statuses:
-                    self.deal_statuses[user_id] = {}
-                self.deal_statuses[user_id][index] = 'approved'
-                
-                # If there's a next deal, show it
-                if index < total_deals - 1:
-                    user_data['current_index'] = index + 1
-                    next_deal = user_data['deals'][index + 1]
-                    await query.edit_message_text(
-                        await self._format_deal_message(next_deal, index + 2, total_deals, user_id),
-                        reply_markup=await self._create_keyboard(index + 1, total_deals, self.deal_statuses[user_id])
+            # Compact list and bulk review
+            elif action == 'list':
+                await self._show_list(query, user_id, index)
+
+            elif action == 'toggle':
+                # Cycle open -> approved -> rejected -> open
+                status = self.deal_statuses.get(user_id, {}).get(index)
+                next_status = {None: 'approved', 'approved': 'rejected', 'rejected': None}[status]
+                self._set_statuses(user_id, [index], next_status)
+                await self._show_list(query, user_id, int(parts[1]))
+
+            elif action == 'pageset':
+                start = index * PAGE_SIZE
+                self._set_statuses(
+                    user_id,
+                    range(start, min(start + PAGE_SIZE, total_deals)),
+                    'approved' if parts[1] == 'a' else 'rejected'
+                )
+                await self._show_list(query, user_id, index)
+
+            elif action == 'bulkmenu':
+                text, reply_markup = render_bulk_menu(index)
+                await self._edit(query, text, reply_markup=reply_markup)
+
+            elif action == 'bulkdim':
+                text, reply_markup = render_bulk_values(user_data, parts[1], index)
+                await self._edit(query, text, reply_markup=reply_markup)
+
+            elif action == 'bulkset':
+                # bulkset_<code>_<a|r>_<value digest>_<page>_<value index>
+                page = int(parts[4])
+                indices = matching_indices(user_data, parts[1], index, parts[3])
+                if indices is None:
+                    # A deal was edited since the menu was shown; the values moved
+                    text, reply_markup = render_bulk_values(
+                        user_data, parts[1], page, "⚠️ The deals changed, please choose again.\n\n"
                     )
-                else:
-                    # If this was the last deal, show summary
-                    await self._show_summary(update, user_id)
-                    
-            elif action == 'reject':
+                    await self._edit(query, text, reply_markup=reply_markup)
+                    return
+                self._set_statuses(user_id, indices, 'approved' if parts[2] == 'a' else 'rejected')
+                await self._show_list(query, user_id, page)
+
+            elif action == 'cards':
+                user_data.current_index = min(index, total_deals - 1)
+                await self._display_current_deal(update, query.message, user_id)
+
+            elif action == 'finish':
+                await self._show_summary(update, user_id)
+
+            # Handle regular deal buttons (approve, reject, next, prev, back)
+            elif action in ('approve', 'reject'):
                 # Update status
                 if user_id not in self.deal_statuses:
                     self.deal_statuses[user_id] = {}
-                self.deal_statuses[user_id][index] = 'rejected'
+                self.deal_statuses[user_id][index] = 'approved' if action == 'approve' else 'rejected'
                 
-                # If there's a next deal, show it
-                if index < total_deals - 1:
-                    user_data['current_index'] = index + 1
-                    next_deal = user_data['deals'][index + 1]
-                    await query.edit_message_text(
-                        await self._format_deal_message(next_deal, index + 2, total_deals, user_id),
-                        reply_markup=await self._create_keyboard(index + 1, total_deals, self.deal_statuses[user_id])
+                # Show the next deal that still needs review, skipping auto-approved ones
+                next_index = self._next_open(user_id, index)
+                if next_index is not None:
+                    user_data.current_index = next_index
+                    await self._edit(
+                        query,
+                        self._format_deal_message(user_id, next_index),
+                        reply_markup=self._create_keyboard(user_id, next_index)
                     )
                 else:
-                    # If this was the last deal, show summary
+                    # Every deal has a status, show summary
                     await self._show_summary(update, user_id)
                     
             elif action == 'next':
                 if index < total_deals - 1:
-                    user_data['current_index'] = index + 1
+                    user_data.current_index = index + 1
                     await self._display_current_deal(update, query.message, user_id)
                     
             elif action == 'prev':
                 if index > 0:
-                    user_data['current_index'] = index - 1
+                    user_data.current_index = index - 1
                     await self._display_current_deal(update, query.message, user_id)
                     
             elif action == 'discard_all':
                 # Clear user data
                 if user_id in self.current_deals:
                     del self.current_deals[user_id]
+                    self.renderer.clear(user_id)
                 if user_id in self.deal_statuses:
                     del self.deal_statuses[user_id]
                 
                 # Show professional confirmation
-                await query.edit_message_text(
+                await self._edit(
+                    query,
                     "🗑️ Deals Discarded Successfully\n\n"
                     "Your deals have been cleared from the system. "
                     "Thank you for using the Deal Parser."
                 )
                 
-                await update.effective_chat.send_message(
+                await self.sender.send_message(
+                    update.effective_chat.id,
                     "🎯 Ready for New Deals\n\n"
                     "I'm standing by to assist with your next batch of deals.\n"
                     "Simply paste your deals when ready, and I'll help process them with precision."
@@ -468,7 +539,8 @@ class MessageHandler:
                     del self.deal_statuses[user_id]
                 
                 # Confirmation message
-                await query.edit_message_text(
+                await self._edit(
+                    query,
                     "♺ Reprocessing Deals\n\n"
                     "Starting fresh with your original deals. "
                     "Let's review them again."
@@ -476,27 +548,180 @@ class MessageHandler:
                 
                 # Start over with first deal
                 if user_id in self.current_deals:
-                    self.current_deals[user_id]['current_index'] = 0
+                    self.current_deals[user_id].current_index = 0
                     await self._display_current_deal(update, None, user_id)
                     
             elif action == 'submit_notion':
-                # Show professional confirmation
-                await query.edit_message_text(
-                    "⚪️ Deals Successfully Submitted\n\n"
-                    "Your approved deals have been securely transferred to Notion. "
-                    "You can now access them in your workspace."
-                )
-                
-                await update.effective_chat.send_message(
-                    "📋 Ready for Your Next Submission\n\n"
-                    "The Deal Parser is ready to assist with more deals.\n"
-                    "Feel free to submit your next batch whenever you're ready."
-                )
+                await self._submit_to_notion(update, user_id)
                 
         except Exception as e:
             logger.error(f"Error handling callback: {str(e)}")
             await query.answer("Error processing button click")
 
+    def _canonicalize(self, parser_output: List[Dict], chat_id: int):
+        """Rewrite names in parser results using the chat's dictionaries"""
+        for deal in parser_output:
+            self.canonical.apply(deal.get('parsed_data', deal), str(chat_id))
+
+    def _confirm_name(self, user_id: int, tenant: str, kind: str, name: str, canonical: str) -> List[int]:
+        """Accept a suggested canonical name: remember the spelling and rewrite every deal using it"""
+        self.canonical.learn(kind, name, canonical, tenant)
+        session = self.current_deals[user_id]
+        changed: List[int] = []
+        for i, deal in enumerate(session.deals):
+            if i in changed or (kind, name, canonical) not in deal.suggestions:
+                continue
+            if kind == 'partner':
+                changed += self._apply_edit(user_id, i, 'partner', canonical)
+            else:
+                funnels = list(dict.fromkeys(canonical if funnel == name else funnel for funnel in deal.funnels))
+                changed += self._apply_edit(user_id, i, 'funnels', funnels)
+        return changed
+
+    def _apply_edit(self, user_id: int, index: int, field: str, value: Any) -> List[int]:
+        """Set a field, fanning shared fields out to the deals that inherit them"""
+        session = self.current_deals[user_id]
+        changed = session.fan_out(index, field, value)
+        if field == 'geo':
+            for i in changed:
+                session.deals[i].set('region', region_for(value))
+        if field in ('geo', 'pricing_model', 'cpa', 'crg', 'cpl'):
+            for i in changed:
+                session.deals[i].warnings = tuple(self.router.processor.anomalies.score(session.deals[i].parsed_data()))
+        if field in ('partner', 'funnels'):
+            # Suggestions for names the edit replaced no longer apply
+            for i in changed:
+                deal = session.deals[i]
+                names = {deal.partner, *deal.funnels}
+                deal.suggestions = tuple(suggestion for suggestion in deal.suggestions if suggestion[1] in names)
+        model = getattr(self.deal_parser, 'model', None) or type(self.deal_parser).__name__
+        for i in changed:
+            self.renderer.invalidate(user_id, i)
+            deal = session.deals[i]
+            self.router.stats.corrected(field, dict(deal.confidence).get(field))
+            self.corrections.record(session.raw_text(deal), deal.original, deal.parsed_data(), model)
+        return changed
+
+    async def _reparse_block(self, update: Update, user_id: int, index: int, text: str):
+        """Re-parse one corrected block instead of the whole sheet.
+
+        Parsers with block support get the block and the sheet context from
+        the original structure pass; others get the block with the shared
+        values written back in as header lines.
+        """
+        session = self.current_deals[user_id]
+        context = session.block_context(index)
+        try:
+            if hasattr(self.deal_parser, 'parse_block'):
+                parsed = await self.deal_parser.parse_block(text, context)
+            else:
+                header = "\n".join(
+                    f"{field.replace('_', ' ').title()}: {value}"
+                    for field, value in context['shared_fields'].items()
+                    if field in context['inherits_from']
+                )
+                parsed = await self.deal_parser.parse_deals(f"{header}\n{text}" if header else text)
+        except Exception as e:
+            logger.error(f"Error re-parsing block: {str(e)}")
+            parsed = None
+
+        if not parsed:
+            await self.sender.send_message(update.effective_chat.id, "❌ Could not parse that text. Please try again.")
+            return
+
+        self._canonicalize(parsed, update.effective_chat.id)
+        count = session.replace(index, parsed)
+        for deal in session.deals[index:index + count]:
+            deal.warnings = tuple(self.router.processor.anomalies.score(deal.parsed_data()))
+            deal.suggestions = tuple(self.canonical.suggestions(deal.parsed_data(), str(update.effective_chat.id)))
+        if count != 1:
+            # Later deals moved; shift their statuses and drop stale renderings
+            statuses = self.deal_statuses.get(user_id, {})
+            self.deal_statuses[user_id] = {
+                (i if i < index else i + count - 1): status
+                for i, status in statuses.items() if i != index
+            }
+            self.renderer.clear(user_id)
+        else:
+            self.deal_statuses.get(user_id, {}).pop(index, None)
+            self.renderer.invalidate(user_id, index)
+
+        session.current_index = index
+        await self.sender.send_message(
+            update.effective_chat.id,
+            self._format_deal_message(user_id, index),
+            reply_markup=self._create_keyboard(user_id, index)
+        )
+
+    def _next_open(self, user_id: int, index: int) -> Optional[int]:
+        """First deal after index (wrapping around) with no status yet, or None when all are decided"""
+        total = len(self.current_deals[user_id])
+        statuses = self.deal_statuses.get(user_id, {})
+        for step in range(1, total):
+            candidate = (index + step) % total
+            if candidate not in statuses:
+                return candidate
+        return None
+
+    def _set_statuses(self, user_id: int, indices, status: Optional[str]):
+        """Set (or clear, with None) the status of many deals in one update"""
+        statuses = self.deal_statuses.setdefault(user_id, {})
+        if status is None:
+            for index in indices:
+                statuses.pop(index, None)
+        else:
+            statuses.update(dict.fromkeys(indices, status))
+
+    async def _show_list(self, query, user_id: int, page: int):
+        text, reply_markup = render_list(self.current_deals[user_id], self.deal_statuses.get(user_id, {}), page)
+        await self._edit(query, text, reply_markup=reply_markup)
+
+    def _approved_deals(self, user_id: int) -> List[Deal]:
+        """Approved deals of a user as validated Deal objects"""
+        user_data = self.current_deals.get(user_id)
+        if not user_data:
+            return []
+
+        deals = []
+        statuses = self.deal_statuses.get(user_id, {})
+        for index, deal in enumerate(user_data.deals):
+            if statuses.get(index) != 'approved':
+                continue
+            try:
+                deals.append(Deal.from_parser_output(user_data.raw_text(deal), deal.parsed_data()))
+            except ValueError as e:
+                logger.warning(f"Skipping invalid deal {index} for Notion export: {str(e)}")
+        return deals
+
+    def _store_deals(self, deals: List[Deal]):
+        processor = self.router.processor
+        for deal in deals:
+            try:
+                processor.is_duplicate(deal.raw_text, deal)
+            except sqlite3.Error as e:
+                logger.error(f"Error storing deal: {str(e)}")
+
+    async def _submit_to_notion(self, update: Update, user_id: int):
+        """Queue approved deals for export; the Notion worker sends them in the background"""
+        deals = self._approved_deals(user_id)
+        queued = self.notion.submit(deals) if deals else 0
+        # Record them in deals.db: dedup history, price rollups and anomaly statistics
+        await asyncio.to_thread(self._store_deals, deals)
+
+        await self._edit(
+            update.callback_query,
+            "⚪️ Deals Queued for Notion\n\n"
+            f"{queued} approved deal(s) are being transferred to your Notion workspace"
+            f"{f' ({len(deals) - queued} already submitted)' if len(deals) > queued else ''}."
+        )
+        
+        await self.sender.send_message(
+            update.effective_chat.id,
+            "📋 Ready for Your Next Submission\n\n"
+            "The Deal Parser is ready to assist with more deals.\n"
+            "Feel free to submit your next batch whenever you're ready."
+        )
+
     async def _show_summary(self, update: Update, user_id: int):
         """Show summary of all deals"""
         user_data = self.current_deals.get(user_id)
@@ -506,30 +731,29 @@ class MessageHandler:
         approved_deals = []
         rejected_deals = []
         
-        for index, deal in enumerate(user_data['deals']):
+        for index, deal in enumerate(user_data.deals):
             status = self.deal_statuses[user_id].get(index)
             if not status:
                 continue
                 
             # Format deal for summary
-            parsed_data = deal.get('parsed_data', deal)
             deal_text = (
-                f"{parsed_data.get('partner', 'N/A')} "
-                f"[{', '.join(parsed_data.get('source', '').split('|'))}] "
-                f"{parsed_data.get('geo', 'N/A')} "
-                f"{parsed_data.get('language', 'Native')} "
+                f"{deal.get('partner', 'N/A')} "
+                f"[{', '.join(deal.get('source', '').split('|'))}] "
+                f"{deal.get('geo', 'N/A')} "
+                f"{deal.get('language', 'Native')} "
             )
             
             # Add pricing
-            if parsed_data.get('crg'):
-                deal_text += f"{parsed_data.get('cpa', 'N/A')} + {parsed_data.get('crg')*100}%"
-            elif parsed_data.get('cpl'):
-                deal_text += f"{parsed_data.get('cpl')} CPL"
-            elif parsed_data.get('cpa'):
-                deal_text += f"{parsed_data.get('cpa')} CPA"
+            if deal.get('crg'):
+                deal_text += f"{deal.get('cpa', 'N/A')} + {deal.get('crg')*100}%"
+            elif deal.get('cpl'):
+                deal_text += f"{deal.get('cpl')} CPL"
+            elif deal.get('cpa'):
+                deal_text += f"{deal.get('cpa')} CPA"
                 
             # Add funnels
-            funnels = parsed_data.get('funnels', [])
+            funnels = deal.get('funnels', [])
             if funnels:
                 deal_text += f"\nFunnels: {', '.join(funnels)}"
             
@@ -554,7 +778,8 @@ class MessageHandler:
             [InlineKeyboardButton("⚪️ Submit to Notion ⚪️", callback_data="final_notion")]
         ]
         
-        await update.effective_chat.send_message(
+        await self.sender.send_message(
+            update.effective_chat.id,
             text=summary,
             reply_markup=InlineKeyboardMarkup(keyboard)
         )
\ No newline at end of file
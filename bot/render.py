@@ -0,0 +1,116 @@
+import html
+from functools import lru_cache
+from typing import Dict, List, Optional, Tuple
+
+from telegram import InlineKeyboardButton, InlineKeyboardMarkup
+
+from bot.bulk import PAGE_SIZE
+from bot.session import DealRecord, DealSession
+
+STATUS_EMOJI = {'approved': "✅", 'rejected': "❌"}
+
+def _percent(value) -> str:
+    return f"{value * 100}%" if value else 'N/A'
+
+def render_details(deal: DealRecord, raw_text: str) -> str:
+    """The part of a deal card that only changes when the deal is edited"""
+    return (
+        f"📝 Original Text:\n{raw_text}\n\n"
+        f"📊 Deal Details:\n"
+        f"━━━━━━━━━━━━━━━\n"
+        f"🤝 Partner: {deal.get('partner', 'N/A')}\n"
+        f"🌍 Region: {deal.get('region', 'N/A')}\n"
+        f"🗺 GEO: {deal.get('geo', 'N/A')}\n"
+        f"🗣 Language: {deal.get('language', 'Native')}\n"
+        f"📱 Source: {deal.get('source', 'N/A')}\n"
+        f"💰 Pricing Model: {deal.get('pricing_model', 'N/A')}\n"
+        f"💵 CPA: {deal.get('cpa', 'N/A')}\n"
+        f"📈 CRG: {_percent(deal.crg)}\n"
+        f"🎯 CPL: {deal.get('cpl', 'N/A')}\n"
+        f"🔄 Funnels: {', '.join(deal.funnels) or 'N/A'}\n"
+        f"📊 CR: {_percent(deal.cr)}\n"
+        f"━━━━━━━━━━━━━━━"
+    ) + "".join(f"\n⚠️ {warning}" for warning in deal.warnings) + "".join(
+        f"\n💡 {kind.title()} '{name}' may be '{canonical}'" for kind, name, canonical in deal.suggestions
+    )
+
+@lru_cache(maxsize=4096)
+def render_keyboard(current_index: int, total_deals: int, status: Optional[str],
+                    suggestions: Tuple[str, ...] = ()) -> InlineKeyboardMarkup:
+    """Review keyboard; markups are immutable so one instance serves every user"""
+    keyboard = []
+
+    # Navigation buttons
+    if total_deals > 1:
+        nav_row = []
+        if current_index > 0:
+            nav_row.append(InlineKeyboardButton("⬅️ Previous", callback_data=f"prev_{current_index}"))
+        if current_index < total_deals - 1:
+            nav_row.append(InlineKeyboardButton("➡️ Next", callback_data=f"next_{current_index}"))
+        if nav_row:
+            keyboard.append(nav_row)
+
+    # Action buttons with status
+    approve_text = "✅ Approved" if status == 'approved' else "Approve ?"
+    reject_text = "❌ Rejected" if status == 'rejected' else "Reject ?"
+
+    keyboard.extend([
+        [
+            InlineKeyboardButton(approve_text, callback_data=f"approve_{current_index}"),
+            InlineKeyboardButton(reject_text, callback_data=f"reject_{current_index}")
+        ],
+        [InlineKeyboardButton("✏️ Edit", callback_data=f"edit_{current_index}")]
+    ])
+
+    # Confirming a suggested name rewrites it and remembers the spelling
+    for n, canonical in enumerate(suggestions):
+        keyboard.append([InlineKeyboardButton(f"💡 Use '{canonical}'", callback_data=f"canon_{n}_{current_index}")])
+
+    # Large sheets are faster to review as a list with bulk actions
+    if total_deals > 1:
+        keyboard.append([InlineKeyboardButton("📋 List view", callback_data=f"list_{current_index // PAGE_SIZE}")])
+
+    return InlineKeyboardMarkup(keyboard)
+
+def render_prices(title: str, rows: List[Dict], limit: int = 12) -> str:
+    """Price history as monospace lines, newest buckets last"""
+    if not rows:
+        return f"📉 {html.escape(title)}\n\nNo deals found."
+    lines = [f"{row['bucket']:<10} {row['n']:>4}  {row['p50']:>8.4g}  {row['p25']:.4g}–{row['p75']:.4g}" for row in rows[-limit:]]
+    return (
+        f"📈 {html.escape(title)}\n\n"
+        f"<pre>{'bucket':<10} {'n':>4}  {'median':>8}  p25–p75\n" + "\n".join(lines) + "</pre>"
+    )
+
+class DealRenderer:
+    """Caches each deal's detail block per user and deal index.
+
+    Navigating or changing a status only rebuilds the one-line header;
+    the detail block is rendered again only after its deal is edited.
+    """
+
+    def __init__(self):
+        self._details: Dict[int, Dict[int, str]] = {}
+
+    def details(self, user_id: int, session: DealSession, index: int) -> str:
+        rendered = self._details.setdefault(user_id, {})
+        text = rendered.get(index)
+        if text is None:
+            deal = session.deals[index]
+            text = rendered[index] = render_details(deal, session.raw_text(deal))
+        return text
+
+    def message(self, user_id: int, session: DealSession, index: int, status: Optional[str]) -> str:
+        """Full card for the deal at zero-based index"""
+        return (
+            f"{STATUS_EMOJI.get(status, '📋')} Deal {index + 1} of {len(session)}\n\n"
+            f"{self.details(user_id, session, index)}"
+        )
+
+    def invalidate(self, user_id: int, index: int):
+        """Forget one deal's rendering after it was edited"""
+        self._details.get(user_id, {}).pop(index, None)
+
+    def clear(self, user_id: int):
+        """Forget a user's renderings when their deals are replaced or discarded"""
+        self._details.pop(user_id, None)
@@ -0,0 +1,198 @@
+import asyncio
+import logging
+import time
+from typing import Dict, Optional, Tuple
+
+from telegram import Bot, InlineKeyboardMarkup, Message
+from telegram.error import BadRequest, RetryAfter, TimedOut
+
+logger = logging.getLogger(__name__)
+
+class TokenBucket:
+    """Allows `rate` operations per second with bursts up to `capacity`"""
+
+    def __init__(self, rate: float, capacity: float):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    async def acquire(self):
+        async with self._lock:
+            self._refill()
+            if self.tokens < 1:
+                await asyncio.sleep((1 - self.tokens) / self.rate)
+                self._refill()
+            self.tokens -= 1
+
+    async def wait_ready(self):
+        """Wait until a token is available without taking it"""
+        self._refill()
+        if self.tokens < 1:
+            await asyncio.sleep((1 - self.tokens) / self.rate)
+
+    def pause(self, seconds: float):
+        """Drain the bucket so nothing goes out for `seconds`"""
+        self._refill()
+        self.tokens = min(self.tokens, 1 - seconds * self.rate)
+
+class _PendingEdit:
+    __slots__ = ('text', 'reply_markup', 'future')
+
+    def __init__(self):
+        self.text: Optional[str] = None
+        self.reply_markup: Optional[InlineKeyboardMarkup] = None
+        self.future: asyncio.Future = asyncio.get_running_loop().create_future()
+
+class OutboundSender:
+    """Rate-limited sender for everything the bot posts to Telegram.
+
+    Every call waits on a global token bucket and the chat's own bucket,
+    sized below Telegram's limits (about 30 messages a second overall and
+    one a second per chat, with short bursts). Edits to the same message
+    that arrive while an earlier edit is waiting are merged, latest state
+    winning, so a fast reviewer costs one edit instead of one per click.
+    RetryAfter pauses the affected chat bucket, and the global bucket too
+    when other chats are under flood control at the same time (the limit
+    hit is then bot-wide), and the call is retried. A timed-out edit is
+    retried; a timed-out send is not, since Telegram often delivers the
+    message anyway and a retry would post it twice.
+    """
+
+    def __init__(
+        self,
+        bot: Optional[Bot] = None,
+        global_rate: float = 25.0,
+        chat_rate: float = 1.0,
+        chat_burst: float = 3.0,
+        max_retries: int = 3
+    ):
+        self.bot = bot
+        self.global_bucket = TokenBucket(global_rate, global_rate)
+        self.chat_rate = chat_rate
+        self.chat_burst = chat_burst
+        self.max_retries = max_retries
+        self._chat_buckets: Dict[int, TokenBucket] = {}
+        self._pending: Dict[Tuple[int, int], _PendingEdit] = {}
+        self._edit_locks: Dict[Tuple[int, int], asyncio.Lock] = {}
+        self._flooded_until: Dict[int, float] = {}  # Chat -> end of its latest flood wait
+        self.coalesced = 0
+        self.flood_waits = 0
+
+    def attach(self, bot: Bot):
+        self.bot = bot
+
+    def _chat_bucket(self, chat_id: int) -> TokenBucket:
+        bucket = self._chat_buckets.get(chat_id)
+        if bucket is None:
+            bucket = self._chat_buckets[chat_id] = TokenBucket(self.chat_rate, self.chat_burst)
+        return bucket
+
+    def _bot_wide(self, chat_id: int, delay: float) -> bool:
+        """Record a chat's flood wait; True when another chat is under one as well"""
+        now = time.monotonic()
+        self._flooded_until = {chat: until for chat, until in self._flooded_until.items() if until > now}
+        others = any(chat != chat_id for chat in self._flooded_until)
+        self._flooded_until[chat_id] = now + delay
+        return others
+
+    async def _call(self, chat_id: int, method, idempotent: bool = True, **kwargs):
+        """Run one Bot API call under the rate limits, retrying flood waits.
+
+        Timeouts are only retried for idempotent calls.
+        """
+        bucket = self._chat_bucket(chat_id)
+        for attempt in range(self.max_retries + 1):
+            await bucket.acquire()
+            await self.global_bucket.acquire()
+            try:
+                return await method(chat_id=chat_id, **kwargs)
+            except RetryAfter as e:
+                self.flood_waits += 1
+                delay = e.retry_after.total_seconds() if hasattr(e.retry_after, 'total_seconds') else e.retry_after
+                if attempt == self.max_retries:
+                    raise
+                bucket.pause(delay)
+                if self._bot_wide(chat_id, delay):
+                    logger.warning(f"Bot-wide flood control, pausing all chats for {delay}s")
+                    self.global_bucket.pause(delay)
+                else:
+                    logger.warning(f"Flood control for chat {chat_id}, retrying in {delay}s")
+            except TimedOut:
+                if not idempotent or attempt == self.max_retries:
+                    raise
+
+    async def send_message(self, chat_id: int, text: str,
+                           reply_markup: Optional[InlineKeyboardMarkup] = None,
+                           parse_mode: Optional[str] = None) -> Message:
+        return await self._call(
+            chat_id, self.bot.send_message, idempotent=False,
+            text=text, reply_markup=reply_markup, parse_mode=parse_mode
+        )
+
+    async def edit_message(self, chat_id: int, message_id: int, text: Optional[str] = None,
+                           reply_markup: Optional[InlineKeyboardMarkup] = None):
+        """Edit a message's text and/or keyboard; rapid edits collapse into one.
+
+        A keyboard-only edit merged into a pending text edit keeps that
+        text, so the merged edit still shows the latest of both.
+        """
+        key = (chat_id, message_id)
+        pending = self._pending.get(key)
+        if pending is None:
+            pending = self._pending[key] = _PendingEdit()
+            asyncio.create_task(self._flush_edit(key, pending))
+        else:
+            self.coalesced += 1
+        if text is not None:
+            pending.text = text
+        pending.reply_markup = reply_markup
+        return await asyncio.shield(pending.future)
+
+    async def _flush_edit(self, key: Tuple[int, int], pending: _PendingEdit):
+        chat_id, message_id = key
+        lock = self._edit_locks.setdefault(key, asyncio.Lock())
+        try:
+            async with lock:
+                # Wait for our turn before taking the payload so later edits can still merge
+                await self._chat_bucket(chat_id).wait_ready()
+                if self._pending.get(key) is pending:
+                    del self._pending[key]
+
+                if pending.text is not None:
+                    result = await self._call(
+                        chat_id, self.bot.edit_message_text,
+                        message_id=message_id, text=pending.text, reply_markup=pending.reply_markup
+                    )
+                else:
+                    result = await self._call(
+                        chat_id, self.bot.edit_message_reply_markup,
+                        message_id=message_id, reply_markup=pending.reply_markup
+                    )
+            pending.future.set_result(result)
+        except BadRequest as e:
+            if "not modified" in str(e).lower():
+                pending.future.set_result(None)
+            else:
+                pending.future.set_exception(e)
+        except Exception as e:
+            pending.future.set_exception(e)
+        finally:
+            if self._pending.get(key) is pending:
+                del self._pending[key]
+            if not lock.locked() and key not in self._pending:
+                self._edit_locks.pop(key, None)
+
+    def metrics(self) -> Dict:
+        return {
+            'pending_edits': len(self._pending),
+            'coalesced_edits': self.coalesced,
+            'flood_waits': self.flood_waits,
+            'chats': len(self._chat_buckets)
+        }
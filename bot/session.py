@@ -0,0 +1,184 @@
+import sys
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+STRING_FIELDS = ('partner', 'region', 'geo', 'language', 'source', 'pricing_model')
+NUMERIC_FIELDS = ('cpa', 'crg', 'cpl', 'cr', 'deduction_limit')
+FIELDS = STRING_FIELDS + NUMERIC_FIELDS + ('funnels',)
+
+# The structure pass names shared fields by their header label
+SHARED_ALIASES = {'model': 'pricing_model'}
+# Fields that may be treated as shared when the parser returns no structure metadata.
+# Per-deal fields (a flag-only GEO, a defaulted language or source, a pricing model
+# derived from the prices) repeat across deals without being inherited.
+FALLBACK_SHARED = ('partner',)
+
+# Identical funnel lists and confidence patterns recur across deals; keep one copy of each
+_shared_tuples: Dict[tuple, tuple] = {}
+
+def _share(value: tuple) -> tuple:
+    return _shared_tuples.setdefault(value, value)
+
+def _intern(value) -> Optional[str]:
+    return sys.intern(value) if isinstance(value, str) else value
+
+def _funnels(value) -> Tuple[str, ...]:
+    if not value or value == '&':
+        return ()
+    if isinstance(value, str):
+        value = value.replace('|', ',').replace('/', ',').split(',')
+    return _share(tuple(sys.intern(f.strip()) for f in value if f and f.strip()))
+
+class DealRecord:
+    """One parsed deal in a review session.
+
+    Field values are stored flat on slots with repeated strings interned;
+    the deal's raw text is an offset range into the session's text.
+    """
+    __slots__ = ('start', 'end', 'confidence', 'inherits', 'original', 'warnings', 'suggestions') + FIELDS
+
+    def __init__(self, start: int, end: int, parsed_data: Dict, confidence_flags: Optional[Dict] = None,
+                 inherits: Iterable[str] = ()):
+        self.start = start
+        self.end = end
+        self.original: Optional[Dict] = None  # Parser output, kept once the deal is first edited
+        self.warnings: Tuple[str, ...] = ()  # Price anomalies found at ingest
+        self.suggestions: Tuple[Tuple[str, str, str], ...] = ()  # (kind, name, canonical) awaiting confirmation
+        self.inherits = _share(tuple(sorted(
+            sys.intern(SHARED_ALIASES.get(field, field)) for field in inherits or () if isinstance(field, str)
+        )))
+        for field in STRING_FIELDS:
+            setattr(self, field, _intern(parsed_data.get(field)))
+        for field in NUMERIC_FIELDS:
+            setattr(self, field, parsed_data.get(field))
+        self.funnels = _funnels(parsed_data.get('funnels'))
+        self.confidence = _share(tuple(
+            _share((sys.intern(field), sys.intern(flag))) for field, flag in (confidence_flags or {}).items()
+            if isinstance(flag, str)
+        ))
+
+    def get(self, field: str, default: Any = None) -> Any:
+        value = getattr(self, field, None)
+        return default if value is None else value
+
+    def set(self, field: str, value: Any):
+        if field not in FIELDS:
+            raise ValueError(f"Unknown field: {field}")
+        if self.original is None:
+            self.original = self.parsed_data()
+        if field == 'funnels':
+            value = _funnels(value)
+        elif field in STRING_FIELDS:
+            value = _intern(value)
+        setattr(self, field, value)
+
+    def parsed_data(self) -> Dict:
+        """Field values as a plain dict, the shape DealData expects"""
+        data = {field: getattr(self, field) for field in STRING_FIELDS + NUMERIC_FIELDS}
+        data['funnels'] = list(self.funnels)
+        return data
+
+    def confidence_flags(self) -> Dict[str, str]:
+        return dict(self.confidence)
+
+class DealSession:
+    """A user's deals under review, normalized from whatever shape the parser returned.
+
+    The message text is kept once; each record points into it. Raw text
+    the parser returned that does not occur in the message (a rewritten
+    block) is appended after it so every record still has an offset range.
+    """
+    __slots__ = ('text', 'deals', 'current_index', 'shared', '_cursor')
+
+    def __init__(self, text: str, parser_output: Iterable[Dict] = ()):
+        self.text = text
+        self.deals: List[DealRecord] = []
+        self.current_index = 0
+        self.shared: Dict[str, Any] = {}  # Sheet-level values from the parser's structure pass
+        self._cursor = 0
+        for deal in parser_output:
+            self.add(deal)
+
+    def __len__(self) -> int:
+        return len(self.deals)
+
+    def _locate(self, raw_text: str) -> Tuple[int, int]:
+        raw_text = raw_text.strip()
+        if not raw_text:
+            return 0, 0
+        # Blocks usually appear in order, so search forward first
+        start = self.text.find(raw_text, self._cursor)
+        if start < 0:
+            start = self.text.find(raw_text)
+        if start < 0:
+            start = len(self.text) + 1
+            self.text = f"{self.text}\n{raw_text}"
+        self._cursor = start + len(raw_text)
+        return start, start + len(raw_text)
+
+    def _record(self, deal: Dict) -> DealRecord:
+        parsed_data = deal.get('parsed_data', deal)
+        metadata = deal.get('metadata') or {}
+        if not self.shared and metadata.get('shared_context'):
+            self.shared = {
+                SHARED_ALIASES.get(field, field): value
+                for field, value in metadata['shared_context'].items() if value is not None
+            }
+        start, end = self._locate(deal.get('raw_text') or '')
+        return DealRecord(start, end, parsed_data, metadata.get('confidence_flags'), metadata.get('shared_fields'))
+
+    def add(self, deal: Dict) -> DealRecord:
+        """Add one parser result, nested ({raw_text, parsed_data, metadata}) or flat"""
+        record = self._record(deal)
+        self.deals.append(record)
+        return record
+
+    def replace(self, index: int, parser_output: List[Dict]) -> int:
+        """Swap the deal at index for the deals a re-parse of its block returned.
+
+        Returns how many deals now stand in its place.
+        """
+        records = [self._record(deal) for deal in parser_output]
+        self.deals[index:index + 1] = records
+        return len(records)
+
+    def inheritors(self, index: int, field: str) -> List[int]:
+        """Indices of the deals that share field with the deal at index.
+
+        With structure metadata these are the deals whose block inherits
+        the field. Parsers that return none only share the partner, with
+        the deals holding the same one without it appearing in their text.
+        """
+        deal = self.deals[index]
+        if any(record.inherits for record in self.deals):
+            if field not in deal.inherits:
+                return [index]
+            return [i for i, record in enumerate(self.deals) if field in record.inherits]
+
+        value = deal.get(field)
+        if value is None or field not in FALLBACK_SHARED:
+            return [index]
+        needle = str(value).lower()
+        return [
+            i for i, record in enumerate(self.deals)
+            if i == index or (record.get(field) == value and needle not in self.raw_text(record).lower())
+        ]
+
+    def fan_out(self, index: int, field: str, value: Any) -> List[int]:
+        """Set field on the deal at index and every deal sharing it; returns the changed indices"""
+        changed = self.inheritors(index, field)
+        for i in changed:
+            self.deals[i].set(field, value)
+        if len(changed) > 1 or field in self.deals[index].inherits:
+            self.shared[field] = self.deals[index].get(field)
+        return changed
+
+    def block_context(self, index: int) -> Dict:
+        """Sheet context for re-parsing the block behind the deal at index"""
+        labels = {field: label for label, field in SHARED_ALIASES.items()}
+        return {
+            'shared_fields': {labels.get(field, field): value for field, value in self.shared.items()},
+            'inherits_from': [labels.get(field, field) for field in self.deals[index].inherits]
+        }
+
+    def raw_text(self, record: DealRecord) -> str:
+        return self.text[record.start:record.end]
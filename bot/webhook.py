@@ -0,0 +1,111 @@
+import asyncio
+import hmac
+import logging
+import signal
+from typing import Callable, Dict, Optional
+
+from aiohttp import web
+from telegram import Update
+from telegram.ext import Application
+
+logger = logging.getLogger(__name__)
+
+SECRET_HEADER = "X-Telegram-Bot-Api-Secret-Token"
+
+class WebhookServer:
+    """aiohttp server that feeds Telegram webhook updates into the application.
+
+    Each POST is decoded and put on the application's update queue, so the
+    response goes back to Telegram at once and handlers run with the
+    application's concurrent_updates setting. Synthetic payloads can be
+    posted to the same endpoint locally (see tools/send_update.py).
+    """
+
+    def __init__(
+        self,
+        application: Application,
+        path: str = "/telegram",
+        secret_token: Optional[str] = None,
+        host: str = "0.0.0.0",
+        port: int = 8443,
+        metrics: Optional[Callable[[], Dict]] = None
+    ):
+        self.application = application
+        self.metrics = metrics
+        self.path = path
+        self.secret_token = secret_token
+        self.host = host
+        self.port = port
+
+    async def handle_update(self, request: web.Request) -> web.Response:
+        if self.secret_token and not hmac.compare_digest(
+            request.headers.get(SECRET_HEADER, ''), self.secret_token
+        ):
+            return web.Response(status=403)
+
+        try:
+            data = await request.json()
+            update = Update.de_json(data, self.application.bot)
+        except ValueError:
+            return web.Response(status=400, text="Invalid update payload")
+
+        await self.application.update_queue.put(update)
+        return web.Response()
+
+    async def handle_health(self, request: web.Request) -> web.Response:
+        health = {
+            "running": self.application.running,
+            "queued_updates": self.application.update_queue.qsize()
+        }
+        if self.metrics:
+            health.update(self.metrics())
+        return web.json_response(health)
+
+    def app(self) -> web.Application:
+        app = web.Application()
+        app.router.add_post(self.path, self.handle_update)
+        app.router.add_get("/healthz", self.handle_health)
+        return app
+
+    async def serve(self, webhook_url: Optional[str] = None):
+        """Run the application and server until interrupted.
+
+        With a webhook_url the webhook is registered with Telegram;
+        without one the server only accepts locally posted updates.
+        """
+        application = self.application
+        await application.initialize()
+        if application.post_init:
+            await application.post_init(application)
+        await application.start()
+
+        runner = web.AppRunner(self.app())
+        await runner.setup()
+        await web.TCPSite(runner, self.host, self.port).start()
+
+        if webhook_url:
+            await application.bot.set_webhook(
+                url=webhook_url.rstrip('/') + self.path,
+                secret_token=self.secret_token,
+                allowed_updates=Update.ALL_TYPES
+            )
+        logger.info(f"Webhook server listening on {self.host}:{self.port}{self.path}")
+
+        stop = asyncio.Event()
+        loop = asyncio.get_running_loop()
+        for sig in (signal.SIGINT, signal.SIGTERM):
+            try:
+                loop.add_signal_handler(sig, stop.set)
+            except NotImplementedError:
+                pass
+
+        try:
+            await stop.wait()
+        finally:
+            await runner.cleanup()
+            if webhook_url:
+                await application.bot.delete_webhook()
+            await application.stop()
+            if application.post_shutdown:
+                await application.post_shutdown(application)
+            await application.shutdown()
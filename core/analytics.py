@@ -0,0 +1,259 @@
+import sqlite3
+import time
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+METRICS = ('cpa', 'crg', 'cpl')
+# Dimensions reports can filter or group by; geo and source hold several values joined by '|'
+DIMENSIONS = ('geo', 'region', 'partner', 'source')
+MULTI_VALUED = ('geo', 'region', 'source')
+BUCKETS = ('day', 'week', 'month')
+ROLLUP_TRIGGER = 'deals_price_rollup_v1'
+
+def _values_sql(dimension: str, row: str) -> Tuple[str, str]:
+    """(FROM clause, value expression) yielding each value of a dimension for one deals row"""
+    if dimension == 'all':
+        return '', "'*'"
+    if dimension in MULTI_VALUED:
+        # json_each turns 'DE|AT' into one row per code
+        array = (
+            f"""'["' || replace(replace(replace(COALESCE({row}.{dimension}, '&'), '\\', ''), '"', ''), '|', '","') || '"]'"""
+        )
+        return f"FROM json_each({array}) AS j", "trim(j.value)"
+    return '', f"COALESCE({row}.{dimension}, '&')"
+
+def _rollup_statements(row: str, aggregate: bool) -> List[str]:
+    """Statements adding deals to price_rollups.
+
+    With aggregate=False they add the single row NEW (trigger body);
+    with aggregate=True they add every row of deals at once (backfill).
+    """
+    statements = []
+    for dimension in DIMENSIONS + ('all',):
+        source, value = _values_sql(dimension, row)
+        if aggregate:
+            source = f"FROM deals AS d {source.replace('FROM', ',')}"
+        for metric in METRICS:
+            column = f"{row}.{metric}"
+            if aggregate:
+                numbers = f"COUNT(*), SUM({column}), SUM({column} * {column}), MIN({column}), MAX({column})"
+            else:
+                numbers = f"1, {column}, {column} * {column}, {column}, {column}"
+            statement = f"""
+                INSERT INTO price_rollups (dimension, value, model, day, metric, n, total, total_sq, min, max)
+                SELECT '{dimension}', {value}, COALESCE({row}.model, '&'),
+                       date(COALESCE({row}.created_at, CURRENT_TIMESTAMP)), '{metric}', {numbers}
+                {source}
+                WHERE {column} IS NOT NULL AND {value} != ''
+            """
+            if aggregate:
+                statement += " GROUP BY 2, 3, 4"
+            else:
+                statement += """
+                ON CONFLICT (dimension, value, model, day, metric) DO UPDATE SET
+                    n = n + excluded.n,
+                    total = total + excluded.total,
+                    total_sq = total_sq + excluded.total_sq,
+                    min = MIN(min, excluded.min),
+                    max = MAX(max, excluded.max)
+                """
+            statements.append(statement)
+    return statements
+
+def install_rollups(conn: sqlite3.Connection):
+    """Create the report indexes, the rollup table and the trigger that maintains it.
+
+    Each insert into deals adds the deal's prices to per-day rollups
+    (count, sum, sum of squares, min, max) for every geo, region, partner
+    and source value and overall, so time-bucketed means over any span
+    read a few rollup rows instead of scanning deals. Existing deals are
+    rolled up once when the trigger is first installed.
+    """
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_deals_created ON deals (created_at)")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_deals_partner_created ON deals (partner, created_at)")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_deals_model_created ON deals (model, created_at)")
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS price_rollups (
+            dimension TEXT,
+            value TEXT,
+            model TEXT,
+            day TEXT,
+            metric TEXT,
+            n INTEGER,
+            total REAL,
+            total_sq REAL,
+            min REAL,
+            max REAL,
+            PRIMARY KEY (dimension, value, model, day, metric)
+        ) WITHOUT ROWID
+    """)
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_price_rollups_day ON price_rollups (dimension, metric, day)")
+
+    installed = conn.execute(
+        "SELECT 1 FROM sqlite_master WHERE type = 'trigger' AND name = ?", (ROLLUP_TRIGGER,)
+    ).fetchone()
+    if installed:
+        return
+    conn.execute("DELETE FROM price_rollups")
+    for statement in _rollup_statements('d', aggregate=True):
+        conn.execute(statement)
+    conn.execute(
+        f"CREATE TRIGGER {ROLLUP_TRIGGER} AFTER INSERT ON deals BEGIN\n"
+        + ";\n".join(_rollup_statements('NEW', aggregate=False))
+        + ";\nEND"
+    )
+
+def _bucket_sql(column: str, bucket: str) -> str:
+    if bucket == 'week':
+        # Monday of the week
+        return f"date({column}, '-6 days', 'weekday 1')"
+    if bucket == 'month':
+        return f"substr({column}, 1, 7)"
+    return f"date({column})"
+
+def _bucket_days(days: np.ndarray, bucket: str) -> np.ndarray:
+    """Vectorized bucket labels for datetime64[D] values"""
+    if bucket == 'week':
+        # 1970-01-01 was a Thursday; shift to the preceding Monday
+        return (days - ((days.astype(np.int64) + 3) % 7)).astype(str)
+    if bucket == 'month':
+        return days.astype('datetime64[M]').astype(str)
+    return days.astype(str)
+
+def grouped_quantiles(keys: np.ndarray, values: np.ndarray, quantiles: Sequence[float]) -> Dict:
+    """Count, mean, min, max and linear-interpolated quantiles of values per key, without a Python loop over groups"""
+    order = np.lexsort((values, keys))
+    keys, values = keys[order], values[order]
+    starts = np.flatnonzero(np.r_[True, keys[1:] != keys[:-1]])
+    counts = np.diff(np.r_[starts, len(values)])
+    result = {
+        'key': keys[starts],
+        'n': counts,
+        'mean': np.add.reduceat(values, starts) / counts,
+        'min': values[starts],
+        'max': values[starts + counts - 1]
+    }
+    for q in quantiles:
+        position = starts + q * (counts - 1)
+        low = np.floor(position).astype(np.int64)
+        high = np.ceil(position).astype(np.int64)
+        result[q] = values[low] + (values[high] - values[low]) * (position - low)
+    return result
+
+class PriceAnalytics:
+    """Time-bucketed price statistics over deals.db.
+
+    summary() answers count/mean/stddev/min/max for one dimension value
+    from the rollups; distribution() adds medians and percentiles for any
+    combination of filters, reading the matching deals through the
+    created_at indexes and aggregating them with NumPy.
+    """
+
+    def __init__(self, db_path: Path = Path("data/deals.db")):
+        self.db_path = Path(db_path)
+        with sqlite3.connect(self.db_path) as conn:
+            self._ready = bool(conn.execute(
+                "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'deals'"
+            ).fetchone())
+            if self._ready:
+                install_rollups(conn)
+
+    @staticmethod
+    def _since(days: int) -> str:
+        return time.strftime('%Y-%m-%d', time.gmtime(time.time() - days * 86400))
+
+    def summary(self, metric: str, dimension: str = 'all', value: Optional[str] = None,
+                model: Optional[str] = None, bucket: str = 'week', days: int = 90) -> List[Dict]:
+        """Per-bucket (and per-value, when value is None) moments from the rollups"""
+        if not self._ready:
+            return []
+        if dimension == 'all':
+            value = '*'
+        query = f"""
+            SELECT {_bucket_sql('day', bucket)} AS bucket, value,
+                   SUM(n), SUM(total), SUM(total_sq), MIN(min), MAX(max)
+            FROM price_rollups
+            WHERE dimension = ? AND metric = ? AND day >= ?
+        """
+        params: List = [dimension, metric, self._since(days)]
+        if value is not None:
+            query += " AND value = ?"
+            params.append(value)
+        if model is not None:
+            query += " AND model = ?"
+            params.append(model)
+        query += " GROUP BY bucket, value ORDER BY bucket, value"
+
+        with sqlite3.connect(self.db_path) as conn:
+            rows = conn.execute(query, params).fetchall()
+        results = []
+        for bucket_label, group, n, total, total_sq, low, high in rows:
+            mean = total / n
+            results.append({
+                'bucket': bucket_label, 'group': group, 'n': n, 'mean': mean,
+                'std': max(total_sq / n - mean * mean, 0.0) ** 0.5, 'min': low, 'max': high
+            })
+        return results
+
+    def distribution(self, metric: str, filters: Optional[Dict[str, str]] = None,
+                     group_by: Optional[str] = None, model: Optional[str] = None, bucket: str = 'week',
+                     days: int = 90, quantiles: Sequence[float] = (0.25, 0.5, 0.75)) -> List[Dict]:
+        """Per-bucket quantiles of a price for deals matching every filter"""
+        if not self._ready:
+            return []
+        filters = filters or {}
+        query = f"SELECT created_at, {metric}, geo, region, partner, source FROM deals WHERE created_at >= ? AND {metric} IS NOT NULL"
+        params: List = [self._since(days)]
+        if model is not None:
+            query += " AND model = ?"
+            params.append(model)
+        for dimension, value in filters.items():
+            if dimension in MULTI_VALUED:
+                query += f" AND instr('|' || {dimension} || '|', ?) > 0"
+                params.append(f"|{value}|")
+            else:
+                query += f" AND {dimension} = ? COLLATE NOCASE"
+                params.append(value)
+
+        with sqlite3.connect(self.db_path) as conn:
+            rows = conn.execute(query, params).fetchall()
+        if not rows:
+            return []
+
+        columns = {'geo': 2, 'region': 3, 'partner': 4, 'source': 5}
+        if group_by:
+            # A deal counts once for every value of a multi-valued dimension
+            exploded = [
+                (row[0], row[1], group)
+                for row in rows
+                for group in ((row[columns[group_by]] or '&').split('|') if group_by in MULTI_VALUED
+                              else [row[columns[group_by]] or '&'])
+            ]
+        else:
+            exploded = [(row[0], row[1], '*') for row in rows]
+
+        days_array = np.array([created[:10] for created, _, _ in exploded], dtype='datetime64[D]')
+        values = np.array([value for _, value, _ in exploded], dtype=np.float64)
+        buckets = _bucket_days(days_array, bucket)
+        groups = np.array([group for _, _, group in exploded])
+        bucket_labels, bucket_index = np.unique(buckets, return_inverse=True)
+        group_labels, group_index = np.unique(groups, return_inverse=True)
+        keys = bucket_index * len(group_labels) + group_index
+
+        stats = grouped_quantiles(keys, values, quantiles)
+        results = []
+        for i, key in enumerate(stats['key']):
+            row = {
+                'bucket': str(bucket_labels[key // len(group_labels)]),
+                'group': str(group_labels[key % len(group_labels)]),
+                'n': int(stats['n'][i]),
+                'mean': float(stats['mean'][i]),
+                'min': float(stats['min'][i]),
+                'max': float(stats['max'][i])
+            }
+            for q in quantiles:
+                row[f"p{round(q * 100)}"] = float(stats[q][i])
+            results.append(row)
+        return results
@@ -0,0 +1,130 @@
+import logging
+import sqlite3
+import time
+from pathlib import Path
+from typing import Dict, List, Tuple
+
+import numpy as np
+
+from core.analytics import METRICS
+
+logger = logging.getLogger(__name__)
+
+class RunningStats:
+    """Streaming count, mean and variance (Welford), seeded from plain sums"""
+    __slots__ = ('n', 'mean', 'm2')
+
+    def __init__(self, n: int = 0, total: float = 0.0, total_sq: float = 0.0):
+        self.n = n
+        self.mean = total / n if n else 0.0
+        self.m2 = max(total_sq - total * total / n, 0.0) if n else 0.0
+
+    def add(self, value: float):
+        self.n += 1
+        delta = value - self.mean
+        self.mean += delta / self.n
+        self.m2 += delta * (value - self.mean)
+
+    @property
+    def std(self) -> float:
+        return (self.m2 / (self.n - 1)) ** 0.5 if self.n > 1 else 0.0
+
+class PriceAnomalyDetector:
+    """Flags prices far from their (geo, pricing model) history at ingest.
+
+    Statistics per (geo, model, metric) are seeded from the deals stored
+    over the last `window_days`, screened for outliers, and then updated
+    in memory as deals are stored, so scoring a deal is a few dict
+    lookups. A price is flagged when its z-score exceeds `threshold`
+    against at least `min_samples` earlier deals; the spread is floored at
+    `min_spread` of the mean so a run of identical prices does not flag
+    every small change. Flagged prices are not folded into the statistics,
+    in memory or when they are rebuilt.
+    """
+
+    def __init__(self, db_path: Path = Path("data/deals.db"), window_days: int = 180,
+                 threshold: float = 4.0, min_samples: int = 8, min_spread: float = 0.05):
+        self.db_path = Path(db_path)
+        self.window_days = window_days
+        self.threshold = threshold
+        self.min_samples = min_samples
+        self.min_spread = min_spread
+        self.stats: Dict[Tuple[str, str, str], RunningStats] = {}
+        self.load()
+
+    def load(self):
+        """Rebuild the in-memory statistics from the deals in the window.
+
+        Stored deals include prices that were flagged at ingest, so each
+        (geo, model, metric) history is first screened against its median
+        and MAD, which one outlier cannot drag, and only the prices within
+        `threshold` robust deviations seed the running statistics.
+        """
+        since = time.strftime('%Y-%m-%d', time.gmtime(time.time() - self.window_days * 86400))
+        try:
+            with sqlite3.connect(self.db_path) as conn:
+                rows = conn.execute(
+                    f"SELECT geo, model, {', '.join(METRICS)} FROM deals WHERE created_at >= ?", (since,)
+                ).fetchall()
+        except sqlite3.OperationalError as e:
+            logger.warning(f"Price history unavailable for anomaly detection: {str(e)}")
+            rows = []
+
+        history: Dict[Tuple[str, str, str], List[float]] = {}
+        for geos, model, *prices in rows:
+            for key, value in self._keys(dict(zip(METRICS, prices), geo=geos, pricing_model=model)):
+                history.setdefault(key, []).append(value)
+
+        self.stats = {}
+        for key, values in history.items():
+            values = np.asarray(values, dtype=np.float64)
+            median = np.median(values)
+            # 1.4826 scales the MAD to a standard deviation for normal data
+            spread = max(1.4826 * np.median(np.abs(values - median)), self.min_spread * abs(median))
+            if spread:
+                values = values[np.abs(values - median) <= self.threshold * spread]
+            self.stats[key] = RunningStats(len(values), float(values.sum()), float((values * values).sum()))
+
+    @staticmethod
+    def _keys(parsed_data: Dict):
+        model = parsed_data.get('pricing_model') or '&'
+        for geo in (parsed_data.get('geo') or '&').split('|'):
+            if geo and geo != '&':
+                for metric in METRICS:
+                    value = parsed_data.get(metric)
+                    if isinstance(value, (int, float)):
+                        yield (geo, model, metric), float(value)
+
+    def _z(self, key: Tuple[str, str, str], value: float):
+        stats = self.stats.get(key)
+        if stats is None or stats.n < self.min_samples:
+            return None, stats
+        spread = max(stats.std, self.min_spread * abs(stats.mean))
+        if not spread:
+            return None, stats
+        return (value - stats.mean) / spread, stats
+
+    def score(self, parsed_data: Dict) -> List[str]:
+        """Warnings for the deal's outlying prices; empty when nothing stands out"""
+        warnings = []
+        for key, value in self._keys(parsed_data):
+            z, stats = self._z(key, value)
+            if z is not None and abs(z) > self.threshold:
+                geo, model, metric = key
+                shown = f"{value * 100:g}%" if metric == 'crg' else f"{value:g}"
+                mean = f"{stats.mean * 100:.3g}%" if metric == 'crg' else f"{stats.mean:.4g}"
+                warnings.append(
+                    f"{metric.upper()} {shown} is {abs(z):.1f}σ {'above' if z > 0 else 'below'} "
+                    f"{geo} {model} deals (mean {mean}, n={stats.n})"
+                )
+        return warnings
+
+    def observe(self, parsed_data: Dict):
+        """Fold a stored deal's prices into the statistics"""
+        for key, value in self._keys(parsed_data):
+            z, stats = self._z(key, value)
+            if z is not None and abs(z) > self.threshold:
+                continue
+            if stats is None:
+                stats = self.stats[key] = RunningStats()
+            stats.add(value)
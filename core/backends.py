@@ -0,0 +1,24 @@
+import os
+
+DEFAULT_BACKEND = "mistral"
+BACKENDS = ("mistral", "finetuned", "bert")
+
+def create_deal_parser(backend: str = None):
+    """Create the deal parser selected by name or DEAL_PARSER_BACKEND.
+
+    Backends are imported lazily so the BERT path does not need a Mistral
+    key and the Mistral path does not need torch.
+    """
+    backend = (backend or os.getenv("DEAL_PARSER_BACKEND", DEFAULT_BACKEND)).lower()
+
+    if backend == "mistral":
+        from core.client import DealParser
+        return DealParser()
+    if backend == "finetuned":
+        from core.ft_client import FineTunedDealParser
+        return FineTunedDealParser()
+    if backend == "bert":
+        from core.bert_client import BertDealParser
+        return BertDealParser()
+
+    raise ValueError(f"Unknown parser backend '{backend}'. Must be one of: {', '.join(BACKENDS)}")
@@ -0,0 +1,38 @@
+from typing import List, Dict, Optional
+import asyncio
+import logging
+import os
+import sys
+import time
+
+# Make the BERT sources importable
+sys.path.append(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'BERT', 'src'))
+
+from inference import DealNERExtractor
+from tools.training_client import TrainingDealParser
+
+logger = logging.getLogger(__name__)
+
+class BertDealParser:
+    """Local token-classification backend with the same interface as DealParser"""
+
+    def __init__(self, model_dir: Optional[str] = None):
+        self.extractor = DealNERExtractor(
+            model_dir or os.getenv("BERT_MODEL_DIR"),
+            batch_size=int(os.getenv("BERT_BATCH_SIZE", "32"))
+        )
+        # Block splitting and shared context reuse the rule-based parser
+        self.splitter = TrainingDealParser()
+
+    def parse_sheet(self, text: str) -> List[Dict]:
+        """Synchronously parse every deal block of a sheet in batched passes"""
+        start = time.time()
+        shared_context = self.splitter._extract_shared_context(text)
+        blocks = self.splitter._split_deals(text)
+        deals = self.extractor.parse(blocks, shared_context) if blocks else []
+        logger.info(f"BERT parsed {len(deals)} deals in {(time.time() - start) * 1000:.1f} ms")
+        return deals
+
+    async def parse_deals(self, text: str) -> List[Dict]:
+        # Keep the event loop free while the model runs
+        return await asyncio.to_thread(self.parse_sheet, text)
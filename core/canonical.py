@@ -0,0 +1,247 @@
+import logging
+import re
+import sqlite3
+import time
+import unicodedata
+from collections import Counter
+from functools import lru_cache
+from pathlib import Path
+from typing import Dict, List, Optional, Set, Tuple
+
+logger = logging.getLogger(__name__)
+
+KINDS = ('partner', 'funnel')
+DEFAULT_TENANT = 'default'
+
+# Label prefixes that leak into names ("Company: Genio", "Brand - Sutra")
+_PREFIX = re.compile(r'^\s*(?:company|partner|brand|aff|affiliate|network|funnel|offer|lp|landing(?: page)?)\s*[:\-–]\s*', re.I)
+_NON_ALNUM = re.compile(r'[\W_]+', re.UNICODE)
+
+@lru_cache(maxsize=65536)
+def name_key(name: str) -> str:
+    """Spelling-insensitive key: 'Company: Bitcoin 360 Ai 🚀' and 'bitcoin360ai' share one"""
+    name = _PREFIX.sub('', unicodedata.normalize('NFKC', name))
+    # Drop emoji and other symbols, then everything that is not a letter or digit
+    name = ''.join(ch for ch in name if not unicodedata.category(ch).startswith('S'))
+    return _NON_ALNUM.sub('', name).casefold()
+
+def _trigrams(key: str) -> Set[str]:
+    padded = f"  {key} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+class NameDictionary:
+    """Canonical names of one kind with exact lookup and fuzzy suggestions.
+
+    Every spelling maps through name_key() to a canonical id (the key of
+    the first spelling seen), so exact lookups are one dict access. Only
+    exact hits are rewritten: near-identical names are often distinct
+    offers ('Bitcoin Trader' and 'Bitcoin Trader AI'), so a close match
+    from the trigram index is only a suggestion until someone confirms it
+    and it is added as an alias.
+    """
+
+    def __init__(self, threshold: float = 0.85, min_fuzzy_length: int = 4):
+        self.threshold = threshold
+        self.min_fuzzy_length = min_fuzzy_length
+        self.names: Dict[str, str] = {}       # canonical id -> display name
+        self.aliases: Dict[str, str] = {}     # key -> canonical id
+        self._postings: Dict[str, Set[str]] = {}
+        self._sizes: Dict[str, int] = {}
+
+    def __len__(self) -> int:
+        return len(self.names)
+
+    def add(self, name: str, canonical_id: Optional[str] = None) -> Optional[str]:
+        """Register a spelling, as an alias of canonical_id or as its own canonical name"""
+        key = name_key(name)
+        if not key:
+            return None
+        if canonical_id is None:
+            canonical_id = self.aliases.get(key)
+            if canonical_id is None:
+                canonical_id = key
+        if canonical_id not in self.names:
+            self.names[canonical_id] = name.strip()
+            grams = _trigrams(canonical_id)
+            self._sizes[canonical_id] = len(grams)
+            for gram in grams:
+                self._postings.setdefault(gram, set()).add(canonical_id)
+        self.aliases[key] = canonical_id
+        return canonical_id
+
+    def _fuzzy(self, key: str) -> Optional[str]:
+        if len(key) < self.min_fuzzy_length:
+            return None
+        grams = _trigrams(key)
+        overlaps = Counter()
+        for gram in grams:
+            overlaps.update(self._postings.get(gram, ()))
+        best, best_score = None, self.threshold
+        for canonical_id, overlap in overlaps.items():
+            # Dice coefficient over trigram sets
+            score = 2 * overlap / (len(grams) + self._sizes[canonical_id])
+            if score >= best_score:
+                best, best_score = canonical_id, score
+        return best
+
+    def lookup(self, name: str) -> Optional[Tuple[str, str]]:
+        """(canonical id, display name) for a known spelling, or None"""
+        canonical_id = self.aliases.get(name_key(name))
+        if canonical_id is None:
+            return None
+        return canonical_id, self.names[canonical_id]
+
+    def suggest(self, name: str) -> Optional[Tuple[str, str]]:
+        """(canonical id, display name) of the closest name to an unknown spelling, or None"""
+        key = name_key(name)
+        if not key or key in self.aliases:
+            return None
+        canonical_id = self._fuzzy(key)
+        if canonical_id is None:
+            return None
+        return canonical_id, self.names[canonical_id]
+
+class Canonicalizer:
+    """Partner and funnel dictionaries per tenant, kept in memory.
+
+    The shared dictionaries are built from historical deals rows; each
+    tenant (a chat) layers its own aliases, stored in canonical_names, on
+    top. refresh() only reads rows added since the last refresh and runs
+    at most every refresh_interval seconds, so lookups stay in memory.
+    """
+
+    def __init__(self, db_path: Path = Path("data/deals.db"), refresh_interval: float = 60.0,
+                 threshold: float = 0.85):
+        self.db_path = Path(db_path)
+        self.db_path.parent.mkdir(exist_ok=True)
+        self.refresh_interval = refresh_interval
+        self.threshold = threshold
+        self._tenants: Dict[str, Dict[str, NameDictionary]] = {}
+        self._last_deal_id = 0
+        self._last_alias_id = 0
+        self._refreshed_at = 0.0
+        self._init_db()
+        self.refresh()
+
+    def _init_db(self):
+        with sqlite3.connect(self.db_path) as conn:
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS canonical_names (
+                    id INTEGER PRIMARY KEY,
+                    tenant TEXT,
+                    kind TEXT,
+                    name TEXT,
+                    canonical TEXT,
+                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                    UNIQUE (tenant, kind, name)
+                )
+            """)
+
+    def _dictionaries(self, tenant: str) -> Dict[str, NameDictionary]:
+        dictionaries = self._tenants.get(tenant)
+        if dictionaries is None:
+            dictionaries = self._tenants[tenant] = {kind: NameDictionary(self.threshold) for kind in KINDS}
+        return dictionaries
+
+    def refresh(self, force: bool = False):
+        """Fold in deals and aliases added since the last refresh"""
+        now = time.monotonic()
+        if not force and now - self._refreshed_at < self.refresh_interval:
+            return
+        self._refreshed_at = now
+        with sqlite3.connect(self.db_path) as conn:
+            deals = conn.execute(
+                "SELECT id, partner, funnels FROM deals WHERE id > ? ORDER BY id", (self._last_deal_id,)
+            ).fetchall()
+            aliases = conn.execute(
+                "SELECT id, tenant, kind, name, canonical FROM canonical_names WHERE id > ? ORDER BY id",
+                (self._last_alias_id,)
+            ).fetchall()
+
+        shared = self._dictionaries(DEFAULT_TENANT)
+        for deal_id, partner, funnels in deals:
+            if partner:
+                shared['partner'].add(partner)
+            for funnel in (funnels or '').split('|'):
+                if funnel.strip():
+                    shared['funnel'].add(funnel)
+            self._last_deal_id = deal_id
+
+        for alias_id, tenant, kind, name, canonical in aliases:
+            dictionary = self._dictionaries(tenant)[kind]
+            dictionary.add(canonical)
+            dictionary.add(name, name_key(canonical))
+            self._last_alias_id = alias_id
+
+        if deals or aliases:
+            logger.debug(f"Canonical names refreshed: {len(deals)} deals, {len(aliases)} aliases")
+
+    def lookup(self, kind: str, name: str, tenant: str = DEFAULT_TENANT) -> Optional[Tuple[str, str]]:
+        """(canonical id, display name), checking the tenant's own names before the shared ones"""
+        if tenant != DEFAULT_TENANT and tenant in self._tenants:
+            match = self._tenants[tenant][kind].lookup(name)
+            if match:
+                return match
+        return self._dictionaries(DEFAULT_TENANT)[kind].lookup(name)
+
+    def suggest(self, kind: str, name: str, tenant: str = DEFAULT_TENANT) -> Optional[str]:
+        """Display name that an unknown spelling probably means, for a reviewer to confirm"""
+        if self.lookup(kind, name, tenant):
+            return None
+        dictionaries = [self._dictionaries(DEFAULT_TENANT)[kind]]
+        if tenant != DEFAULT_TENANT and tenant in self._tenants:
+            dictionaries.insert(0, self._tenants[tenant][kind])
+        for dictionary in dictionaries:
+            match = dictionary.suggest(name)
+            if match:
+                return match[1]
+        return None
+
+    def canonical(self, kind: str, name: str, tenant: str = DEFAULT_TENANT) -> str:
+        """Display name for a spelling; unknown names pass through cleaned of prefixes"""
+        match = self.lookup(kind, name, tenant)
+        if match:
+            return match[1]
+        return _PREFIX.sub('', name).strip() or name
+
+    def apply(self, parsed_data: Dict, tenant: str = DEFAULT_TENANT) -> Dict:
+        """Rewrite a parsed deal's partner and funnels to their canonical names in place"""
+        self.refresh()
+        partner = parsed_data.get('partner')
+        if isinstance(partner, str) and partner not in ('', '&'):
+            parsed_data['partner'] = self.canonical('partner', partner, tenant)
+        funnels = parsed_data.get('funnels')
+        if isinstance(funnels, list):
+            canonical: List[str] = []
+            for funnel in funnels:
+                if isinstance(funnel, str) and funnel.strip():
+                    name = self.canonical('funnel', funnel, tenant)
+                    if name not in canonical:
+                        canonical.append(name)
+            parsed_data['funnels'] = canonical
+        return parsed_data
+
+    def suggestions(self, parsed_data: Dict, tenant: str = DEFAULT_TENANT) -> List[Tuple[str, str, str]]:
+        """(kind, name, suggested canonical name) for a deal's names that are close to a known one"""
+        names = [('partner', parsed_data.get('partner'))]
+        names += [('funnel', funnel) for funnel in parsed_data.get('funnels') or ()]
+        found = []
+        for kind, name in names:
+            if isinstance(name, str) and name not in ('', '&'):
+                canonical = self.suggest(kind, name, tenant)
+                if canonical and canonical != name:
+                    found.append((kind, name, canonical))
+        return found
+
+    def learn(self, kind: str, name: str, canonical: str, tenant: str = DEFAULT_TENANT):
+        """Record that a tenant's spelling means canonical, e.g. after a reviewer confirms a suggestion"""
+        if not name_key(name) or not name_key(canonical) or name_key(name) == name_key(canonical):
+            return
+        dictionary = self._dictionaries(tenant)[kind]
+        dictionary.add(canonical)
+        dictionary.add(name, name_key(canonical))
+        with sqlite3.connect(self.db_path) as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO canonical_names (tenant, kind, name, canonical) VALUES (?, ?, ?, ?)",
+                (tenant, kind, name, canonical)
+            )
@@ -41,6 +41,7 @@ import time
 import random
 import json
 from core.prompts import DealPrompts
+from core.geo import apply_geo
 import asyncio
 from functools import partial
 from rich.console import Console
@@ -109,14 +110,13 @@ class DealParser:
                         f"🤖 Processing deal... (Step {i}/{total_steps})", 
                         total=1
                     )
-                    parsed_deal = await self._parse_deal(
+                    deals.extend(await self.parse_block(
                         deal_block["text"],
                         {
                             "shared_fields": structure["shared_fields"],
                             "inherits_from": deal_block["inherits_from"]
                         }
-                    )
-                    deals.append(parsed_deal)
+                    ))
                     progress.update(task, completed=1)
                 
                 # Add a small pause before showing completion
@@ -154,6 +154,23 @@ class DealParser:
             logger.error(f"Error analyzing structure: {str(e)}")
             return {"deal_blocks": [{"text": text, "inherits_from": None}], "shared_fields": {}}
 
+    async def parse_block(self, deal_text: str, context: Dict) -> List[Dict]:
+        """Parse one block with the sheet context it was analyzed with.
+
+        The deal's metadata records which fields it inherits and the
+        sheet's shared values, so later edits can be propagated without
+        another structure pass.
+        """
+        parsed_deal = await self._parse_deal(deal_text, context)
+        parsed_deal.setdefault("raw_text", deal_text)
+        # Region comes from the GEO table, not the model
+        apply_geo(parsed_deal.get("parsed_data", parsed_deal))
+        metadata = parsed_deal.get("metadata") or {}
+        metadata["shared_fields"] = list(context.get("inherits_from") or [])
+        metadata["shared_context"] = context.get("shared_fields") or {}
+        parsed_deal["metadata"] = metadata
+        return [parsed_deal]
+
     async def _parse_deal(self, deal_text: str, context: Dict) -> Dict:
         """Second pass: Parse individual deal with context"""
         try:
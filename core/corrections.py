@@ -0,0 +1,114 @@
+import asyncio
+import json
+import logging
+import os
+import time
+from pathlib import Path
+from typing import Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+class CorrectionLog:
+    """Append-only log of human corrections to parser output.
+
+    Each line holds the deal's raw text, what the model returned, and the
+    delta the reviewer applied (only the fields that changed), with the
+    model id and a timestamp. Records are buffered in memory and appended
+    in one write when the buffer fills or every `flush_interval` seconds,
+    so an edit never waits on the disk.
+    """
+
+    def __init__(
+        self,
+        path: Optional[Path] = None,
+        flush_interval: float = 5.0,
+        max_buffer: int = 100
+    ):
+        self.path = Path(path or os.getenv("CORRECTION_LOG", "data/corrections.jsonl"))
+        self.flush_interval = flush_interval
+        self.max_buffer = max_buffer
+        self._buffer: List[str] = []
+        self._task: Optional[asyncio.Task] = None
+        self.written = 0
+
+    def record(self, raw_text: str, output: Dict, corrected: Dict, model: Optional[str] = None) -> bool:
+        """Buffer one correction; returns False when nothing actually changed"""
+        delta = {field: value for field, value in corrected.items() if output.get(field) != value}
+        if not delta:
+            return False
+        self._buffer.append(json.dumps({
+            "ts": round(time.time(), 3),
+            "model": model,
+            "raw_text": raw_text,
+            "output": output,
+            "delta": delta
+        }, ensure_ascii=False, separators=(',', ':')))
+        if len(self._buffer) >= self.max_buffer:
+            self.flush()
+        return True
+
+    def flush(self) -> int:
+        """Append buffered records to the log; returns how many were written"""
+        if not self._buffer:
+            return 0
+        lines, self._buffer = self._buffer, []
+        self.path.parent.mkdir(exist_ok=True)
+        with open(self.path, 'a', encoding='utf-8') as f:
+            f.write('\n'.join(lines) + '\n')
+        self.written += len(lines)
+        return len(lines)
+
+    async def start(self):
+        if not self._task:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        self.flush()
+
+    async def _run(self):
+        while True:
+            await asyncio.sleep(self.flush_interval)
+            try:
+                self.flush()
+            except OSError as e:
+                logger.error(f"Error flushing correction log: {str(e)}")
+
+def load_corrections(path: Path) -> Dict[str, Dict]:
+    """Latest correction per raw text, with deltas for the same text merged in order.
+
+    Each value holds the original model output, the accumulated corrected
+    fields and the fully corrected parsed data.
+    """
+    merged: Dict[str, Dict] = {}
+    with open(path, 'r', encoding='utf-8') as f:
+        for line in f:
+            if not line.strip():
+                continue
+            try:
+                entry = json.loads(line)
+            except json.JSONDecodeError:
+                # A torn final line from a crash mid-write
+                logger.warning(f"Skipping malformed correction line in {path}")
+                continue
+            current = merged.get(entry["raw_text"])
+            if current is None:
+                current = merged[entry["raw_text"]] = {
+                    "output": entry["output"], "delta": {}, "model": entry.get("model")
+                }
+            current["delta"].update(entry["delta"])
+            current["model"] = entry.get("model") or current["model"]
+
+    for correction in merged.values():
+        correction["delta"] = {
+            field: value for field, value in correction["delta"].items()
+            if correction["output"].get(field) != value
+        }
+        correction["corrected"] = {**correction["output"], **correction["delta"]}
+    return {raw_text: c for raw_text, c in merged.items() if c["delta"]}
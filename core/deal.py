@@ -5,6 +5,9 @@ import logging
 import sqlite3
 from pathlib import Path
 
+from core.analytics import install_rollups
+from core.anomaly import PriceAnomalyDetector
+
 logger = logging.getLogger(__name__)
 
 class DealMetadata(BaseModel):
@@ -48,6 +51,18 @@ class DealData(BaseModel):
             return [f.strip() for f in v.replace('|', '/').split('/')]
         return v
 
+    @validator('cpa')
+    def validate_cpa(cls, v):
+        if v is not None and v <= 0:
+            raise ValueError("CPA must be positive")
+        return v
+        
+    @validator('crg')
+    def validate_crg(cls, v):
+        if v is not None and not 0 <= v <= 1:
+            raise ValueError("CRG must be between 0 and 1")
+        return v
+
 class Deal(BaseModel):
     raw_text: str
     metadata: DealMetadata
@@ -84,17 +99,6 @@ class Deal(BaseModel):
         )
         return hashlib.md5(deal_string.encode()).hexdigest()
 
-    @validator('cpa')
-    def validate_cpa(cls, v):
-        if v is not None and v <= 0:
-            raise ValueError("CPA must be positive")
-        return v
-        
-    @validator('crg')
-    def validate_crg(cls, v):
-        if v is not None and not 0 <= v <= 1:
-            raise ValueError("CRG must be between 0 and 1")
-        return v
 
 class DealProcessor:
     def __init__(self):
@@ -103,6 +107,7 @@ class DealProcessor:
         self._init_db()
         self.seen_deals = self._load_seen_deals()
         self.deals = self._load_deals()
+        self.anomalies = PriceAnomalyDetector(self.db_path)
 
     def _init_db(self):
         """Initialize SQLite database"""
@@ -132,6 +137,8 @@ class DealProcessor:
                     created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
                 )
             """)
+            # Price rollups for reports are kept current by a trigger on deals
+            install_rollups(conn)
 
     def _load_seen_deals(self) -> set:
         """Load seen deal hashes from database"""
@@ -145,22 +152,31 @@ class DealProcessor:
         with sqlite3.connect(self.db_path) as conn:
             cursor = conn.execute("SELECT * FROM deals ORDER BY created_at DESC")
             for row in cursor.fetchall():
-                deals.append(Deal(
-                    region=row[1],
-                    partner=row[2],
-                    geo=row[3],
-                    language=row[4],
-                    source=row[5],
-                    model=row[6],
-                    cpa=row[7],
-                    crg=row[8],
-                    cpl=row[9],
-                    funnels=row[10].split('|'),
-                    cr=row[11],
-                    deduction_limit=row[12]
-                ))
+                deals.append(self._row_to_deal(row))
         return deals
 
+    @staticmethod
+    def _row_to_deal(row) -> Deal:
+        """Rebuild a Deal from a row of the deals table"""
+        return Deal(
+            raw_text='',
+            metadata=DealMetadata(),
+            parsed_data=DealData(
+                region=row[1],
+                partner=row[2],
+                geo=row[3],
+                language=row[4] or "Native",
+                source=row[5] or "&",
+                pricing_model=row[6],
+                cpa=row[7],
+                crg=row[8],
+                cpl=row[9],
+                funnels=row[10].split('|') if row[10] else [],
+                cr=row[11],
+                deduction_limit=row[12]
+            )
+        )
+
     def is_duplicate(self, deal_text: str, processed_deal: Optional[Deal] = None) -> bool:
         """Check if a deal is a duplicate and store if not"""
         text_hash = hashlib.md5(deal_text.encode()).hexdigest()
@@ -206,6 +222,7 @@ class DealProcessor:
                 
             self.seen_deals.add(deal_hash)
             self.deals.append(processed_deal)
+            self.anomalies.observe(processed_deal.parsed_data.dict())
                 
         self.seen_deals.add(text_hash)
         return False
@@ -252,20 +269,7 @@ class DealProcessor:
                     )
                     row = cursor.fetchone()
                     if row:
-                        result["existing_deal"] = Deal(
-                            region=row[1],
-                            partner=row[2],
-                            geo=row[3],
-                            language=row[4],
-                            source=row[5],
-                            model=row[6],
-                            cpa=row[7],
-                            crg=row[8],
-                            cpl=row[9],
-                            funnels=row[10].split('|'),
-                            cr=row[11],
-                            deduction_limit=row[12]
-                        )
+                        result["existing_deal"] = self._row_to_deal(row)
                         result["created_at"] = row[14]  # created_at column
                 
         return result
@@ -281,4 +285,4 @@ class DealStorage:
             conn.execute(
                 "INSERT INTO deal_status (deal_id, status, user_id) VALUES (?, ?, ?)",
                 (deal_id, status, user_id)
-            )
\ No newline at end of file
+            )
@@ -1,15 +1,16 @@
-from mistralai import MistralAsyncClient
+from mistralai import Mistral
 from typing import List, Dict, Any
 import json
 import os
 import logging
-from prompts import SYSTEM_PROMPT
+from core.prompts import SYSTEM_PROMPT
+from core.geo import apply_geo
 
 logger = logging.getLogger(__name__)
 
 class FineTunedDealParser:
     def __init__(self):
-        self.client = MistralAsyncClient(api_key=os.getenv("MISTRAL_API_KEY"))
+        self.client = Mistral(api_key=os.getenv("MISTRAL_API_KEY"))
         self.model = "ft:open-mistral-7b:974ca0be:20241109:10932b95"
         
     async def parse_deals(self, text: str) -> List[Dict]:
@@ -21,7 +22,7 @@ class FineTunedDealParser:
             ]
             
             # Call fine-tuned model
-            chat_response = await self.client.chat(
+            chat_response = await self.client.chat.complete_async(
                 model=self.model,
                 messages=messages,
                 temperature=0.0
@@ -31,7 +32,11 @@ class FineTunedDealParser:
             response_text = chat_response.choices[0].message.content
             parsed_deals = json.loads(response_text)
             
-            return [parsed_deals] if isinstance(parsed_deals, dict) else parsed_deals
+            parsed_deals = [parsed_deals] if isinstance(parsed_deals, dict) else parsed_deals
+            for deal in parsed_deals:
+                # Region comes from the GEO table, not the model
+                apply_geo(deal.get('parsed_data', deal))
+            return parsed_deals
             
         except Exception as e:
             logger.error(f"Error parsing deals: {str(e)}")
@@ -0,0 +1,385 @@
+import re
+import unicodedata
+from typing import Dict, List, Optional, Tuple
+
+# ISO 3166-1: (alpha-2, alpha-3, short name)
+COUNTRIES: Tuple[Tuple[str, str, str], ...] = (
+    ('AD', 'AND', 'Andorra'),
+    ('AE', 'ARE', 'United Arab Emirates'),
+    ('AF', 'AFG', 'Afghanistan'),
+    ('AG', 'ATG', 'Antigua and Barbuda'),
+    ('AI', 'AIA', 'Anguilla'),
+    ('AL', 'ALB', 'Albania'),
+    ('AM', 'ARM', 'Armenia'),
+    ('AO', 'AGO', 'Angola'),
+    ('AQ', 'ATA', 'Antarctica'),
+    ('AR', 'ARG', 'Argentina'),
+    ('AS', 'ASM', 'American Samoa'),
+    ('AT', 'AUT', 'Austria'),
+    ('AU', 'AUS', 'Australia'),
+    ('AW', 'ABW', 'Aruba'),
+    ('AX', 'ALA', 'Åland Islands'),
+    ('AZ', 'AZE', 'Azerbaijan'),
+    ('BA', 'BIH', 'Bosnia and Herzegovina'),
+    ('BB', 'BRB', 'Barbados'),
+    ('BD', 'BGD', 'Bangladesh'),
+    ('BE', 'BEL', 'Belgium'),
+    ('BF', 'BFA', 'Burkina Faso'),
+    ('BG', 'BGR', 'Bulgaria'),
+    ('BH', 'BHR', 'Bahrain'),
+    ('BI', 'BDI', 'Burundi'),
+    ('BJ', 'BEN', 'Benin'),
+    ('BL', 'BLM', 'Saint Barthélemy'),
+    ('BM', 'BMU', 'Bermuda'),
+    ('BN', 'BRN', 'Brunei Darussalam'),
+    ('BO', 'BOL', 'Bolivia'),
+    ('BQ', 'BES', 'Bonaire, Sint Eustatius and Saba'),
+    ('BR', 'BRA', 'Brazil'),
+    ('BS', 'BHS', 'Bahamas'),
+    ('BT', 'BTN', 'Bhutan'),
+    ('BV', 'BVT', 'Bouvet Island'),
+    ('BW', 'BWA', 'Botswana'),
+    ('BY', 'BLR', 'Belarus'),
+    ('BZ', 'BLZ', 'Belize'),
+    ('CA', 'CAN', 'Canada'),
+    ('CC', 'CCK', 'Cocos (Keeling) Islands'),
+    ('CD', 'COD', 'Congo, The Democratic Republic of the'),
+    ('CF', 'CAF', 'Central African Republic'),
+    ('CG', 'COG', 'Congo'),
+    ('CH', 'CHE', 'Switzerland'),
+    ('CI', 'CIV', "Côte d'Ivoire"),
+    ('CK', 'COK', 'Cook Islands'),
+    ('CL', 'CHL', 'Chile'),
+    ('CM', 'CMR', 'Cameroon'),
+    ('CN', 'CHN', 'China'),
+    ('CO', 'COL', 'Colombia'),
+    ('CR', 'CRI', 'Costa Rica'),
+    ('CU', 'CUB', 'Cuba'),
+    ('CV', 'CPV', 'Cabo Verde'),
+    ('CW', 'CUW', 'Curaçao'),
+    ('CX', 'CXR', 'Christmas Island'),
+    ('CY', 'CYP', 'Cyprus'),
+    ('CZ', 'CZE', 'Czechia'),
+    ('DE', 'DEU', 'Germany'),
+    ('DJ', 'DJI', 'Djibouti'),
+    ('DK', 'DNK', 'Denmark'),
+    ('DM', 'DMA', 'Dominica'),
+    ('DO', 'DOM', 'Dominican Republic'),
+    ('DZ', 'DZA', 'Algeria'),
+    ('EC', 'ECU', 'Ecuador'),
+    ('EE', 'EST', 'Estonia'),
+    ('EG', 'EGY', 'Egypt'),
+    ('EH', 'ESH', 'Western Sahara'),
+    ('ER', 'ERI', 'Eritrea'),
+    ('ES', 'ESP', 'Spain'),
+    ('ET', 'ETH', 'Ethiopia'),
+    ('FI', 'FIN', 'Finland'),
+    ('FJ', 'FJI', 'Fiji'),
+    ('FK', 'FLK', 'Falkland Islands (Malvinas)'),
+    ('FM', 'FSM', 'Micronesia, Federated States of'),
+    ('FO', 'FRO', 'Faroe Islands'),
+    ('FR', 'FRA', 'France'),
+    ('GA', 'GAB', 'Gabon'),
+    ('GB', 'GBR', 'United Kingdom'),
+    ('GD', 'GRD', 'Grenada'),
+    ('GE', 'GEO', 'Georgia'),
+    ('GF', 'GUF', 'French Guiana'),
+    ('GG', 'GGY', 'Guernsey'),
+    ('GH', 'GHA', 'Ghana'),
+    ('GI', 'GIB', 'Gibraltar'),
+    ('GL', 'GRL', 'Greenland'),
+    ('GM', 'GMB', 'Gambia'),
+    ('GN', 'GIN', 'Guinea'),
+    ('GP', 'GLP', 'Guadeloupe'),
+    ('GQ', 'GNQ', 'Equatorial Guinea'),
+    ('GR', 'GRC', 'Greece'),
+    ('GS', 'SGS', 'South Georgia and the South Sandwich Islands'),
+    ('GT', 'GTM', 'Guatemala'),
+    ('GU', 'GUM', 'Guam'),
+    ('GW', 'GNB', 'Guinea-Bissau'),
+    ('GY', 'GUY', 'Guyana'),
+    ('HK', 'HKG', 'Hong Kong'),
+    ('HM', 'HMD', 'Heard Island and McDonald Islands'),
+    ('HN', 'HND', 'Honduras'),
+    ('HR', 'HRV', 'Croatia'),
+    ('HT', 'HTI', 'Haiti'),
+    ('HU', 'HUN', 'Hungary'),
+    ('ID', 'IDN', 'Indonesia'),
+    ('IE', 'IRL', 'Ireland'),
+    ('IL', 'ISR', 'Israel'),
+    ('IM', 'IMN', 'Isle of Man'),
+    ('IN', 'IND', 'India'),
+    ('IO', 'IOT', 'British Indian Ocean Territory'),
+    ('IQ', 'IRQ', 'Iraq'),
+    ('IR', 'IRN', 'Iran'),
+    ('IS', 'ISL', 'Iceland'),
+    ('IT', 'ITA', 'Italy'),
+    ('JE', 'JEY', 'Jersey'),
+    ('JM', 'JAM', 'Jamaica'),
+    ('JO', 'JOR', 'Jordan'),
+    ('JP', 'JPN', 'Japan'),
+    ('KE', 'KEN', 'Kenya'),
+    ('KG', 'KGZ', 'Kyrgyzstan'),
+    ('KH', 'KHM', 'Cambodia'),
+    ('KI', 'KIR', 'Kiribati'),
+    ('KM', 'COM', 'Comoros'),
+    ('KN', 'KNA', 'Saint Kitts and Nevis'),
+    ('KP', 'PRK', 'North Korea'),
+    ('KR', 'KOR', 'South Korea'),
+    ('KW', 'KWT', 'Kuwait'),
+    ('KY', 'CYM', 'Cayman Islands'),
+    ('KZ', 'KAZ', 'Kazakhstan'),
+    ('LA', 'LAO', 'Laos'),
+    ('LB', 'LBN', 'Lebanon'),
+    ('LC', 'LCA', 'Saint Lucia'),
+    ('LI', 'LIE', 'Liechtenstein'),
+    ('LK', 'LKA', 'Sri Lanka'),
+    ('LR', 'LBR', 'Liberia'),
+    ('LS', 'LSO', 'Lesotho'),
+    ('LT', 'LTU', 'Lithuania'),
+    ('LU', 'LUX', 'Luxembourg'),
+    ('LV', 'LVA', 'Latvia'),
+    ('LY', 'LBY', 'Libya'),
+    ('MA', 'MAR', 'Morocco'),
+    ('MC', 'MCO', 'Monaco'),
+    ('MD', 'MDA', 'Moldova'),
+    ('ME', 'MNE', 'Montenegro'),
+    ('MF', 'MAF', 'Saint Martin (French part)'),
+    ('MG', 'MDG', 'Madagascar'),
+    ('MH', 'MHL', 'Marshall Islands'),
+    ('MK', 'MKD', 'North Macedonia'),
+    ('ML', 'MLI', 'Mali'),
+    ('MM', 'MMR', 'Myanmar'),
+    ('MN', 'MNG', 'Mongolia'),
+    ('MO', 'MAC', 'Macao'),
+    ('MP', 'MNP', 'Northern Mariana Islands'),
+    ('MQ', 'MTQ', 'Martinique'),
+    ('MR', 'MRT', 'Mauritania'),
+    ('MS', 'MSR', 'Montserrat'),
+    ('MT', 'MLT', 'Malta'),
+    ('MU', 'MUS', 'Mauritius'),
+    ('MV', 'MDV', 'Maldives'),
+    ('MW', 'MWI', 'Malawi'),
+    ('MX', 'MEX', 'Mexico'),
+    ('MY', 'MYS', 'Malaysia'),
+    ('MZ', 'MOZ', 'Mozambique'),
+    ('NA', 'NAM', 'Namibia'),
+    ('NC', 'NCL', 'New Caledonia'),
+    ('NE', 'NER', 'Niger'),
+    ('NF', 'NFK', 'Norfolk Island'),
+    ('NG', 'NGA', 'Nigeria'),
+    ('NI', 'NIC', 'Nicaragua'),
+    ('NL', 'NLD', 'Netherlands'),
+    ('NO', 'NOR', 'Norway'),
+    ('NP', 'NPL', 'Nepal'),
+    ('NR', 'NRU', 'Nauru'),
+    ('NU', 'NIU', 'Niue'),
+    ('NZ', 'NZL', 'New Zealand'),
+    ('OM', 'OMN', 'Oman'),
+    ('PA', 'PAN', 'Panama'),
+    ('PE', 'PER', 'Peru'),
+    ('PF', 'PYF', 'French Polynesia'),
+    ('PG', 'PNG', 'Papua New Guinea'),
+    ('PH', 'PHL', 'Philippines'),
+    ('PK', 'PAK', 'Pakistan'),
+    ('PL', 'POL', 'Poland'),
+    ('PM', 'SPM', 'Saint Pierre and Miquelon'),
+    ('PN', 'PCN', 'Pitcairn'),
+    ('PR', 'PRI', 'Puerto Rico'),
+    ('PS', 'PSE', 'Palestine, State of'),
+    ('PT', 'PRT', 'Portugal'),
+    ('PW', 'PLW', 'Palau'),
+    ('PY', 'PRY', 'Paraguay'),
+    ('QA', 'QAT', 'Qatar'),
+    ('RE', 'REU', 'Réunion'),
+    ('RO', 'ROU', 'Romania'),
+    ('RS', 'SRB', 'Serbia'),
+    ('RU', 'RUS', 'Russian Federation'),
+    ('RW', 'RWA', 'Rwanda'),
+    ('SA', 'SAU', 'Saudi Arabia'),
+    ('SB', 'SLB', 'Solomon Islands'),
+    ('SC', 'SYC', 'Seychelles'),
+    ('SD', 'SDN', 'Sudan'),
+    ('SE', 'SWE', 'Sweden'),
+    ('SG', 'SGP', 'Singapore'),
+    ('SH', 'SHN', 'Saint Helena, Ascension and Tristan da Cunha'),
+    ('SI', 'SVN', 'Slovenia'),
+    ('SJ', 'SJM', 'Svalbard and Jan Mayen'),
+    ('SK', 'SVK', 'Slovakia'),
+    ('SL', 'SLE', 'Sierra Leone'),
+    ('SM', 'SMR', 'San Marino'),
+    ('SN', 'SEN', 'Senegal'),
+    ('SO', 'SOM', 'Somalia'),
+    ('SR', 'SUR', 'Suriname'),
+    ('SS', 'SSD', 'South Sudan'),
+    ('ST', 'STP', 'Sao Tome and Principe'),
+    ('SV', 'SLV', 'El Salvador'),
+    ('SX', 'SXM', 'Sint Maarten (Dutch part)'),
+    ('SY', 'SYR', 'Syria'),
+    ('SZ', 'SWZ', 'Eswatini'),
+    ('TC', 'TCA', 'Turks and Caicos Islands'),
+    ('TD', 'TCD', 'Chad'),
+    ('TF', 'ATF', 'French Southern Territories'),
+    ('TG', 'TGO', 'Togo'),
+    ('TH', 'THA', 'Thailand'),
+    ('TJ', 'TJK', 'Tajikistan'),
+    ('TK', 'TKL', 'Tokelau'),
+    ('TL', 'TLS', 'Timor-Leste'),
+    ('TM', 'TKM', 'Turkmenistan'),
+    ('TN', 'TUN', 'Tunisia'),
+    ('TO', 'TON', 'Tonga'),
+    ('TR', 'TUR', 'Türkiye'),
+    ('TT', 'TTO', 'Trinidad and Tobago'),
+    ('TV', 'TUV', 'Tuvalu'),
+    ('TW', 'TWN', 'Taiwan'),
+    ('TZ', 'TZA', 'Tanzania'),
+    ('UA', 'UKR', 'Ukraine'),
+    ('UG', 'UGA', 'Uganda'),
+    ('UM', 'UMI', 'United States Minor Outlying Islands'),
+    ('US', 'USA', 'United States'),
+    ('UY', 'URY', 'Uruguay'),
+    ('UZ', 'UZB', 'Uzbekistan'),
+    ('VA', 'VAT', 'Holy See (Vatican City State)'),
+    ('VC', 'VCT', 'Saint Vincent and the Grenadines'),
+    ('VE', 'VEN', 'Venezuela'),
+    ('VG', 'VGB', 'Virgin Islands, British'),
+    ('VI', 'VIR', 'Virgin Islands, U.S.'),
+    ('VN', 'VNM', 'Vietnam'),
+    ('VU', 'VUT', 'Vanuatu'),
+    ('WF', 'WLF', 'Wallis and Futuna'),
+    ('WS', 'WSM', 'Samoa'),
+    ('YE', 'YEM', 'Yemen'),
+    ('YT', 'MYT', 'Mayotte'),
+    ('ZA', 'ZAF', 'South Africa'),
+    ('ZM', 'ZMB', 'Zambia'),
+    ('ZW', 'ZWE', 'Zimbabwe'),
+)
+
+# Codes and names people write that are not the ISO ones
+ALIASES = {
+    'UK': 'GB', 'EL': 'GR', 'EU': 'EU',
+    'england': 'GB', 'great britain': 'GB', 'britain': 'GB', 'scotland': 'GB', 'wales': 'GB',
+    'usa': 'US', 'america': 'US', 'united states of america': 'US',
+    'uae': 'AE', 'emirates': 'AE', 'korea': 'KR', 'russia': 'RU', 'czech republic': 'CZ',
+    'holland': 'NL', 'the netherlands': 'NL', 'turkey': 'TR', 'ivory coast': 'CI',
+    'viet nam': 'VN', 'congo': 'CG', 'dr congo': 'CD', 'drc': 'CD', 'macedonia': 'MK',
+    'moldova': 'MD', 'bolivia': 'BO', 'venezuela': 'VE', 'iran': 'IR', 'syria': 'SY',
+    'laos': 'LA', 'tanzania': 'TZ', 'palestine': 'PS', 'brunei': 'BN', 'micronesia': 'FM',
+    'european union': 'EU'
+}
+# Not a country, but sheets use it (and its flag) as a GEO
+EXTRA_CODES = {'EU': 'European Union'}
+
+# Region groups; every other country is TIER3. UK is not listed because it
+# resolves to GB above.
+REGIONS = {
+    'LATAM': ('AR', 'BO', 'BR', 'CL', 'CO', 'CR', 'CU', 'DO', 'EC', 'SV', 'GT', 'HN', 'MX', 'NI', 'PA', 'PY', 'PE', 'UY', 'VE'),
+    'NORDICS': ('DK', 'FI', 'IS', 'NO', 'SE'),
+    'BALTICS': ('EE', 'LV', 'LT'),
+    'TIER1': ('AU', 'CA', 'FR', 'DE', 'IT', 'JP', 'NL', 'NZ', 'SG', 'ES', 'GB', 'US')
+}
+DEFAULT_REGION = 'TIER3'
+
+NAMES: Dict[str, str] = {alpha2: name for alpha2, _, name in COUNTRIES}
+NAMES.update(EXTRA_CODES)
+REGION_OF: Dict[str, str] = {code: DEFAULT_REGION for code in NAMES}
+REGION_OF.update({code: region for region, codes in REGIONS.items() for code in codes})
+
+def _name_key(name: str) -> str:
+    name = unicodedata.normalize('NFKD', name)
+    name = ''.join(ch for ch in name if not unicodedata.combining(ch))
+    return re.sub(r'[^a-z]+', ' ', name.lower()).strip()
+
+# Every spelling of a country, keyed case-insensitively, resolved to alpha-2
+_LOOKUP: Dict[str, str] = {}
+for _alpha2, _alpha3, _name in COUNTRIES:
+    _LOOKUP[_alpha2.lower()] = _alpha2
+    _LOOKUP[_alpha3.lower()] = _alpha2
+    _LOOKUP[_name_key(_name)] = _alpha2
+    # "Korea, Republic of" style names also answer to the part before the comma
+    if ',' in _name:
+        _LOOKUP.setdefault(_name_key(_name.split(',')[0]), _alpha2)
+for _alias, _code in ALIASES.items():
+    _LOOKUP[_name_key(_alias)] = _code
+
+_REGIONAL_INDICATOR_A = 0x1F1E6
+FLAG_PATTERN = re.compile('[\U0001F1E6-\U0001F1FF]{2}')
+_SEPARATORS = re.compile(r'\s*(?:[|,/;+&]|\band\b)\s*', re.I)
+_CODE_TOKEN = re.compile(r'\b[A-Z]{2}\b')
+
+def flag(code: str) -> str:
+    """Flag emoji for a two-letter code"""
+    return ''.join(chr(_REGIONAL_INDICATOR_A + ord(ch) - ord('A')) for ch in code.upper())
+
+def decode_flags(text: str) -> List[str]:
+    """Country codes of the flag emoji in text, in order ('🇩🇪🇦🇹' -> ['DE', 'AT'])"""
+    codes = []
+    for pair in FLAG_PATTERN.findall(text):
+        code = ''.join(chr(ord(ch) - _REGIONAL_INDICATOR_A + ord('A')) for ch in pair)
+        code = lookup(code)
+        if code:
+            codes.append(code)
+    return codes
+
+def lookup(token: str) -> Optional[str]:
+    """Alpha-2 code for a code, alias, country name or flag; None if it is none of them"""
+    code = _LOOKUP.get(_name_key(token))
+    if code:
+        return code
+    token = token.strip()
+    if len(token) == 2 and FLAG_PATTERN.fullmatch(token):
+        codes = decode_flags(token)
+        return codes[0] if codes else None
+    return None
+
+def split_geos(text: str) -> List[str]:
+    """Every country in a GEO value, in order and without repeats.
+
+    Accepts separators (|, comma, /, +, &, 'and'), codes, aliases, names
+    and flags: 'UK, Ireland | 🇩🇪' -> ['GB', 'IE', 'DE']. Pieces that are not
+    a country as a whole are searched for flags and upper-case codes only,
+    so ordinary words such as 'in' or 'no' are never read as countries.
+    """
+    codes: List[str] = []
+    for piece in _SEPARATORS.split(text.strip()):
+        if not piece:
+            continue
+        code = lookup(piece)
+        if code:
+            codes.append(code)
+            continue
+        codes.extend(decode_flags(piece))
+        for token in _CODE_TOKEN.findall(FLAG_PATTERN.sub(' ', piece)):
+            code = lookup(token)
+            if code:
+                codes.append(code)
+    return list(dict.fromkeys(codes))
+
+def normalize_geo(value) -> str:
+    """GEO field in the stored form: alpha-2 codes joined by '|', or '&' when empty"""
+    if isinstance(value, (list, tuple)):
+        value = '|'.join(str(v) for v in value)
+    if not value or value == '&':
+        return '&'
+    codes = split_geos(str(value))
+    return '|'.join(codes) if codes else str(value).strip()
+
+def region_of(code: str) -> str:
+    """Region of an alpha-2 code; aliases such as UK resolve first"""
+    region = REGION_OF.get(code)
+    if region is None:
+        region = REGION_OF.get(_LOOKUP.get(code.lower()), DEFAULT_REGION)
+    return region
+
+def region_for(geo: str) -> str:
+    """Region of a stored GEO value; several GEOs give each distinct region once"""
+    if not geo or geo == '&':
+        return '&'
+    codes = [code for code in geo.split('|') if code in REGION_OF or lookup(code)]
+    return '|'.join(dict.fromkeys(region_of(code) for code in codes)) or '&'
+
+def apply_geo(parsed_data: Dict) -> Dict:
+    """Normalize a parsed deal's GEO and derive its region, in place"""
+    parsed_data['geo'] = normalize_geo(parsed_data.get('geo'))
+    parsed_data['region'] = region_for(parsed_data['geo'])
+    return parsed_data
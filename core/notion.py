@@ -0,0 +1,333 @@
+import asyncio
+import logging
+import os
+import random
+import sqlite3
+import time
+from email.utils import parsedate_to_datetime
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+import aiohttp
+
+from core.deal import Deal
+
+logger = logging.getLogger(__name__)
+
+NOTION_VERSION = "2022-06-28"
+# Responses worth retrying; anything else in 4xx means the payload is wrong
+RETRYABLE_STATUSES = {409, 429, 500, 502, 503, 504}
+
+def _retry_after(value: Optional[str]) -> Optional[float]:
+    """Seconds to wait from a Retry-After header, given as seconds or an HTTP date"""
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+def _text(value) -> Dict:
+    return {"rich_text": [{"text": {"content": str(value)}}] if value not in (None, '') else []}
+
+def page_properties(deal: Deal) -> Dict:
+    """Map a deal onto the Notion database columns"""
+    data = deal.parsed_data
+    return {
+        "Partner": {"title": [{"text": {"content": data.partner}}]},
+        "Region": _text(data.region),
+        "GEO": _text(data.geo),
+        "Language": _text(data.language),
+        "Source": _text(data.source),
+        "Pricing Model": _text(data.pricing_model),
+        "CPA": {"number": data.cpa},
+        "CRG": {"number": data.crg},
+        "CPL": {"number": data.cpl},
+        "CR": {"number": data.cr},
+        "Deduction Limit": {"number": data.deduction_limit},
+        "Funnels": {"multi_select": [{"name": funnel[:100]} for funnel in data.funnels if funnel]},
+        "Deal Hash": _text(deal.get_hash())
+    }
+
+class NotionOutbox:
+    """Durable queue of deals waiting to be exported, stored in deals.db.
+
+    The deal hash is the idempotency key: enqueueing the same deal twice is
+    a no-op, and a sent deal is never sent again.
+    """
+
+    def __init__(self, db_path: Path = Path("data/deals.db")):
+        self.db_path = Path(db_path)
+        self.db_path.parent.mkdir(exist_ok=True)
+        self._init_db()
+
+    def _init_db(self):
+        with sqlite3.connect(self.db_path) as conn:
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS notion_outbox (
+                    id INTEGER PRIMARY KEY,
+                    hash TEXT UNIQUE,
+                    payload TEXT,
+                    status TEXT DEFAULT 'pending',
+                    attempts INTEGER DEFAULT 0,
+                    next_attempt_at REAL DEFAULT 0,
+                    last_error TEXT,
+                    page_id TEXT,
+                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+                )
+            """)
+            conn.execute(
+                "CREATE INDEX IF NOT EXISTS idx_notion_outbox_due ON notion_outbox (status, next_attempt_at)"
+            )
+            # Rows claimed by a worker that died are due again
+            conn.execute("UPDATE notion_outbox SET status = 'pending' WHERE status = 'sending'")
+
+    def enqueue(self, deals: List[Deal]) -> int:
+        """Queue deals for export; returns how many were new"""
+        with sqlite3.connect(self.db_path) as conn:
+            before = conn.total_changes
+            conn.executemany(
+                "INSERT OR IGNORE INTO notion_outbox (hash, payload) VALUES (?, ?)",
+                [(deal.get_hash(), deal.json()) for deal in deals]
+            )
+            return conn.total_changes - before
+
+    def claim(self, limit: int) -> List[Tuple[int, str, Deal, int]]:
+        """Mark up to limit due rows as sending and return (id, hash, deal, attempts)"""
+        with sqlite3.connect(self.db_path) as conn:
+            rows = conn.execute(
+                """
+                SELECT id, hash, payload, attempts FROM notion_outbox
+                WHERE status = 'pending' AND next_attempt_at <= ?
+                ORDER BY id LIMIT ?
+                """,
+                (time.time(), limit)
+            ).fetchall()
+            conn.executemany(
+                "UPDATE notion_outbox SET status = 'sending' WHERE id = ?",
+                [(row[0],) for row in rows]
+            )
+        return [(row_id, deal_hash, Deal.parse_raw(payload), attempts) for row_id, deal_hash, payload, attempts in rows]
+
+    def mark_sent(self, row_id: int, page_id: Optional[str]):
+        with sqlite3.connect(self.db_path) as conn:
+            conn.execute(
+                """
+                UPDATE notion_outbox
+                SET status = 'sent', page_id = ?, last_error = NULL, updated_at = CURRENT_TIMESTAMP
+                WHERE id = ?
+                """,
+                (page_id, row_id)
+            )
+
+    def mark_retry(self, row_id: int, error: str, delay: float):
+        with sqlite3.connect(self.db_path) as conn:
+            conn.execute(
+                """
+                UPDATE notion_outbox
+                SET status = 'pending', attempts = attempts + 1, next_attempt_at = ?,
+                    last_error = ?, updated_at = CURRENT_TIMESTAMP
+                WHERE id = ?
+                """,
+                (time.time() + delay, error, row_id)
+            )
+
+    def mark_failed(self, row_id: int, error: str):
+        with sqlite3.connect(self.db_path) as conn:
+            conn.execute(
+                """
+                UPDATE notion_outbox
+                SET status = 'failed', attempts = attempts + 1, last_error = ?, updated_at = CURRENT_TIMESTAMP
+                WHERE id = ?
+                """,
+                (error, row_id)
+            )
+
+    def next_due(self) -> Optional[float]:
+        """Earliest retry time among pending rows"""
+        with sqlite3.connect(self.db_path) as conn:
+            row = conn.execute(
+                "SELECT MIN(next_attempt_at) FROM notion_outbox WHERE status = 'pending'"
+            ).fetchone()
+        return row[0]
+
+    def known(self, hashes: List[str]) -> set:
+        """Which of the given deal hashes are already queued or exported"""
+        if not hashes:
+            return set()
+        with sqlite3.connect(self.db_path) as conn:
+            rows = conn.execute(
+                f"SELECT hash FROM notion_outbox WHERE hash IN ({','.join('?' * len(hashes))})", hashes
+            ).fetchall()
+        return {row[0] for row in rows}
+
+    def counts(self) -> Dict[str, int]:
+        with sqlite3.connect(self.db_path) as conn:
+            return dict(conn.execute("SELECT status, COUNT(*) FROM notion_outbox GROUP BY status").fetchall())
+
+class _ExportError(Exception):
+    def __init__(self, message: str, retryable: bool, retry_after: Optional[float] = None):
+        super().__init__(message)
+        self.retryable = retryable
+        self.retry_after = retry_after
+
+class NotionExporter:
+    """Background worker that drains the outbox into a Notion database.
+
+    Due rows are claimed in batches and created concurrently through one
+    pooled HTTP session, with at most `concurrency` requests in flight.
+    Rate limits and server errors are retried with exponential backoff
+    (honouring Retry-After); a retried deal is first looked up by its hash
+    so a page created by a request that timed out is not duplicated.
+    """
+
+    def __init__(
+        self,
+        outbox: Optional[NotionOutbox] = None,
+        api_key: Optional[str] = None,
+        database_id: Optional[str] = None,
+        base_url: Optional[str] = None,
+        concurrency: Optional[int] = None,
+        batch_size: int = 20,
+        max_attempts: int = 6,
+        base_delay: float = 1.0,
+        max_delay: float = 300.0
+    ):
+        self.outbox = outbox or NotionOutbox()
+        self.api_key = api_key or os.getenv("NOTION_API_KEY")
+        self.database_id = database_id or os.getenv("NOTION_DATABASE_ID")
+        self.base_url = (base_url or os.getenv("NOTION_BASE_URL", "https://api.notion.com")).rstrip('/')
+        # Notion allows about three requests per second per integration
+        self.concurrency = concurrency or int(os.getenv("NOTION_CONCURRENCY", "3"))
+        self.batch_size = batch_size
+        self.max_attempts = max_attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+
+        self._session: Optional[aiohttp.ClientSession] = None
+        self._task: Optional[asyncio.Task] = None
+        self._wakeup = asyncio.Event()
+        self._semaphore = asyncio.Semaphore(self.concurrency)
+
+    @property
+    def configured(self) -> bool:
+        return bool(self.api_key and self.database_id)
+
+    async def start(self):
+        if self._task or not self.configured:
+            if not self.configured:
+                logger.warning("Notion export disabled: NOTION_API_KEY or NOTION_DATABASE_ID not set")
+            return
+        self._session = aiohttp.ClientSession(
+            headers={
+                "Authorization": f"Bearer {self.api_key}",
+                "Notion-Version": NOTION_VERSION,
+                "Content-Type": "application/json"
+            },
+            connector=aiohttp.TCPConnector(limit=self.concurrency),
+            timeout=aiohttp.ClientTimeout(total=30)
+        )
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        if self._session:
+            await self._session.close()
+            self._session = None
+
+    def submit(self, deals: List[Deal]) -> int:
+        """Queue deals and wake the worker; returns immediately"""
+        added = self.outbox.enqueue(deals)
+        self._wakeup.set()
+        return added
+
+    async def _run(self):
+        while True:
+            # Cleared before looking for work so a submit() from here on is not lost
+            self._wakeup.clear()
+            try:
+                batch = await asyncio.to_thread(self.outbox.claim, self.batch_size)
+                if batch:
+                    await asyncio.gather(*(self._export(*row) for row in batch))
+                    continue
+                next_due = await asyncio.to_thread(self.outbox.next_due)
+            except sqlite3.Error as e:
+                logger.error(f"Notion outbox unavailable: {str(e)}")
+                next_due = time.time() + self.base_delay
+
+            # Sleep until woken by a submit or until the next retry is due
+            timeout = None if next_due is None else max(0.0, next_due - time.time())
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout)
+            except asyncio.TimeoutError:
+                pass
+
+    async def _export(self, row_id: int, deal_hash: str, deal: Deal, attempts: int):
+        try:
+            async with self._semaphore:
+                page_id = await self._find_page(deal_hash) if attempts else None
+                if not page_id:
+                    page_id = await self._create_page(deal, deal_hash)
+            await asyncio.to_thread(self.outbox.mark_sent, row_id, page_id)
+        except _ExportError as e:
+            await self._handle_failure(row_id, attempts, str(e), e.retryable, e.retry_after)
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            await self._handle_failure(row_id, attempts, f"{type(e).__name__}: {e}", True)
+        except Exception as e:
+            # An unexpected response body or a database error must not stop the worker
+            logger.exception(f"Unexpected error exporting outbox row {row_id}")
+            await self._handle_failure(row_id, attempts, f"{type(e).__name__}: {e}", True)
+
+    async def _handle_failure(self, row_id: int, attempts: int, error: str, retryable: bool,
+                              retry_after: Optional[float] = None):
+        try:
+            if not retryable or attempts + 1 >= self.max_attempts:
+                logger.error(f"Notion export of outbox row {row_id} failed: {error}")
+                await asyncio.to_thread(self.outbox.mark_failed, row_id, error)
+                return
+            delay = min(self.max_delay, self.base_delay * 2 ** attempts) * random.uniform(0.5, 1.5)
+            if retry_after is not None:
+                delay = max(delay, retry_after)
+            logger.warning(f"Notion export of outbox row {row_id} will retry in {delay:.1f}s: {error}")
+            await asyncio.to_thread(self.outbox.mark_retry, row_id, error, delay)
+        except sqlite3.Error as e:
+            # The row stays claimed; it is due again after the next restart
+            logger.error(f"Error recording export result of outbox row {row_id}: {str(e)}")
+
+    async def _request(self, path: str, body: Dict, idempotency_key: Optional[str] = None) -> Dict:
+        headers = {"Idempotency-Key": idempotency_key} if idempotency_key else None
+        async with self._session.post(f"{self.base_url}{path}", json=body, headers=headers) as response:
+            if response.status < 300:
+                return await response.json()
+            text = await response.text()
+            raise _ExportError(
+                f"HTTP {response.status}: {text[:200]}",
+                response.status in RETRYABLE_STATUSES,
+                _retry_after(response.headers.get("Retry-After"))
+            )
+
+    async def _find_page(self, deal_hash: str) -> Optional[str]:
+        result = await self._request(f"/v1/databases/{self.database_id}/query", {
+            "filter": {"property": "Deal Hash", "rich_text": {"equals": deal_hash}},
+            "page_size": 1
+        })
+        pages = result.get("results") or []
+        return pages[0].get("id") if pages else None
+
+    async def _create_page(self, deal: Deal, deal_hash: str) -> Optional[str]:
+        result = await self._request("/v1/pages", {
+            "parent": {"database_id": self.database_id},
+            "properties": page_properties(deal)
+        }, idempotency_key=deal_hash)
+        return result.get("id")
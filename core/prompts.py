@@ -1,6 +1,9 @@
 from typing import List, Dict
 import json
 
+# System prompt used in the fine-tuning data and by the fine-tuned model
+SYSTEM_PROMPT = "You are a deal parsing assistant. Extract and format deal information according to the specified template."
+
 STRUCTURE_ANALYSIS_PROMPT = """Analyze the structure of deal text and identify shared fields. A field is considered shared when it applies to ALL deals in the text.
 
 Key Rules for Shared Fields:
@@ -63,22 +66,16 @@ Return this analysis as JSON:
 DEAL_PARSING_PROMPT = """Parse this deal using these rules:
 
 1. Partner: Look for "Partner:" or inherit from context
-2. Region: Classify GEO into:
-   - LATAM: AR, BO, BR, CL, CO, CR, CU, DO, EC, SV, GT, HN, MX, NI, PA, PY, PE, UY, VE
-   - NORDICS: DK, FI, IS, NO, SE
-   - BALTICS: EE, LV, LT
-   - TIER1: AU, CA, FR, DE, IT, JP, NL, NZ, SG, ES, GB, US
-   - TIER3: All other countries
-3. GEO: Use two-letter country codes
-4. Language: Default "Native" if unspecified
-5. Source: Look for fb, Facebook, Google, etc. Default to "Facebook" if unspecified
-6. Pricing Model: 
+2. GEO: Use two-letter country codes, several joined with "|"
+3. Language: Default "Native" if unspecified
+4. Source: Look for fb, Facebook, Google, etc. Default to "Facebook" if unspecified
+5. Pricing Model: 
    - If format is "X+Y%" -> "CPA/CRG"
    - Single number with "cpl" -> "CPL"
-7. CPA: Number before "+" in "X+Y%"
-8. CRG: Convert Y to decimal in "X+Y%" (e.g., 10% -> 0.10)
-9. Funnels: Product names after pricing
-10. CR: Look for "cr: X%" or "X-Y%"
+6. CPA: Number before "+" in "X+Y%"
+7. CRG: Convert Y to decimal in "X+Y%" (e.g., 10% -> 0.10)
+8. Funnels: Product names after pricing
+9. CR: Look for "cr: X%" or "X-Y%"
 
 Shared Context:
 {shared_context}
@@ -91,7 +88,6 @@ Return as JSON:
     "raw_text": "original text",
     "parsed_data": {
         "partner": string,
-        "region": string,
         "geo": string,
         "language": string,
         "source": string,
@@ -105,7 +101,6 @@ Return as JSON:
     "metadata": {
         "confidence_flags": {
             "partner": "explicit|inferred|inherited|empty",
-            "region": "explicit|inferred|inherited|empty",
             "geo": "explicit|inferred|inherited|empty",
             "language": "explicit|inferred|inherited|empty",
             "source": "explicit|inferred|inherited|empty",
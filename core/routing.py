@@ -0,0 +1,174 @@
+import logging
+import os
+import sqlite3
+from collections import Counter
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from core.deal import Deal, DealProcessor
+
+logger = logging.getLogger(__name__)
+
+# Price fields each pricing model needs; the others are legitimately empty
+PRICE_FIELDS = {'CPA/CRG': ('cpa', 'crg'), 'CPA': ('cpa',), 'CPL': ('cpl',)}
+REQUIRED_FIELDS = ('partner', 'geo', 'pricing_model')
+# Region is always derived from the GEO, so its flag says nothing about the text
+DERIVED_FIELDS = ('region',)
+
+class ConfidenceStats:
+    """Per-field counts of confidence flags, auto-approvals and human corrections.
+
+    Counts collect in memory and are added to the confidence_stats table in
+    deals.db on flush(). The correction rate of each (field, flag) pair is
+    what thresholds should be tuned against.
+    """
+
+    def __init__(self, db_path: Path = Path("data/deals.db")):
+        self.db_path = Path(db_path)
+        self.db_path.parent.mkdir(exist_ok=True)
+        self._pending: Dict[Tuple[str, str], Counter] = {}
+        self._init_db()
+
+    def _init_db(self):
+        with sqlite3.connect(self.db_path) as conn:
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS confidence_stats (
+                    field TEXT,
+                    flag TEXT,
+                    seen INTEGER DEFAULT 0,
+                    auto_approved INTEGER DEFAULT 0,
+                    corrected INTEGER DEFAULT 0,
+                    PRIMARY KEY (field, flag)
+                )
+            """)
+
+    def _count(self, field: str, flag: str, column: str):
+        self._pending.setdefault((field, flag), Counter())[column] += 1
+
+    def observe(self, flags: Dict[str, str], auto_approved: bool):
+        for field, flag in flags.items():
+            self._count(field, flag, 'seen')
+            if auto_approved:
+                self._count(field, flag, 'auto_approved')
+
+    def corrected(self, field: str, flag: Optional[str]):
+        self._count(field, flag or 'unflagged', 'corrected')
+
+    def flush(self):
+        if not self._pending:
+            return
+        pending, self._pending = self._pending, {}
+        with sqlite3.connect(self.db_path) as conn:
+            conn.executemany(
+                """
+                INSERT INTO confidence_stats (field, flag, seen, auto_approved, corrected)
+                VALUES (?, ?, ?, ?, ?)
+                ON CONFLICT (field, flag) DO UPDATE SET
+                    seen = seen + excluded.seen,
+                    auto_approved = auto_approved + excluded.auto_approved,
+                    corrected = corrected + excluded.corrected
+                """,
+                [
+                    (field, flag, counts['seen'], counts['auto_approved'], counts['corrected'])
+                    for (field, flag), counts in pending.items()
+                ]
+            )
+
+    def report(self) -> List[Dict]:
+        """Rows per (field, flag) with the share of seen values a human corrected"""
+        with sqlite3.connect(self.db_path) as conn:
+            rows = conn.execute(
+                "SELECT field, flag, seen, auto_approved, corrected FROM confidence_stats ORDER BY field, flag"
+            ).fetchall()
+        return [
+            {
+                'field': field, 'flag': flag, 'seen': seen, 'auto_approved': auto,
+                'corrected': corrected, 'correction_rate': corrected / seen if seen else None
+            }
+            for field, flag, seen, auto, corrected in rows
+        ]
+
+class ConfidenceRouter:
+    """Decides after parsing which deals skip manual review.
+
+    A deal is auto-approved when the fields it cannot do without (partner,
+    GEO, pricing model and the prices that model needs) carry an accepted
+    flag, no other field was guessed, no price is an outlier for its GEO,
+    it validates as DealData, and it is neither a known deal nor a repeat
+    within the same batch. Everything else, including deals from parsers
+    that return no flags, goes to review.
+    """
+
+    def __init__(
+        self,
+        processor: Optional[DealProcessor] = None,
+        stats: Optional[ConfidenceStats] = None,
+        known_hashes=None,
+        accepted_flags: Optional[Iterable[str]] = None,
+        enabled: Optional[bool] = None
+    ):
+        self.processor = processor or DealProcessor()
+        self.stats = stats or ConfidenceStats(self.processor.db_path)
+        # Extra dedup source, e.g. the Notion outbox's known()
+        self.known_hashes = known_hashes
+        self.accepted_flags = frozenset(
+            accepted_flags or os.getenv("AUTO_APPROVE_FLAGS", "explicit").split(',')
+        )
+        self.enabled = enabled if enabled is not None else os.getenv("AUTO_APPROVE", "1") != "0"
+
+    def review_reason(self, flags: Dict[str, str], parsed_data: Dict) -> Optional[str]:
+        """Why a deal's flags need a human, or None when they are confident enough"""
+        if not flags:
+            return "no confidence flags"
+        model = str(parsed_data.get('pricing_model') or '').upper()
+        required = REQUIRED_FIELDS + PRICE_FIELDS.get(model, ('cpa', 'crg', 'cpl'))
+        for field in required:
+            if flags.get(field) not in self.accepted_flags:
+                return f"{field} is {flags.get(field, 'unflagged')}"
+        for field, flag in flags.items():
+            if field not in DERIVED_FIELDS and flag == 'inferred':
+                return f"{field} is inferred"
+        return None
+
+    def route(self, deals: List[Tuple[str, Dict, Dict[str, str]]],
+              holds: Optional[List[Optional[str]]] = None) -> List[Optional[str]]:
+        """Route (raw_text, parsed_data, confidence_flags) triples.
+
+        holds gives the caller's own reasons to review a deal, if any.
+        Returns one entry per deal: None when it was auto-approved,
+        otherwise the reason it needs review.
+        """
+        reasons: List[Optional[str]] = []
+        candidates: Dict[int, Tuple[str, Deal]] = {}
+        for i, (raw_text, parsed_data, flags) in enumerate(deals):
+            reason = "auto-approval disabled" if not self.enabled else self.review_reason(flags, parsed_data)
+            if reason is None and holds:
+                reason = holds[i]
+            if reason is None and self.processor.anomalies.score(parsed_data):
+                reason = "price anomaly"
+            if reason is None:
+                try:
+                    candidates[i] = (raw_text, Deal.from_parser_output(raw_text, parsed_data))
+                except ValueError as e:
+                    reason = f"invalid: {str(e).splitlines()[0]}"
+            reasons.append(reason)
+
+        known = set()
+        if candidates and self.known_hashes:
+            known = self.known_hashes([deal.get_hash() for _, deal in candidates.values()])
+        batch = set()
+        for i, (raw_text, deal) in candidates.items():
+            deal_hash = deal.get_hash()
+            if deal_hash in batch or deal_hash in known:
+                reasons[i] = "duplicate"
+            elif self.processor.check_duplicate_details(raw_text, deal)["is_duplicate"]:
+                reasons[i] = "duplicate"
+            batch.add(deal_hash)
+
+        for (_, _, flags), reason in zip(deals, reasons):
+            self.stats.observe(flags, reason is None)
+        try:
+            self.stats.flush()
+        except sqlite3.Error as e:
+            logger.error(f"Error saving confidence stats: {str(e)}")
+        return reasons
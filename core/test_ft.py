@@ -1,6 +1,12 @@
 import asyncio
 import json
-from ft_client import FineTunedDealParser
+import os
+import sys
+
+# Add project root to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from core.ft_client import FineTunedDealParser
 from dotenv import load_dotenv
 
 async def test_model():
@@ -1,3 +1,5 @@
+import argparse
+import asyncio
 import logging
 from pathlib import Path
 import os
@@ -9,6 +11,8 @@ from telegram.ext import (
     filters
 )
 from bot.message import MessageHandler
+from bot.dispatcher import UserDispatcher
+from bot.webhook import WebhookServer
 from dotenv import load_dotenv
 
 load_dotenv()
@@ -19,35 +23,83 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+def parse_args():
+    parser = argparse.ArgumentParser(description="Run the deal parser bot")
+    parser.add_argument("--webhook", action="store_true", default=os.getenv("BOT_MODE") == "webhook",
+                        help="Receive updates through a webhook server instead of long polling")
+    parser.add_argument("--webhook-url", default=os.getenv("WEBHOOK_URL"),
+                        help="Public base URL to register with Telegram; omit to accept only local posts")
+    parser.add_argument("--host", default=os.getenv("WEBHOOK_HOST", "0.0.0.0"))
+    parser.add_argument("--port", type=int, default=int(os.getenv("WEBHOOK_PORT", "8443")))
+    parser.add_argument("--path", default=os.getenv("WEBHOOK_PATH", "/telegram"))
+    parser.add_argument("--secret", default=os.getenv("WEBHOOK_SECRET"),
+                        help="Secret token Telegram must send with each update")
+    parser.add_argument("--concurrent-updates", type=int, default=int(os.getenv("CONCURRENT_UPDATES", "256")),
+                        help="Updates handed to the dispatcher at once")
+    parser.add_argument("--max-concurrency", type=int, default=int(os.getenv("MAX_CONCURRENCY", "16")),
+                        help="Handlers running at once; each user's updates still run in order")
+    return parser.parse_args()
+
 def main():
     """Start the bot."""
+    args = parse_args()
     token = os.getenv("TELEGRAM_BOT_TOKEN")
     if not token:
         logger.error("No TELEGRAM_BOT_TOKEN found in environment variables")
         return
 
-    # Create application
-    application = Application.builder().token(token).build()
-
-    # Initialize message handler
+    # Initialize message handler; the dispatcher orders each user's updates
     message_handler = MessageHandler()
+    dispatcher = UserDispatcher(args.max_concurrency)
+
+    async def start_workers(application: Application):
+        message_handler.sender.attach(application.bot)
+        await message_handler.notion.start()
+        await message_handler.corrections.start()
+
+    async def stop_workers(application: Application):
+        await message_handler.notion.stop()
+        await message_handler.corrections.stop()
+        message_handler.router.stats.flush()
+
+    # Create application; the Notion export worker runs alongside the bot
+    application = (
+        Application.builder()
+        .token(token)
+        .concurrent_updates(args.concurrent_updates)
+        .post_init(start_workers)
+        .post_shutdown(stop_workers)
+        .build()
+    )
 
     # Add handlers
     application.add_handler(
         TelegramMessageHandler(
             filters.TEXT & ~filters.COMMAND, 
-            message_handler.handle_message
+            dispatcher.wrap(message_handler.handle_message)
         )
     )
     
+    application.add_handler(
+        CommandHandler("prices", dispatcher.wrap(message_handler.handle_prices))
+    )
+
     # Add callback handler - this is what handles button presses
     application.add_handler(
-        CallbackQueryHandler(message_handler.handle_callback)
+        CallbackQueryHandler(dispatcher.wrap(message_handler.handle_callback))
     )
 
     # Start the bot
-    logger.info("Starting bot...")
-    application.run_polling()
+    if args.webhook:
+        logger.info(f"Starting bot in webhook mode ({args.concurrent_updates} concurrent updates)...")
+        server = WebhookServer(
+            application, args.path, args.secret, args.host, args.port,
+            metrics=lambda: {'dispatcher': dispatcher.metrics(), 'sender': message_handler.sender.metrics()}
+        )
+        asyncio.run(server.serve(args.webhook_url))
+    else:
+        logger.info("Starting bot...")
+        application.run_polling()
 
 if __name__ == '__main__':
     main() 
\ No newline at end of file
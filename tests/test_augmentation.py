@@ -0,0 +1,28 @@
+from tools.augmentation import DEFAULT_RULES, Augmenter, RuleSet
+
+BLOCK = """Company: Genio 🚀
+Partner: Sutra
+🇩🇪 DE PRICE: $1300+13% CR: 8-10%
+CPA: 1200 CPL: 30
+Funnel: Bitcoin Trader
+Source: FB Traffic, FB, fb, ggl, GG, search.display"""
+
+def test_every_rule_produces_a_variation():
+    augmenter = Augmenter(max_variations=1000, max_rules_per_variation=1)
+    produced = {name for _, names in augmenter.variations(BLOCK) for name in names}
+    assert {rule.name for rule in DEFAULT_RULES} <= produced
+
+def test_rules_sharing_a_pattern_each_apply():
+    rule_set = RuleSet()
+    matches = rule_set.scan(BLOCK)
+    assert '$' not in rule_set.apply(BLOCK, matches, ['drop_dollar'])
+    assert 'USD 1300' in rule_set.apply(BLOCK, matches, ['usd_prefix'])
+    assert 'Landing Page: Bitcoin' in rule_set.apply(BLOCK, matches, ['funnel_landing'])
+    assert 'Conversion Rate: 8' in rule_set.apply(BLOCK, matches, ['cr_words'])
+
+def test_overlapping_matches_keep_the_earliest():
+    rule_set = RuleSet()
+    text = "FB Traffic"
+    matches = rule_set.scan(text)
+    assert rule_set.apply(text, matches, ['fb_traffic_full', 'fb_upper_full']) == 'Facebook'
+    assert rule_set.apply(text, matches, ['fb_upper_full']) == 'facebook Traffic'
@@ -0,0 +1,23 @@
+from tools.create_validation import block_hash, in_validation, select_validation
+
+def test_hash_selected_blocks_stay_put():
+    hashes = [block_hash(f"Partner: P{i}\nDE 1000+10%") for i in range(200)]
+    validation = select_validation(hashes, [None] * len(hashes))
+    assert validation == {digest for digest in hashes if in_validation(digest)}
+    assert 0 < len(validation) < len(hashes)
+    # More blocks, in another order, never move the hash-selected ones
+    extra = [block_hash(f"Partner: Q{i}\nAT 900+9%") for i in range(200)]
+    grown = select_validation(extra + hashes[::-1], [None] * 400)
+    assert grown & set(hashes) == validation
+
+def test_every_stratum_of_two_or_more_is_scored():
+    hashes = [block_hash(f"Partner: P{i}\nDE 1000+10%") for i in range(40)]
+    strata = [(f"P{i // 2}", 'DE') for i in range(40)]
+    validation = select_validation(hashes, strata)
+    for pair in set(strata):
+        assert any(digest in validation for digest, stratum in zip(hashes, strata) if stratum == pair)
+
+def test_singleton_strata_are_only_held_out_by_hash():
+    hashes = [block_hash(f"Partner: P{i}\nDE 1000+10%") for i in range(40)]
+    strata = [(f"P{i}", 'DE') for i in range(40)]
+    assert select_validation(hashes, strata) == {digest for digest in hashes if in_validation(digest)}
@@ -0,0 +1,38 @@
+from bot.session import DealSession
+
+TEXT = """Partner: Sutra
+🇩🇪 1300+13%
+🇩🇪 1200+12%"""
+
+def _session(metadata=None):
+    deals = [
+        {
+            'raw_text': line,
+            'parsed_data': {'partner': 'Sutra', 'geo': 'DE', 'language': 'Native', 'source': 'Facebook',
+                            'pricing_model': 'CPA/CRG', 'cpa': cpa, 'crg': crg},
+            'metadata': metadata or {}
+        }
+        for line, cpa, crg in (("🇩🇪 1300+13%", 1300, 0.13), ("🇩🇪 1200+12%", 1200, 0.12))
+    ]
+    return DealSession(TEXT, deals)
+
+def test_flag_geo_edit_changes_one_deal():
+    session = _session()
+    assert session.fan_out(0, 'geo', 'CH') == [0]
+    assert [deal.geo for deal in session.deals] == ['CH', 'DE']
+
+def test_defaults_are_not_shared_without_metadata():
+    session = _session()
+    assert session.fan_out(0, 'language', 'English') == [0]
+    assert session.fan_out(1, 'source', 'Google') == [1]
+    assert session.fan_out(0, 'pricing_model', 'CPA') == [0]
+
+def test_partner_is_shared_without_metadata():
+    session = _session()
+    assert session.fan_out(1, 'partner', 'Sutra Media') == [0, 1]
+    assert session.shared['partner'] == 'Sutra Media'
+
+def test_inherited_fields_follow_metadata():
+    session = _session({'shared_fields': ['partner', 'model'], 'shared_context': {'partner': 'Sutra'}})
+    assert session.fan_out(0, 'pricing_model', 'CPA') == [0, 1]
+    assert session.fan_out(0, 'geo', 'CH') == [0]
@@ -0,0 +1,185 @@
+import hashlib
+import itertools
+import random
+import re
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Sequence, Tuple
+
+@dataclass(frozen=True)
+class Rule:
+    """One text rewrite used to augment a deal block.
+
+    Rules in the same group rewrite the same kind of token, so a
+    combination uses at most one rule per group.
+    """
+    name: str
+    group: str
+    pattern: str
+    replacement: str
+    flags: int = 0
+
+    @property
+    def fingerprint(self) -> str:
+        key = f"{self.name}|{self.group}|{self.pattern}|{self.replacement}|{self.flags}"
+        return hashlib.sha256(key.encode('utf-8')).hexdigest()[:16]
+
+# Variation rules; rules sharing a pattern are alternatives within one group
+DEFAULT_RULES = [
+    # Remove emojis and special characters
+    Rule("ascii_only", "charset", r'[^\x00-\x7F]+', ''),
+
+    # Price format variations
+    Rule("plus_spacing", "plus", r'(?<=\d)\s*\+\s*(?=\d)', ' + '),
+    Rule("drop_dollar", "currency", r'\$', ''),
+    Rule("usd_prefix", "currency", r'\$', 'USD '),
+    Rule("percent_word", "percent", r'(?<=\d)\s*%', ' percent'),
+    Rule("price_title", "price_label", r'PRICE:', 'Price:'),
+    Rule("price_lower", "price_label", r'PRICE:', 'price:'),
+    Rule("cpa_as_price", "cpa_label", r'CPA:', 'Price:'),
+    Rule("cpl_as_price", "cpl_label", r'CPL:', 'Price:'),
+
+    # Source format variations
+    Rule("fb_traffic_full", "fb_upper", r'\bFB Traffic\b', 'Facebook'),
+    Rule("fb_upper_full", "fb_upper", r'\bFB\b', 'facebook'),
+    Rule("fb_full", "fb_lower", r'\bfb\b', 'Facebook'),
+    Rule("ggl_full", "ggl", r'\bggl\b', 'Google'),
+    Rule("gg_full", "gg", r'\bGG\b', 'Google'),
+    Rule("display_full", "display", r'search\.display', 'Google Display'),
+
+    # Funnel format variations
+    Rule("funnels_plural", "funnel_label", r'Funnel:', 'Funnels:'),
+    Rule("funnel_lower", "funnel_label", r'Funnel:', 'funnel:'),
+    Rule("funnel_landing", "funnel_label", r'Funnel:', 'Landing Page:'),
+
+    # CR format variations; only numeric ranges like 8-10% become "8 to 10%"
+    Rule("cr_lower", "cr_label", r'CR:', 'cr:'),
+    Rule("cr_words", "cr_label", r'CR:', 'Conversion Rate:'),
+    Rule("range_to", "range", r'(?<=\d)\s*-\s*(?=\d+(?:\.\d+)?\s*%)', ' to '),
+
+    # Partner/Company variations
+    Rule("company_as_partner", "company_label", r'Company:', 'Partner:'),
+    Rule("partner_as_company", "partner_label", r'Partner:', 'Company:'),
+]
+
+class RuleSet:
+    """Rules compiled once per distinct pattern.
+
+    Each block is scanned once per pattern and the match spans are shared
+    by every rule with that pattern (drop_dollar and usd_prefix both
+    rewrite '$'), so every rule applies wherever its pattern occurs. A
+    variation is then a splice of the recorded matches, so the cost of
+    extra combinations is a string join rather than another pass over the
+    text. Where matches of active rules overlap, the one starting first
+    wins, then the rule listed first.
+    """
+
+    def __init__(self, rules: Sequence[Rule] = DEFAULT_RULES):
+        self.rules = list(rules)
+        self.patterns: Dict[Tuple[str, int], re.Pattern] = {}
+        for rule in self.rules:
+            key = (rule.pattern, rule.flags)
+            if key not in self.patterns:
+                self.patterns[key] = re.compile(rule.pattern, rule.flags)
+
+    @property
+    def fingerprint(self) -> str:
+        digest = hashlib.sha256()
+        for rule in self.rules:
+            digest.update(rule.fingerprint.encode('utf-8'))
+        return digest.hexdigest()[:16]
+
+    def scan(self, text: str) -> Dict[Tuple[str, int], List[Tuple[int, int]]]:
+        """Match spans of every pattern that occurs in the text"""
+        matches = {}
+        for key, pattern in self.patterns.items():
+            spans = [m.span() for m in pattern.finditer(text)]
+            if spans:
+                matches[key] = spans
+        return matches
+
+    def applicable(self, matches: Dict[Tuple[str, int], List[Tuple[int, int]]]) -> List[Rule]:
+        """Rules whose pattern occurs in the scanned text, in rule order"""
+        return [rule for rule in self.rules if (rule.pattern, rule.flags) in matches]
+
+    def apply(self, text: str, matches: Dict[Tuple[str, int], List[Tuple[int, int]]],
+              names: Sequence[str]) -> str:
+        """Rebuild text with the matches of the named rules replaced"""
+        active = [rule for rule in self.rules if rule.name in names]
+        edits = sorted(
+            (start, order, end, rule.replacement)
+            for order, rule in enumerate(active)
+            for start, end in matches.get((rule.pattern, rule.flags), ())
+        )
+        parts = []
+        position = 0
+        for start, _, end, replacement in edits:
+            if start < position:
+                # Overlaps a replacement already made
+                continue
+            parts.append(text[position:start])
+            parts.append(replacement)
+            position = end
+        parts.append(text[position:])
+        return ''.join(parts)
+
+class Augmenter:
+    """Expands a block into the original plus single-rule and combined variations.
+
+    Every applicable rule yields one variation; combinations of rules from
+    different groups are then sampled with a seed derived from the block,
+    so output is reproducible, until max_variations is reached.
+    """
+
+    def __init__(
+        self,
+        rule_set: Optional[RuleSet] = None,
+        max_variations: int = 24,
+        max_rules_per_variation: int = 3,
+        seed: int = 0
+    ):
+        self.rule_set = rule_set or RuleSet()
+        self.max_variations = max_variations
+        self.max_rules_per_variation = max_rules_per_variation
+        self.seed = seed
+
+    @property
+    def fingerprint(self) -> str:
+        config = f"{self.rule_set.fingerprint}|{self.max_variations}|{self.max_rules_per_variation}|{self.seed}"
+        return hashlib.sha256(config.encode('utf-8')).hexdigest()[:16]
+
+    def _combinations(self, applicable: List[Rule], rng: random.Random) -> List[Tuple[str, ...]]:
+        """Sampled multi-rule combinations with at most one rule per group"""
+        by_group: Dict[str, List[Rule]] = {}
+        for rule in applicable:
+            by_group.setdefault(rule.group, []).append(rule)
+        groups = list(by_group)
+
+        combos = []
+        for size in range(2, min(self.max_rules_per_variation, len(groups)) + 1):
+            for group_combo in itertools.combinations(groups, size):
+                for rules in itertools.product(*(by_group[g] for g in group_combo)):
+                    combos.append(tuple(rule.name for rule in rules))
+        rng.shuffle(combos)
+        return combos
+
+    def variations(self, text: str) -> List[Tuple[str, Tuple[str, ...]]]:
+        """Return (variation, rule names) pairs, original first, without duplicates"""
+        matches = self.rule_set.scan(text)
+        applicable = self.rule_set.applicable(matches)
+
+        seed_material = f"{self.seed}|{text}".encode('utf-8')
+        rng = random.Random(int.from_bytes(hashlib.sha256(seed_material).digest()[:8], 'big'))
+
+        candidates = [()] + [(rule.name,) for rule in applicable] + self._combinations(applicable, rng)
+
+        results = []
+        seen = set()
+        for names in candidates:
+            if len(results) >= self.max_variations:
+                break
+            variation = self.rule_set.apply(text, matches, names)
+            if variation in seen:
+                continue
+            seen.add(variation)
+            results.append((variation, names or ("original",)))
+        return results
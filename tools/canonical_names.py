@@ -0,0 +1,61 @@
+import argparse
+import os
+import sys
+from pathlib import Path
+
+from rich.console import Console
+from rich.table import Table
+
+# Add project root to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from core.canonical import DEFAULT_TENANT, KINDS, Canonicalizer
+
+def main():
+    parser = argparse.ArgumentParser(description="Inspect and extend the partner and funnel dictionaries")
+    parser.add_argument("--db", default="data/deals.db")
+    parser.add_argument("--tenant", default=DEFAULT_TENANT, help="Chat id whose dictionary to use")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    lookup = subparsers.add_parser("lookup", help="Show what names resolve to")
+    lookup.add_argument("kind", choices=KINDS)
+    lookup.add_argument("names", nargs="+")
+
+    alias = subparsers.add_parser("alias", help="Map a spelling to a canonical name")
+    alias.add_argument("kind", choices=KINDS)
+    alias.add_argument("name")
+    alias.add_argument("canonical")
+
+    subparsers.add_parser("show", help="List canonical names")
+    args = parser.parse_args()
+
+    canonicalizer = Canonicalizer(Path(args.db))
+    console = Console()
+
+    if args.command == "alias":
+        canonicalizer.learn(args.kind, args.name, args.canonical, args.tenant)
+        console.print(f"{args.kind} '{args.name}' -> '{args.canonical}' for tenant {args.tenant}")
+    elif args.command == "lookup":
+        for name in args.names:
+            match = canonicalizer.lookup(args.kind, name, args.tenant)
+            if match:
+                console.print(f"{name!r} -> {match[1]!r} ({match[0]})")
+                continue
+            suggestion = canonicalizer.suggest(args.kind, name, args.tenant)
+            console.print(f"{name!r} -> no match" + (f", close to {suggestion!r}" if suggestion else ""))
+    else:
+        table = Table(title=f"Canonical names ({args.tenant})")
+        for column in ("Kind", "Id", "Name", "Spellings"):
+            table.add_column(column)
+        dictionaries = canonicalizer._dictionaries(args.tenant)
+        for kind in KINDS:
+            dictionary = dictionaries[kind]
+            spellings = {}
+            for key, canonical_id in dictionary.aliases.items():
+                spellings[canonical_id] = spellings.get(canonical_id, 0) + 1
+            for canonical_id, name in sorted(dictionary.names.items()):
+                table.add_row(kind, canonical_id, name, str(spellings.get(canonical_id, 0)))
+        console.print(table)
+
+if __name__ == "__main__":
+    main()
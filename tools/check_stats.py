@@ -1,43 +1,314 @@
+import argparse
+import gzip
 import json
+import os
+import sys
 from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Tuple
+
+CATEGORICAL_FIELDS = ['partner', 'region', 'geo', 'language', 'source', 'pricing_model']
+
+# Fixed-width histogram bins: (bin width, number of bins); values beyond
+# the last bin land in an overflow bucket
+HISTOGRAM_BINS = {
+    'cpa': (100.0, 50),        # 0 - 5000
+    'crg': (0.01, 30),         # 0% - 30%
+    'cpl': (5.0, 40),          # 0 - 200
+    'cr': (0.01, 30),          # 0% - 30%
+    'deduction_limit': (0.01, 20)
+}
+NUMERIC_FIELDS = list(HISTOGRAM_BINS)
+
+class StatsAccumulator:
+    """Single-pass statistics over training examples.
+
+    Memory grows with the number of distinct values, never with rows, so
+    accumulators from parallel chunks can be merged cheaply.
+    """
+
+    def __init__(self):
+        self.examples = 0
+        self.invalid = 0
+        self.nulls = Counter()
+        self.categories = {field: Counter() for field in CATEGORICAL_FIELDS}
+        self.funnels = Counter()
+        self.funnels_per_deal = Counter()
+        self.numeric = {
+            field: {'count': 0, 'sum': 0.0, 'min': None, 'max': None, 'bins': [0] * (bins + 1)}
+            for field, (_, bins) in HISTOGRAM_BINS.items()
+        }
+
+    def add_line(self, line: bytes):
+        if not line.strip():
+            return
+        try:
+            example = json.loads(line)
+            assistant = next(m for m in example['messages'] if m['role'] == 'assistant')
+            deal = json.loads(assistant['content'])['parsed_data']
+        except (ValueError, KeyError, TypeError, StopIteration):
+            self.invalid += 1
+            return
+        self.add_deal(deal)
+
+    def add_deal(self, deal: Dict):
+        self.examples += 1
+
+        for field in CATEGORICAL_FIELDS:
+            value = deal.get(field)
+            if value in (None, '', '&'):
+                self.nulls[field] += 1
+            else:
+                self.categories[field][value] += 1
+
+        funnels = deal.get('funnels') or []
+        if not funnels:
+            self.nulls['funnels'] += 1
+        self.funnels_per_deal[len(funnels)] += 1
+        self.funnels.update(funnels)
+
+        for field in NUMERIC_FIELDS:
+            value = deal.get(field)
+            if value is None:
+                self.nulls[field] += 1
+                continue
+            stats = self.numeric[field]
+            width, bins = HISTOGRAM_BINS[field]
+            stats['count'] += 1
+            stats['sum'] += value
+            stats['min'] = value if stats['min'] is None else min(stats['min'], value)
+            stats['max'] = value if stats['max'] is None else max(stats['max'], value)
+            # Epsilon keeps 0.13 / 0.01 from landing in the 0.12 bin
+            stats['bins'][min(max(int(value / width + 1e-9), 0), bins)] += 1
+
+    def merge(self, other: 'StatsAccumulator') -> 'StatsAccumulator':
+        self.examples += other.examples
+        self.invalid += other.invalid
+        self.nulls.update(other.nulls)
+        for field in CATEGORICAL_FIELDS:
+            self.categories[field].update(other.categories[field])
+        self.funnels.update(other.funnels)
+        self.funnels_per_deal.update(other.funnels_per_deal)
+        for field in NUMERIC_FIELDS:
+            mine, theirs = self.numeric[field], other.numeric[field]
+            mine['count'] += theirs['count']
+            mine['sum'] += theirs['sum']
+            for key, pick in (('min', min), ('max', max)):
+                if theirs[key] is not None:
+                    mine[key] = theirs[key] if mine[key] is None else pick(mine[key], theirs[key])
+            mine['bins'] = [a + b for a, b in zip(mine['bins'], theirs['bins'])]
+        return self
+
+    def to_dict(self, top: int = 10) -> Dict:
+        def null_rate(field):
+            return self.nulls[field] / self.examples if self.examples else 0.0
+
+        result = {
+            'examples': self.examples,
+            'invalid_lines': self.invalid,
+            'fields': {}
+        }
+        for field in CATEGORICAL_FIELDS:
+            counter = self.categories[field]
+            result['fields'][field] = {
+                'null_rate': null_rate(field),
+                'cardinality': len(counter),
+                'top': counter.most_common(top)
+            }
+        result['fields']['funnels'] = {
+            'null_rate': null_rate('funnels'),
+            'cardinality': len(self.funnels),
+            'top': self.funnels.most_common(top),
+            'per_deal': dict(sorted(self.funnels_per_deal.items()))
+        }
+        for field in NUMERIC_FIELDS:
+            stats = self.numeric[field]
+            width, bins = HISTOGRAM_BINS[field]
+            result['fields'][field] = {
+                'null_rate': null_rate(field),
+                'count': stats['count'],
+                'mean': stats['sum'] / stats['count'] if stats['count'] else None,
+                'min': stats['min'],
+                'max': stats['max'],
+                'histogram': {
+                    'bin_width': width,
+                    'counts': stats['bins'][:bins],
+                    'overflow': stats['bins'][bins]
+                }
+            }
+        return result
+
+def _byte_ranges(path: str, parts: int) -> List[Tuple[int, int]]:
+    size = os.path.getsize(path)
+    step = max(1, size // parts)
+    return [(start, min(start + step, size)) for start in range(0, size, step)]
+
+def _iter_range(path: str, start: int, end: int) -> Iterator[bytes]:
+    """Yield the lines that begin inside [start, end)"""
+    with open(path, 'rb') as f:
+        if start:
+            # Skip the partial line; the previous range owns it
+            f.seek(start - 1)
+            f.readline()
+        while f.tell() < end:
+            line = f.readline()
+            if not line:
+                break
+            yield line
+
+def _analyze_range(task: Tuple[str, int, Optional[int]]) -> StatsAccumulator:
+    path, start, end = task
+    stats = StatsAccumulator()
+    if path.endswith('.gz'):
+        # Compressed files cannot be split by offset
+        with gzip.open(path, 'rb') as f:
+            for line in f:
+                stats.add_line(line)
+    else:
+        for line in _iter_range(path, start, end):
+            stats.add_line(line)
+    return stats
+
+def analyze_training_data(paths: List[str] = None, workers: int = 1) -> StatsAccumulator:
+    """Stream one or more JSONL (or .jsonl.gz) files into a single accumulator"""
+    paths = paths or ['data/training_data.jsonl']
+
+    tasks = []
+    for path in paths:
+        if path.endswith('.gz') or workers <= 1:
+            tasks.append((path, 0, None if path.endswith('.gz') else os.path.getsize(path)))
+        else:
+            tasks.extend((path, start, end) for start, end in _byte_ranges(path, workers))
+
+    stats = StatsAccumulator()
+    if workers <= 1:
+        for task in tasks:
+            stats.merge(_analyze_range(task))
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            for partial in pool.map(_analyze_range, tasks):
+                stats.merge(partial)
+    return stats
+
+def analyze_cache(jsonl_path: str) -> StatsAccumulator:
+    """Fill an accumulator from the columnar cache with vectorized counts"""
+    import numpy as np
+    from tools.corpus_cache import load_cache
+
+    cache = load_cache(jsonl_path)
+    stats = StatsAccumulator()
+    stats.examples = len(cache)
+
+    for field in CATEGORICAL_FIELDS:
+        codes = np.asarray(cache.codes(field))
+        vocab = cache.vocab(field)
+        stats.nulls[field] += int((codes < 0).sum())
+        counts = np.bincount(codes[codes >= 0], minlength=len(vocab))
+        for code in np.flatnonzero(counts):
+            value = vocab[code]
+            if value == '&':
+                stats.nulls[field] += int(counts[code])
+            else:
+                stats.categories[field][value] = int(counts[code])
+
+    funnel_offsets = np.asarray(cache.funnel_offsets())
+    per_deal = np.diff(funnel_offsets)
+    stats.nulls['funnels'] = int((per_deal == 0).sum())
+    stats.funnels_per_deal.update({int(n): int(c) for n, c in enumerate(np.bincount(per_deal)) if c})
+    funnel_counts = np.bincount(np.asarray(cache.codes("funnels")), minlength=len(cache.vocab('funnels')))
+    stats.funnels.update({cache.vocab('funnels')[code]: int(funnel_counts[code]) for code in np.flatnonzero(funnel_counts)})
+
+    for field in NUMERIC_FIELDS:
+        values = np.asarray(cache.numeric(field))
+        present = values[~np.isnan(values)]
+        width, bins = HISTOGRAM_BINS[field]
+        stats.nulls[field] = int(len(values) - len(present))
+        if present.size:
+            bin_index = np.clip((present / width + 1e-9).astype(np.int64), 0, bins)
+            stats.numeric[field].update({
+                'count': int(present.size),
+                'sum': float(present.sum()),
+                'min': float(present.min()),
+                'max': float(present.max()),
+                'bins': np.bincount(bin_index, minlength=bins + 1).tolist()
+            })
+
+    return stats
+
+def print_stats(stats: StatsAccumulator):
+    report = stats.to_dict()
+    fields = report['fields']
 
-def analyze_training_data():
-    with open('data/training_data.jsonl', 'r') as f:
-        examples = [json.loads(line) for line in f]
-        
     print(f"\n✨ Training Data Analysis")
-    print(f"Total examples: {len(examples)}")
-    
-    # Count unique formats
-    formats = Counter()
-    geos = Counter()
-    sources = Counter()
-    partners = Counter()
-    
-    for ex in examples:
-        # Get the parsed output from assistant's response
-        deal = json.loads(ex['messages'][2]['content'])['parsed_data']
-        formats[deal['pricing_model']] += 1
-        geos[deal['geo']] += 1
-        sources[deal['source']] += 1
-        partners[deal['partner']] += 1
-        
+    print(f"Total examples: {report['examples']}")
+    if report['invalid_lines']:
+        print(f"Invalid lines: {report['invalid_lines']}")
+
     print("\n📊 Pricing Models:")
-    for model, count in formats.most_common():
+    for model, count in fields['pricing_model']['top']:
         print(f"  {model}: {count}")
-        
+
     print("\n🌍 Top 10 GEOs:")
-    for geo, count in geos.most_common(10):
+    for geo, count in fields['geo']['top']:
         print(f"  {geo}: {count}")
-        
+
     print("\n📱 Sources:")
-    for source, count in sources.most_common():
+    for source, count in fields['source']['top']:
         print(f"  {source}: {count}")
-        
+
     print("\n🤝 Top 10 Partners:")
-    for partner, count in partners.most_common(10):
+    for partner, count in fields['partner']['top']:
         print(f"  {partner}: {count}")
 
+    print(f"\n🔄 Funnels: {fields['funnels']['cardinality']} distinct")
+    for funnel, count in fields['funnels']['top']:
+        print(f"  {funnel}: {count}")
+
+    print("\n🕳 Null rates:")
+    for field, values in fields.items():
+        print(f"  {field}: {values['null_rate']:.1%}")
+
+    for field in ('cpa', 'crg'):
+        values = fields[field]
+        histogram = values['histogram']
+        mean = f"{values['mean']:.4g}" if values['mean'] is not None else 'N/A'
+        print(f"\n💵 {field.upper()} histogram (n={values['count']}, mean={mean}):")
+        peak = max(histogram['counts'] + [histogram['overflow'], 1])
+        for i, count in enumerate(histogram['counts']):
+            if count:
+                low = i * histogram['bin_width']
+                print(f"  {low:>8g}+ {count:>6} {'█' * max(1, count * 40 // peak)}")
+        if histogram['overflow']:
+            print(f"  overflow {histogram['overflow']:>6}")
+
 if __name__ == "__main__":
-    analyze_training_data() 
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Profile training data JSONL files")
+    parser.add_argument("paths", nargs="*", default=['data/training_data.jsonl'],
+                        help="JSONL or gzip-compressed JSONL files")
+    parser.add_argument("--workers", type=int, default=1, help="Processes; plain files are split by byte offset")
+    parser.add_argument("--cache", action="store_true",
+                        help="Read the columnar cache (built on demand) instead of parsing JSON")
+    parser.add_argument("--json", dest="json_output", help="Write the full report as JSON ('-' for stdout)")
+    args = parser.parse_args()
+
+    missing = [p for p in args.paths if not Path(p).exists()]
+    if missing:
+        print(f"File not found: {', '.join(missing)}")
+        sys.exit(1)
+
+    if args.cache:
+        # Add project root to path
+        sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+        stats = StatsAccumulator()
+        for path in args.paths:
+            stats.merge(analyze_cache(path))
+    else:
+        stats = analyze_training_data(args.paths, args.workers)
+    if args.json_output == '-':
+        json.dump(stats.to_dict(), sys.stdout, indent=2, ensure_ascii=False)
+    else:
+        print_stats(stats)
+        if args.json_output:
+            with open(args.json_output, 'w', encoding='utf-8') as f:
+                json.dump(stats.to_dict(), f, indent=2, ensure_ascii=False)
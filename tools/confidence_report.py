@@ -0,0 +1,31 @@
+import argparse
+import os
+import sys
+from pathlib import Path
+
+from rich.console import Console
+from rich.table import Table
+
+# Add project root to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from core.routing import ConfidenceStats
+
+def main():
+    parser = argparse.ArgumentParser(description="Per-field confidence flag stats for tuning auto-approval")
+    parser.add_argument("--db", default="data/deals.db")
+    args = parser.parse_args()
+
+    table = Table(title="Confidence flags")
+    for column in ("Field", "Flag", "Seen", "Auto-approved", "Corrected", "Correction rate"):
+        table.add_column(column, justify="left" if column in ("Field", "Flag") else "right")
+    for row in ConfidenceStats(Path(args.db)).report():
+        rate = row['correction_rate']
+        table.add_row(
+            row['field'], row['flag'], str(row['seen']), str(row['auto_approved']), str(row['corrected']),
+            f"{rate:.1%}" if rate is not None else "-"
+        )
+    Console().print(table)
+
+if __name__ == "__main__":
+    main()
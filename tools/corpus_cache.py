@@ -0,0 +1,228 @@
+import argparse
+import hashlib
+import json
+import os
+import shutil
+import sys
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import numpy as np
+
+CACHE_VERSION = 2
+
+TEXT_COLUMNS = ['system', 'user', 'assistant', 'raw_text']
+CATEGORICAL_FIELDS = ['partner', 'region', 'geo', 'language', 'source', 'pricing_model']
+NUMERIC_FIELDS = ['cpa', 'crg', 'cpl', 'cr', 'deduction_limit']
+
+def cache_dir_for(jsonl_path: str) -> Path:
+    """The cache lives next to its source file"""
+    path = Path(jsonl_path)
+    return path.with_name(path.name + '.cache')
+
+def file_sha256(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+class _TextColumn:
+    """Strings stored as one UTF-8 byte array plus row offsets"""
+
+    def __init__(self):
+        self.chunks = []
+        self.offsets = [0]
+
+    def append(self, value: str):
+        data = (value or '').encode('utf-8')
+        self.chunks.append(data)
+        self.offsets.append(self.offsets[-1] + len(data))
+
+    def save(self, cache_dir: Path, name: str):
+        np.save(cache_dir / f"{name}.bytes.npy", np.frombuffer(b''.join(self.chunks), dtype=np.uint8))
+        np.save(cache_dir / f"{name}.offsets.npy", np.array(self.offsets, dtype=np.int64))
+
+class _DictColumn:
+    """Dictionary-encoded strings: int32 codes into a vocabulary, -1 for null"""
+
+    def __init__(self):
+        self.vocab = {}
+        self.codes = []
+
+    def code(self, value) -> int:
+        if value in (None, ''):
+            return -1
+        return self.vocab.setdefault(value, len(self.vocab))
+
+    def append(self, value):
+        self.codes.append(self.code(value))
+
+def build_cache(jsonl_path: str) -> Path:
+    """Decode the JSONL once and write the columnar cache"""
+    cache_dir = cache_dir_for(jsonl_path)
+    tmp_dir = cache_dir.with_name(cache_dir.name + '.tmp')
+    if tmp_dir.exists():
+        shutil.rmtree(tmp_dir)
+    tmp_dir.mkdir(parents=True)
+
+    texts = {name: _TextColumn() for name in TEXT_COLUMNS}
+    categories = {field: _DictColumn() for field in CATEGORICAL_FIELDS}
+    numeric = {field: [] for field in NUMERIC_FIELDS}
+    funnel_vocab = _DictColumn()
+    funnel_codes = []
+    funnel_offsets = [0]
+    rows = 0
+
+    with open(jsonl_path, 'r', encoding='utf-8') as f:
+        for line in f:
+            if not line.strip():
+                continue
+            messages = {m['role']: m['content'] for m in json.loads(line)['messages']}
+            deal = json.loads(messages.get('assistant') or '{}')
+            parsed_data = deal.get('parsed_data') or {}
+
+            texts['system'].append(messages.get('system'))
+            texts['user'].append(messages.get('user'))
+            texts['assistant'].append(messages.get('assistant'))
+            texts['raw_text'].append(deal.get('raw_text'))
+
+            for field in CATEGORICAL_FIELDS:
+                categories[field].append(parsed_data.get(field))
+            for field in NUMERIC_FIELDS:
+                value = parsed_data.get(field)
+                numeric[field].append(np.nan if value is None else float(value))
+
+            funnel_codes.extend(funnel_vocab.code(funnel) for funnel in parsed_data.get('funnels') or [])
+            funnel_offsets.append(len(funnel_codes))
+            rows += 1
+
+    for name, column in texts.items():
+        column.save(tmp_dir, name)
+    for field, column in categories.items():
+        np.save(tmp_dir / f"{field}.codes.npy", np.array(column.codes, dtype=np.int32))
+    for field, values in numeric.items():
+        np.save(tmp_dir / f"{field}.npy", np.array(values, dtype=np.float64))
+    np.save(tmp_dir / "funnels.codes.npy", np.array(funnel_codes, dtype=np.int32))
+    np.save(tmp_dir / "funnels.offsets.npy", np.array(funnel_offsets, dtype=np.int64))
+
+    stat = os.stat(jsonl_path)
+    manifest = {
+        'version': CACHE_VERSION,
+        'source_sha256': file_sha256(jsonl_path),
+        'source_size': stat.st_size,
+        'source_mtime_ns': stat.st_mtime_ns,
+        'rows': rows,
+        'vocab': {field: list(column.vocab) for field, column in categories.items()},
+        'funnel_vocab': list(funnel_vocab.vocab)
+    }
+    with open(tmp_dir / "manifest.json", 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, ensure_ascii=False)
+
+    # Swap in the finished cache so readers never see a partial one
+    if cache_dir.exists():
+        shutil.rmtree(cache_dir)
+    tmp_dir.rename(cache_dir)
+    return cache_dir
+
+def is_fresh(jsonl_path: str) -> bool:
+    """True if the cache matches the source content"""
+    manifest_path = cache_dir_for(jsonl_path) / "manifest.json"
+    if not manifest_path.exists():
+        return False
+    with open(manifest_path, 'r', encoding='utf-8') as f:
+        manifest = json.load(f)
+
+    if manifest.get('version') != CACHE_VERSION:
+        return False
+
+    stat = os.stat(jsonl_path)
+    if stat.st_size != manifest['source_size']:
+        return False
+    if stat.st_mtime_ns == manifest['source_mtime_ns']:
+        return True
+    # Touched but possibly unchanged: fall back to the content hash
+    return file_sha256(jsonl_path) == manifest['source_sha256']
+
+class CorpusCache:
+    """Read-only, memory-mapped view of a cached training corpus"""
+
+    def __init__(self, cache_dir: Path):
+        self.cache_dir = Path(cache_dir)
+        with open(self.cache_dir / "manifest.json", 'r', encoding='utf-8') as f:
+            self.manifest = json.load(f)
+        self.rows = self.manifest['rows']
+        self._arrays: Dict[str, np.ndarray] = {}
+
+    def __len__(self):
+        return self.rows
+
+    def _array(self, name: str) -> np.ndarray:
+        if name not in self._arrays:
+            self._arrays[name] = np.load(self.cache_dir / f"{name}.npy", mmap_mode='r')
+        return self._arrays[name]
+
+    def text(self, column: str, index: int) -> str:
+        offsets = self._array(f"{column}.offsets")
+        return self._array(f"{column}.bytes")[offsets[index]:offsets[index + 1]].tobytes().decode('utf-8')
+
+    def texts(self, column: str) -> List[str]:
+        data = self._array(f"{column}.bytes").tobytes()
+        offsets = self._array(f"{column}.offsets")
+        return [data[offsets[i]:offsets[i + 1]].decode('utf-8') for i in range(self.rows)]
+
+    def codes(self, field: str) -> np.ndarray:
+        """Dictionary codes of a categorical field (-1 for null)"""
+        return self._array(f"{field}.codes")
+
+    def vocab(self, field: str) -> List[str]:
+        return self.manifest['funnel_vocab'] if field == 'funnels' else self.manifest['vocab'][field]
+
+    def numeric(self, field: str) -> np.ndarray:
+        """Float column with NaN for null"""
+        return self._array(field)
+
+    def funnel_offsets(self) -> np.ndarray:
+        """Row offsets into the funnel codes; row i owns codes[offsets[i]:offsets[i + 1]]"""
+        return self._array("funnels.offsets")
+
+    def funnels(self, index: int) -> List[str]:
+        offsets = self.funnel_offsets()
+        vocab = self.manifest['funnel_vocab']
+        return [vocab[code] for code in self._array("funnels.codes")[offsets[index]:offsets[index + 1]]]
+
+    def parsed_data(self, index: int) -> Dict:
+        """Rebuild one row's parsed_data dict"""
+        deal = {}
+        for field in CATEGORICAL_FIELDS:
+            code = int(self.codes(field)[index])
+            deal[field] = self.vocab(field)[code] if code >= 0 else None
+        for field in NUMERIC_FIELDS:
+            value = float(self.numeric(field)[index])
+            deal[field] = None if np.isnan(value) else value
+        deal['funnels'] = self.funnels(index)
+        return deal
+
+def load_cache(jsonl_path: str, build: bool = True) -> Optional[CorpusCache]:
+    """Open the cache for a JSONL file, rebuilding it if the source changed"""
+    if not is_fresh(jsonl_path):
+        if not build:
+            return None
+        build_cache(jsonl_path)
+    return CorpusCache(cache_dir_for(jsonl_path))
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Build the columnar cache for a training JSONL file")
+    parser.add_argument("jsonl_path", nargs="?", default="data/training_data.jsonl")
+    parser.add_argument("--force", action="store_true", help="Rebuild even if the cache is fresh")
+    args = parser.parse_args()
+
+    if not Path(args.jsonl_path).exists():
+        print(f"File not found: {args.jsonl_path}")
+        sys.exit(1)
+
+    if args.force or not is_fresh(args.jsonl_path):
+        cache_dir = build_cache(args.jsonl_path)
+        print(f"Built cache at {cache_dir}")
+    else:
+        print(f"Cache at {cache_dir_for(args.jsonl_path)} is up to date")
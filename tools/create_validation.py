@@ -1,8 +1,12 @@
+import argparse
+import hashlib
 import json
-import random
+from collections import defaultdict
+from multiprocessing import Pool
 from pathlib import Path
 import sys
 import os
+from typing import Dict, List, Optional, Set, Tuple
 from rich.progress import Progress, SpinnerColumn, TextColumn, TimeElapsedColumn
 from rich.console import Console
 
@@ -13,9 +17,77 @@ from tools.training_client import TrainingDealParser  # Use local parser instead
 
 console = Console()
 
-def create_validation_set():  # Remove async since TrainingDealParser is sync
+SYSTEM_MESSAGE = "You are a deal parsing assistant. Extract and format deal information according to the specified template."
+
+# Per-process parser
+_parser = None
+
+def _init_worker():
+    global _parser
+    _parser = TrainingDealParser()
+
+def _parse_block(deal: str) -> List[Dict]:
+    return _parser.parse_deals(deal)
+
+def block_hash(block: str) -> str:
+    """Hash of a block, insensitive to surrounding and trailing whitespace"""
+    normalized = '\n'.join(line.rstrip() for line in block.strip().splitlines())
+    return hashlib.sha256(normalized.encode('utf-8')).hexdigest()
+
+def in_validation(digest: str, fraction: float = 0.2) -> bool:
+    """Whether a block's own hash holds it out for validation.
+
+    The hash, read as a number in [0, 1), is compared with the held-out
+    fraction, so this depends only on the block's content: adding,
+    removing or reordering other blocks, rerunning, or changing the parser
+    never changes it.
+    """
+    return int(digest, 16) / 2 ** 256 < fraction
+
+def select_validation(
+    hashes: List[str],
+    strata: List[Optional[Tuple[str, str]]],
+    fraction: float = 0.2
+) -> Set[str]:
+    """Hashes of the blocks held out for validation, stratified by (partner, geo).
+
+    Every block that in_validation() selects is held out. A stratum of at
+    least two blocks that the threshold left without a validation block
+    also gives up its lowest-hash block, so rare partner/geo pairs are
+    still scored. Only these fallback picks depend on other blocks: one can
+    move when a block joins or leaves its stratum, or when a parser change
+    re-stratifies it. Blocks with no stratum (None, unparseable) are never
+    picked as a fallback.
+    """
+    validation = {digest for digest in hashes if in_validation(digest, fraction)}
+
+    by_stratum: Dict[Tuple[str, str], List[str]] = defaultdict(list)
+    for digest, stratum in zip(hashes, strata):
+        if stratum is not None:
+            by_stratum[stratum].append(digest)
+    for blocks in by_stratum.values():
+        if len(blocks) >= 2 and not validation.intersection(blocks):
+            validation.add(min(blocks))
+    return validation
+
+def create_validation_set(
+    input_file: str = 'data/data copy.md',
+    validation_file: str = 'data/validation_data.jsonl',
+    train_file: str = 'data/train_blocks.md',
+    fraction: float = 0.2,
+    workers: int = None
+):
+    """Split deal blocks into training blocks and validation examples.
+
+    Blocks are parsed in parallel for their reference answers and
+    partner/geo strata, the split is drawn by block hash with a fallback
+    pick per stratum, and both outputs are written in one pass in source
+    order. Held-out blocks the parser cannot read go to neither output. The training blocks can be fed to
+    generate_training_data.py --input so no validation block leaks into
+    the augmented training set.
+    """
     console.print("\n[bold cyan]Starting validation set creation...[/]")
-    
+
     try:
         with Progress(
             SpinnerColumn(),
@@ -23,81 +95,98 @@ def create_validation_set():  # Remove async since TrainingDealParser is sync
             TimeElapsedColumn(),
             console=console
         ) as progress:
-            # Initialize parser
-            init_task = progress.add_task("[cyan]Initializing parser...", total=1)
-            parser = TrainingDealParser()
-            progress.update(init_task, completed=1)
-            
             # Read data
             read_task = progress.add_task("[cyan]Reading data file...", total=1)
-            with open('data/data copy.md', 'r') as f:
+            with open(input_file, 'r', encoding='utf-8') as f:
                 content = f.read()
             progress.update(read_task, completed=1)
-            
-            # Split deals
-            deals = [d.strip() for d in content.split('\n\n') if d.strip()]
-            console.print(f"[green]Found {len(deals)} deal blocks[/]")
-            
-            # Shuffle and split
-            random.shuffle(deals)
-            split_idx = int(len(deals) * 0.8)
-            train_deals = deals[:split_idx]
-            val_deals = deals[split_idx:]
-            
-            console.print(f"[green]Split into {len(train_deals)} training and {len(val_deals)} validation deals[/]")
-            
-            # Process validation deals
-            validation_examples = []
-            process_task = progress.add_task(
-                "[cyan]Processing validation deals...", 
-                total=len(val_deals)
-            )
-            
-            for deal in val_deals:
-                # Parse deal using local parser
-                parsed_deals = parser.parse_deals(deal)  # No await needed
-                if parsed_deals:
-                    example = {
-                        "messages": [
-                            {
-                                "role": "system",
-                                "content": "You are a deal parsing assistant. Extract and format deal information according to the specified template."
-                            },
-                            {
-                                "role": "user", 
-                                "content": deal
-                            },
-                            {
-                                "role": "assistant",
-                                "content": json.dumps(parsed_deals[0], ensure_ascii=False)
-                            }
-                        ]
-                    }
-                    validation_examples.append(example)
-                progress.update(process_task, advance=1)
-            
-            # Save validation set
-            save_task = progress.add_task("[cyan]Saving validation set...", total=1)
-            output_path = Path('data/validation_data.jsonl')
-            output_path.parent.mkdir(exist_ok=True)
-            
-            with open(output_path, 'w') as f:
-                for example in validation_examples:
-                    f.write(json.dumps(example) + '\n')
-                    
+
+            # Split deals; identical blocks share a hash and are kept once
+            deals = []
+            hashes = []
+            seen = set()
+            for block in content.split('\n\n'):
+                if not block.strip():
+                    continue
+                digest = block_hash(block)
+                if digest not in seen:
+                    seen.add(digest)
+                    deals.append(block.strip())
+                    hashes.append(digest)
+            console.print(f"[green]Found {len(deals)} distinct deal blocks[/]")
+
+            # Parse every block in parallel for its reference answer
+            parse_task = progress.add_task("[cyan]Parsing deals...", total=len(deals))
+            parsed = []
+            with Pool(processes=workers or os.cpu_count(), initializer=_init_worker) as pool:
+                for parsed_deals in pool.imap(_parse_block, deals, chunksize=16):
+                    parsed.append(parsed_deals)
+                    progress.update(parse_task, advance=1)
+
+            strata = [
+                (
+                    parsed_deals[0]['parsed_data'].get('partner') or '',
+                    parsed_deals[0]['parsed_data'].get('geo') or ''
+                ) if parsed_deals else None
+                for parsed_deals in parsed
+            ]
+            validation = select_validation(hashes, strata, fraction)
+
+            # Write both splits in one pass
+            save_task = progress.add_task("[cyan]Saving splits...", total=1)
+            validation_path = Path(validation_file)
+            train_path = Path(train_file)
+            validation_path.parent.mkdir(exist_ok=True)
+            train_path.parent.mkdir(exist_ok=True)
+
+            train_count = validation_count = skipped = 0
+            with open(validation_path, 'w', encoding='utf-8') as val_out, \
+                    open(train_path, 'w', encoding='utf-8') as train_out:
+                for deal, digest, parsed_deals in zip(deals, hashes, parsed):
+                    if digest in validation and not parsed_deals:
+                        # No reference answer to score against, but training on it would
+                        # leak it once a better parser can read it
+                        skipped += 1
+                    elif digest in validation:
+                        example = {
+                            "messages": [
+                                {"role": "system", "content": SYSTEM_MESSAGE},
+                                {"role": "user", "content": deal},
+                                {"role": "assistant", "content": json.dumps(parsed_deals[0], ensure_ascii=False)}
+                            ]
+                        }
+                        val_out.write(json.dumps(example) + '\n')
+                        validation_count += 1
+                    else:
+                        train_out.write(('\n\n' if train_count else '') + deal)
+                        train_count += 1
+                train_out.write('\n')
+
             progress.update(save_task, completed=1)
-            
-            console.print(f"\n[bold green]✓ Created validation set with {len(validation_examples)} examples[/]")
-            console.print(f"[bold green]✓ Saved to {output_path}[/]")
-            
-            return len(train_deals), len(validation_examples)
-        
+
+            console.print(f"\n[bold green]✓ Created validation set with {validation_count} examples[/]")
+            console.print(f"[bold green]✓ Saved to {validation_path}; {train_count} training blocks in {train_path}[/]")
+            if skipped:
+                console.print(f"[yellow]Left out {skipped} held-out blocks the parser could not read[/]")
+
+            return train_count, validation_count
+
     except FileNotFoundError:
-        console.print("[bold red]Error: Could not find data copy.md[/]")
+        console.print(f"[bold red]Error: Could not find {input_file}[/]")
         return 0, 0
     except Exception as e:
         console.print(f"[bold red]Error creating validation set: {str(e)}[/]")
         return 0, 0
 
 if __name__ == "__main__":
-    train_size, val_size = create_validation_set()  # No asyncio needed
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Create a reproducible train/validation split of deal blocks")
+    parser.add_argument("--input", default="data/data copy.md")
+    parser.add_argument("--validation-file", default="data/validation_data.jsonl")
+    parser.add_argument("--train-file", default="data/train_blocks.md")
+    parser.add_argument("--fraction", type=float, default=0.2, help="Share of blocks held out by hash")
+    parser.add_argument("--workers", type=int, default=None)
+    args = parser.parse_args()
+
+    train_size, val_size = create_validation_set(
+        args.input, args.validation_file, args.train_file, args.fraction, args.workers
+    )
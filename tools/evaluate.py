@@ -0,0 +1,250 @@
+import argparse
+import asyncio
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from pathlib import Path
+from typing import Dict, List, Tuple
+
+import numpy as np
+from rich.console import Console
+from rich.table import Table
+
+# Add project root to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from tools.training_client import TrainingDealParser
+
+console = Console()
+
+BACKENDS = ("rules", "mistral", "finetuned", "bert")
+
+STRING_FIELDS = ['partner', 'language', 'pricing_model']
+SET_FIELDS = ['region', 'geo', 'source', 'funnels']
+NUMERIC_FIELDS = ['cpa', 'crg', 'cpl', 'cr']
+FIELDS = STRING_FIELDS + SET_FIELDS + NUMERIC_FIELDS
+
+def load_examples(path: str) -> Tuple[List[str], List[Dict]]:
+    """Read (user text, expected deal) pairs from chat-format JSONL"""
+    texts, expected = [], []
+    with open(path, 'r', encoding='utf-8') as f:
+        for line in f:
+            if not line.strip():
+                continue
+            messages = {m['role']: m['content'] for m in json.loads(line)['messages']}
+            texts.append(messages['user'])
+            expected.append(json.loads(messages['assistant']))
+    return texts, expected
+
+def create_parser(backend: str):
+    """Create a parser by backend name; 'rules' is the local regex parser"""
+    if backend == "rules":
+        return TrainingDealParser()
+    from core.backends import create_deal_parser
+    return create_deal_parser(backend)
+
+# Per-process parser for the rules backend
+_worker_parser = None
+
+def _init_rules_worker():
+    global _worker_parser
+    _worker_parser = TrainingDealParser()
+
+def _parse_in_worker(text: str) -> Tuple[List[Dict], float]:
+    start = time.perf_counter()
+    try:
+        deals = _worker_parser.parse_deals(text)
+    except Exception as e:
+        console.print(f"[red]Parser error: {str(e)}[/]")
+        deals = []
+    return deals, time.perf_counter() - start
+
+def _timed_sync(parser, text: str) -> Tuple[List[Dict], float]:
+    start = time.perf_counter()
+    try:
+        deals = parser.parse_deals(text)
+    except Exception as e:
+        console.print(f"[red]Parser error: {str(e)}[/]")
+        deals = []
+    return deals, time.perf_counter() - start
+
+async def _run_async(parser, texts: List[str], workers: int) -> List[Tuple[List[Dict], float]]:
+    semaphore = asyncio.Semaphore(workers)
+
+    async def run(text: str):
+        async with semaphore:
+            start = time.perf_counter()
+            try:
+                deals = await parser.parse_deals(text)
+            except Exception as e:
+                console.print(f"[red]Parser error: {str(e)}[/]")
+                deals = []
+            return deals, time.perf_counter() - start
+
+    return await asyncio.gather(*(run(text) for text in texts))
+
+def run_parser(backend: str, texts: List[str], workers: int = 4, parser=None) -> Tuple[List[List[Dict]], np.ndarray, float]:
+    """Parse every text with a pool of workers.
+
+    The regex parser is CPU-bound and runs in a process pool; async
+    backends run concurrently on the event loop; other sync parsers use
+    threads. Returns predictions, per-example latencies and wall time.
+    """
+    start = time.perf_counter()
+
+    if parser is None and backend == "rules":
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_rules_worker) as pool:
+            chunksize = max(1, len(texts) // (workers * 4))
+            results = list(pool.map(_parse_in_worker, texts, chunksize=chunksize))
+    else:
+        parser = parser or create_parser(backend)
+        if asyncio.iscoroutinefunction(parser.parse_deals):
+            results = asyncio.run(_run_async(parser, texts, workers))
+        else:
+            with ThreadPoolExecutor(max_workers=workers) as pool:
+                results = list(pool.map(lambda text: _timed_sync(parser, text), texts))
+
+    wall_time = time.perf_counter() - start
+    predictions = [deals or [] for deals, _ in results]
+    latencies = np.array([elapsed for _, elapsed in results], dtype=np.float64)
+    return predictions, latencies, wall_time
+
+def _select_prediction(expected: Dict, deals: List[Dict]) -> Dict:
+    """Match the predicted deal covering the expected raw text, else the first one"""
+    for deal in deals:
+        if isinstance(deal, dict) and deal.get('raw_text') == expected.get('raw_text'):
+            return deal.get('parsed_data', deal)
+    if deals and isinstance(deals[0], dict):
+        return deals[0].get('parsed_data', deals[0])
+    return {}
+
+def _normalize(field: str, value) -> str:
+    """Canonical string form so string and set fields compare with one vector op"""
+    if value is None:
+        return ''
+    if field == 'funnels':
+        items = value if isinstance(value, list) else str(value).split('|')
+        return '|'.join(sorted(str(v).strip().lower() for v in items))
+    if field in SET_FIELDS:
+        return '|'.join(sorted(p.strip().lower() for p in str(value).split('|')))
+    return str(value).strip().lower()
+
+def _to_float(value) -> float:
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return np.nan
+
+def score(expected: List[Dict], predictions: List[List[Dict]], tolerance: float = 0.01) -> Dict:
+    """Per-field accuracy computed column-wise over the whole set"""
+    gold = [e.get('parsed_data', e) for e in expected]
+    pred = [_select_prediction(e, p) for e, p in zip(expected, predictions)]
+    n = len(gold)
+
+    field_accuracy = {}
+    numeric_metrics = {}
+
+    for field in STRING_FIELDS + SET_FIELDS:
+        gold_col = np.array([_normalize(field, g.get(field)) for g in gold], dtype=object)
+        pred_col = np.array([_normalize(field, p.get(field)) for p in pred], dtype=object)
+        field_accuracy[field] = float(np.mean(gold_col == pred_col)) if n else 0.0
+
+    for field in NUMERIC_FIELDS:
+        gold_col = np.array([_to_float(g.get(field)) for g in gold], dtype=np.float64)
+        pred_col = np.array([_to_float(p.get(field)) for p in pred], dtype=np.float64)
+        gold_nan, pred_nan = np.isnan(gold_col), np.isnan(pred_col)
+        both = ~gold_nan & ~pred_nan
+
+        exact = (gold_nan & pred_nan) | (both & np.isclose(gold_col, pred_col, rtol=1e-9, atol=1e-9))
+        within = (gold_nan & pred_nan) | (both & np.isclose(gold_col, pred_col, rtol=tolerance, atol=0.0))
+        errors = np.abs(gold_col[both] - pred_col[both])
+
+        field_accuracy[field] = float(np.mean(exact)) if n else 0.0
+        numeric_metrics[field] = {
+            'within_tolerance': float(np.mean(within)) if n else 0.0,
+            'mean_abs_error': float(errors.mean()) if errors.size else 0.0,
+            'missing_rate': float(np.mean(~gold_nan & pred_nan)) if n else 0.0,
+            'spurious_rate': float(np.mean(gold_nan & ~pred_nan)) if n else 0.0
+        }
+
+    all_correct = np.mean(list(field_accuracy.values())) if field_accuracy else 0.0
+    return {
+        'examples': n,
+        'field_accuracy': field_accuracy,
+        'numeric': numeric_metrics,
+        'mean_accuracy': float(all_correct)
+    }
+
+def evaluate(
+    backend: str,
+    validation_data: str = "data/validation_data.jsonl",
+    workers: int = 4,
+    tolerance: float = 0.01,
+    parser=None
+) -> Dict:
+    """Run one backend over the validation set and report accuracy and speed"""
+    texts, expected = load_examples(validation_data)
+    predictions, latencies, wall_time = run_parser(backend, texts, workers, parser)
+
+    report = score(expected, predictions, tolerance)
+    report.update({
+        'backend': backend,
+        'workers': workers,
+        'wall_time_s': wall_time,
+        'throughput_per_s': len(texts) / wall_time if wall_time else 0.0,
+        'latency_ms_p50': float(np.percentile(latencies, 50) * 1000) if latencies.size else 0.0,
+        'latency_ms_p95': float(np.percentile(latencies, 95) * 1000) if latencies.size else 0.0,
+        'latency_ms_mean': float(latencies.mean() * 1000) if latencies.size else 0.0
+    })
+    return report
+
+def print_report(reports: Dict[str, Dict], title: str = "Evaluation report"):
+    """Print accuracy and speed side by side for every evaluated backend"""
+    table = Table(title=title)
+    table.add_column("Metric")
+    for name in reports:
+        table.add_column(name, justify="right")
+
+    for field in FIELDS:
+        table.add_row(field, *(f"{r['field_accuracy'][field]:.1%}" for r in reports.values()))
+    for field in NUMERIC_FIELDS:
+        table.add_row(
+            f"{field} ±tol",
+            *(f"{r['numeric'][field]['within_tolerance']:.1%}" for r in reports.values())
+        )
+    table.add_row("[bold]mean accuracy", *(f"[bold]{r['mean_accuracy']:.1%}" for r in reports.values()))
+    table.add_row("p50 latency (ms)", *(f"{r['latency_ms_p50']:.1f}" for r in reports.values()))
+    table.add_row("p95 latency (ms)", *(f"{r['latency_ms_p95']:.1f}" for r in reports.values()))
+    table.add_row("throughput (/s)", *(f"{r['throughput_per_s']:.1f}" for r in reports.values()))
+    console.print(table)
+
+def main():
+    parser = argparse.ArgumentParser(description="Score parser backends against the validation set")
+    parser.add_argument("--backend", choices=BACKENDS, action="append",
+                        help="Backend to evaluate; repeat for several (default: rules)")
+    parser.add_argument("--validation-data", default="data/validation_data.jsonl")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 4)
+    parser.add_argument("--tolerance", type=float, default=0.01, help="Relative tolerance for numeric fields")
+    parser.add_argument("--json", dest="json_output", help="Also write the report to this file")
+    args = parser.parse_args()
+
+    if not Path(args.validation_data).exists():
+        console.print(f"[bold red]Error: Could not find {args.validation_data}[/]")
+        sys.exit(1)
+
+    reports = {}
+    for backend in args.backend or ["rules"]:
+        console.print(f"[cyan]Evaluating {backend}...[/]")
+        reports[backend] = evaluate(backend, args.validation_data, args.workers, args.tolerance)
+
+    print_report(reports)
+
+    if args.json_output:
+        with open(args.json_output, 'w', encoding='utf-8') as f:
+            json.dump(reports, f, indent=2)
+        console.print(f"[bold green]✓ Saved report to {args.json_output}[/]")
+
+if __name__ == "__main__":
+    main()
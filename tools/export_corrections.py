@@ -0,0 +1,90 @@
+import argparse
+import json
+import logging
+import os
+import sys
+from pathlib import Path
+from typing import Dict, Iterator
+
+# Add project root to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from core.corrections import load_corrections
+from core.prompts import SYSTEM_PROMPT
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+def correction_example(raw_text: str, parsed_data: Dict) -> str:
+    """One training line in the training_data.jsonl chat format"""
+    return json.dumps({
+        "messages": [
+            {"role": "system", "content": SYSTEM_PROMPT},
+            {"role": "user", "content": raw_text},
+            {
+                "role": "assistant",
+                "content": json.dumps({"raw_text": raw_text, "parsed_data": parsed_data}, ensure_ascii=False)
+            }
+        ]
+    }, ensure_ascii=False)
+
+def repeats(delta: Dict, field_weight: float, max_repeats: int) -> int:
+    """Copies of a corrected example; the more fields the model got wrong, the more copies"""
+    return max(1, min(max_repeats, 1 + round(field_weight * len(delta))))
+
+def _labelled_text(line: str) -> str:
+    """raw_text the assistant message of a training line was labelled for"""
+    try:
+        messages = json.loads(line)["messages"]
+        return json.loads(messages[-1]["content"]).get("raw_text", "").strip()
+    except (ValueError, KeyError, IndexError, AttributeError):
+        return ""
+
+def merged_lines(base: Path, corrections: Dict[str, Dict], field_weight: float, max_repeats: int) -> Iterator[str]:
+    """Base examples minus the ones a correction supersedes, then the weighted corrections"""
+    corrected_texts = {raw_text.strip() for raw_text in corrections}
+    if base.exists():
+        with open(base, 'r', encoding='utf-8') as f:
+            for line in f:
+                if line.strip() and _labelled_text(line) not in corrected_texts:
+                    yield line.rstrip('\n')
+
+    for raw_text, correction in corrections.items():
+        example = correction_example(raw_text, correction["corrected"])
+        for _ in range(repeats(correction["delta"], field_weight, max_repeats)):
+            yield example
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Merge the correction log into training data, weighted toward corrected fields"
+    )
+    parser.add_argument("--log", default="data/corrections.jsonl")
+    parser.add_argument("--base", default="data/training_data.jsonl",
+                        help="Generated training data to merge the corrections into")
+    parser.add_argument("--output", default="data/training_corrected.jsonl",
+                        help="Merged dataset, for finetune.py --training-data")
+    parser.add_argument("--field-weight", type=float, default=1.0,
+                        help="Extra copies of a corrected example per corrected field")
+    parser.add_argument("--max-repeats", type=int, default=5)
+    args = parser.parse_args()
+
+    corrections = load_corrections(Path(args.log))
+    output = Path(args.output)
+    tmp_path = output.with_name(output.name + '.tmp')
+    count = 0
+    with open(tmp_path, 'w', encoding='utf-8') as out:
+        for line in merged_lines(Path(args.base), corrections, args.field_weight, args.max_repeats):
+            out.write(line + '\n')
+            count += 1
+    os.replace(tmp_path, output)
+
+    fields: Dict[str, int] = {}
+    for correction in corrections.values():
+        for field in correction["delta"]:
+            fields[field] = fields.get(field, 0) + 1
+    logger.info(f"Wrote {count} examples to {output} with {len(corrections)} corrected deals")
+    if fields:
+        logger.info("Corrected fields: " + ", ".join(f"{f}={n}" for f, n in sorted(fields.items(), key=lambda x: -x[1])))
+
+if __name__ == "__main__":
+    main()
@@ -3,6 +3,7 @@ from transformers import (
     AutoTokenizer,
     TrainingArguments
 )
+from transformers.trainer_utils import get_last_checkpoint
 from trl import SFTTrainer
 from datasets import load_dataset
 import torch
@@ -16,19 +17,68 @@ from rich.progress import (
     MofNCompleteColumn
 )
 from rich.console import Console
+import argparse
 import time
 import os
 
 os.environ["PYTORCH_MPS_HIGH_WATERMARK_RATIO"] = "0.0"
 
+BASE_MODEL = "mistralai/Mistral-7B-Instruct-v0.3"
+MODES = ("full", "lora", "qlora")
+
+def _select_device() -> str:
+    """Pick the best available accelerator, falling back to CPU"""
+    if torch.cuda.is_available():
+        return "cuda"
+    if torch.backends.mps.is_available():
+        return "mps"
+    return "cpu"
+
+def _use_bf16(device: str) -> bool:
+    """bf16 halves weight and activation memory where the hardware handles it"""
+    if device == "cuda":
+        return torch.cuda.is_bf16_supported()
+    # CPU kernels support bf16; MPS support is incomplete so stay in fp32 there
+    return device == "cpu"
+
+def _accumulation_steps(token_budget: int, batch_size: int, max_seq_length: int) -> int:
+    """Gradient accumulation steps so each optimizer step sees ~token_budget tokens.
+
+    With packing every sequence is filled to max_seq_length, so tokens per
+    micro-batch are batch_size * max_seq_length.
+    """
+    return max(1, token_budget // (batch_size * max_seq_length))
+
 def train(
     training_data="data/training_data.jsonl",
     output_dir="models/deal-parser-v1",
-    epochs=3
+    epochs=3,
+    mode="full",
+    lora_rank=16,
+    lora_alpha=32,
+    max_seq_length=2048,
+    batch_size=1,
+    token_budget=16384,
+    save_steps=200,
+    resume=False
 ):
     console = Console()
     console.print("\n[bold cyan]Starting training...[/]")
-    
+
+    if mode not in MODES:
+        raise ValueError(f"Unknown mode '{mode}'. Must be one of: {', '.join(MODES)}")
+
+    device = _select_device()
+    if mode == "qlora" and device != "cuda":
+        # bitsandbytes 4-bit kernels are CUDA-only
+        console.print("[yellow]QLoRA needs CUDA, falling back to LoRA[/]")
+        mode = "lora"
+
+    parameter_efficient = mode in ("lora", "qlora")
+    bf16 = parameter_efficient and _use_bf16(device)
+    dtype = torch.bfloat16 if bf16 else torch.float32
+    console.print(f"[green]Mode: {mode}, device: {device}, dtype: {dtype}[/]")
+
     with Progress(
         SpinnerColumn(),
         TextColumn("[progress.description]{task.description}"),
@@ -37,68 +87,147 @@ def train(
         TimeRemainingColumn(),
         console=console
     ) as progress:
-        
+
         # Load tokenizer
         load_task = progress.add_task("[cyan]Loading model...", total=1)
         tokenizer = AutoTokenizer.from_pretrained(
-            "mistralai/Mistral-7B-Instruct-v0.3",
+            BASE_MODEL,
             padding_side="right"
         )
         tokenizer.pad_token = tokenizer.eos_token
-        
+
         # Load model
-        model = AutoModelForCausalLM.from_pretrained(
-            "mistralai/Mistral-7B-Instruct-v0.3",
-            device_map="mps",
-            torch_dtype=torch.float32,
-            low_cpu_mem_usage=True
-        )
+        model_kwargs = {
+            "torch_dtype": dtype,
+            "low_cpu_mem_usage": True
+        }
+        if mode == "qlora":
+            from transformers import BitsAndBytesConfig
+            model_kwargs["quantization_config"] = BitsAndBytesConfig(
+                load_in_4bit=True,
+                bnb_4bit_quant_type="nf4",
+                bnb_4bit_use_double_quant=True,
+                bnb_4bit_compute_dtype=dtype
+            )
+        if device != "cpu":
+            model_kwargs["device_map"] = device
+
+        model = AutoModelForCausalLM.from_pretrained(BASE_MODEL, **model_kwargs)
+
+        peft_config = None
+        if parameter_efficient:
+            from peft import LoraConfig, prepare_model_for_kbit_training
+            if mode == "qlora":
+                model = prepare_model_for_kbit_training(model)
+            peft_config = LoraConfig(
+                r=lora_rank,
+                lora_alpha=lora_alpha,
+                lora_dropout=0.05,
+                target_modules=["q_proj", "k_proj", "v_proj", "o_proj"],
+                bias="none",
+                task_type="CAUSAL_LM"
+            )
         progress.update(load_task, completed=1)
-        
+
         # Load dataset
         data_task = progress.add_task("[cyan]Loading dataset...", total=1)
-        dataset = load_dataset('json', data_files=training_data)
+        dataset = load_dataset('json', data_files=training_data)["train"]
         progress.update(data_task, completed=1)
-        
+
         # Setup training
         setup_task = progress.add_task("[cyan]Setting up training...", total=1)
-        
+
+        # Deal examples are short; packing fills each sequence with several
+        if parameter_efficient:
+            accumulation_steps = _accumulation_steps(token_budget, batch_size, max_seq_length)
+        else:
+            accumulation_steps = 8
+
         training_args = TrainingArguments(
             output_dir=output_dir,
             num_train_epochs=epochs,
-            per_device_train_batch_size=1,
-            gradient_accumulation_steps=8,
-            learning_rate=1e-4,
+            per_device_train_batch_size=batch_size,
+            gradient_accumulation_steps=accumulation_steps,
+            learning_rate=2e-4 if parameter_efficient else 1e-4,
             logging_steps=1,
-            save_strategy="epoch",
+            save_strategy="steps" if parameter_efficient else "epoch",
+            save_steps=save_steps,
+            # Frequent adapter checkpoints are pruned; full mode keeps every epoch as before
+            save_total_limit=2 if parameter_efficient else None,
             optim="adamw_torch",
             gradient_checkpointing=True,
+            bf16=bf16,
             fp16=False,
+            use_cpu=device == "cpu",
             report_to="none"
         )
-        
+
         # Initialize SFTTrainer
         trainer = SFTTrainer(
             model=model,
-            train_dataset=dataset["train"],
+            train_dataset=dataset,
             tokenizer=tokenizer,
             args=training_args,
-            max_seq_length=2048,
+            max_seq_length=max_seq_length,
             dataset_text_field="messages",  # Our data format
-            packing=False  # Don't pack sequences
+            packing=parameter_efficient,
+            peft_config=peft_config
         )
         progress.update(setup_task, completed=1)
-        
-        # Train
-        trainer.train()
-        
-        # Save
-        model.save_pretrained(output_dir)
+
+    if parameter_efficient:
+        trainer.model.print_trainable_parameters()
+        console.print(
+            f"[green]{accumulation_steps} accumulation steps × {batch_size} × "
+            f"{max_seq_length} tokens per optimizer step[/]"
+        )
+
+    # Resume from the newest checkpoint if asked and one exists
+    checkpoint = None
+    if resume and Path(output_dir).exists():
+        checkpoint = get_last_checkpoint(output_dir)
+        if checkpoint:
+            console.print(f"[green]Resuming from {checkpoint}[/]")
+
+    # Train
+    trainer.train(resume_from_checkpoint=checkpoint)
+
+    # Save (adapter weights only in LoRA modes)
+    trainer.model.save_pretrained(output_dir)
+    tokenizer.save_pretrained(output_dir)
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Fine-tune the deal parser model")
+    parser.add_argument("--training-data", default="data/training_data.jsonl")
+    parser.add_argument("--output-dir", default="models/deal-parser-v1")
+    parser.add_argument("--epochs", type=int, default=3)
+    parser.add_argument("--mode", choices=MODES, default="full",
+                        help="full fine-tune, or LoRA adapters (qlora adds 4-bit base weights on CUDA)")
+    parser.add_argument("--lora-rank", type=int, default=16)
+    parser.add_argument("--lora-alpha", type=int, default=32)
+    parser.add_argument("--max-seq-length", type=int, default=2048)
+    parser.add_argument("--batch-size", type=int, default=1)
+    parser.add_argument("--token-budget", type=int, default=16384,
+                        help="Tokens per optimizer step; sets gradient accumulation in LoRA modes")
+    parser.add_argument("--save-steps", type=int, default=200)
+    parser.add_argument("--resume", action="store_true", help="Continue from the last checkpoint in output-dir")
+    args = parser.parse_args()
+
     console = Console()
     console.print("\n🚀 Starting fine-tuning process...")
     start_time = time.time()
-    train()
+    train(
+        training_data=args.training_data,
+        output_dir=args.output_dir,
+        epochs=args.epochs,
+        mode=args.mode,
+        lora_rank=args.lora_rank,
+        lora_alpha=args.lora_alpha,
+        max_seq_length=args.max_seq_length,
+        batch_size=args.batch_size,
+        token_budget=args.token_budget,
+        save_steps=args.save_steps,
+        resume=args.resume
+    )
     duration = time.time() - start_time
-    console.print(f"\n✨ Fine-tuning completed in {duration:.2f} seconds")
\ No newline at end of file
+    console.print(f"\n✨ Fine-tuning completed in {duration:.2f} seconds")
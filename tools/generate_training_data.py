@@ -1,7 +1,12 @@
 import json
+import hashlib
+import inspect
+import os
 from pathlib import Path
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional, Tuple
 from training_client import TrainingDealParser
+import core.geo
+from augmentation import Augmenter
 import logging
 from rich.progress import Progress, SpinnerColumn, TextColumn, BarColumn, TimeElapsedColumn
 from rich.console import Console
@@ -10,71 +15,46 @@ logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 console = Console()
 
+MANIFEST_VERSION = 2
+
+def block_fingerprint(block: str) -> str:
+    """Fingerprint of a source block, insensitive to trailing whitespace"""
+    normalized = '\n'.join(line.rstrip() for line in block.strip().splitlines())
+    return hashlib.sha256(normalized.encode('utf-8')).hexdigest()
+
+def manifest_path_for(output_file: str) -> Path:
+    path = Path(output_file)
+    return path.with_name(path.stem + '.manifest.json')
+
 class TrainingDataGenerator:
-    def __init__(self):
+    def __init__(self, augmenter: Optional[Augmenter] = None):
         self.parser = TrainingDealParser()
+        self.augmenter = augmenter or Augmenter()
+        self.rules_version = self._rules_version()
+
+    def _rules_version(self) -> str:
+        """Version of everything that turns a block into examples.
+
+        Changing the parser, the GEO table it resolves codes with, the
+        example layout or any variation rule or sampling setting changes
+        this, which invalidates every cached block.
+        """
+        digest = hashlib.sha256()
+        for source in (
+            inspect.getsource(TrainingDealParser),
+            inspect.getsource(core.geo),
+            inspect.getsource(TrainingDataGenerator.expand_block),
+            self.augmenter.fingerprint
+        ):
+            digest.update(source.encode('utf-8'))
+        return digest.hexdigest()[:16]
         
-    def generate_variations(self, deal_text: str) -> List[str]:
-        """Generate variations of deal text"""
-        variations = []
-        
-        # Original format
-        variations.append(deal_text)
-        
-        # Remove emojis and special characters
-        no_emoji = deal_text.encode('ascii', 'ignore').decode()
-        variations.append(no_emoji)
-        
-        # Price format variations
-        variations.extend([
-            deal_text.replace("+", " + "),
-            deal_text.replace("$", ""),
-            deal_text.replace("$", "USD "),
-            deal_text.replace("%", " percent"),
-            deal_text.replace("PRICE:", "Price:"),
-            deal_text.replace("PRICE:", "price:"),
-            deal_text.replace("CPA:", "Price:"),
-            deal_text.replace("CPL:", "Price:")
-        ])
-        
-        # Source format variations
-        variations.extend([
-            deal_text.replace("fb", "Facebook"),
-            deal_text.replace("FB", "facebook"),
-            deal_text.replace("FB Traffic", "Facebook"),
-            deal_text.replace("ggl", "Google"),
-            deal_text.replace("GG", "Google"),
-            deal_text.replace("search.display", "Google Display")
-        ])
-        
-        # Funnel format variations
-        if "Funnel:" in deal_text:
-            variations.extend([
-                deal_text.replace("Funnel:", "Funnels:"),
-                deal_text.replace("Funnel:", "funnel:"),
-                deal_text.replace("Funnel:", "Landing Page:")
-            ])
-            
-        # CR format variations
-        if "CR:" in deal_text:
-            variations.extend([
-                deal_text.replace("CR:", "cr:"),
-                deal_text.replace("CR:", "Conversion Rate:"),
-                deal_text.replace("-", " to ")  # For ranges like 8-10%
-            ])
-            
-        # Partner/Company variations
-        variations.extend([
-            deal_text.replace("Company:", "Partner:"),
-            deal_text.replace("Partner:", "Company:")
-        ])
-        
-        # Remove duplicates while preserving order
-        seen = set()
-        return [x for x in variations if not (x in seen or seen.add(x))]
+    def generate_variations(self, deal_text: str) -> List[Tuple[str, Tuple[str, ...]]]:
+        """Generate variations of deal text with the rules that produced each"""
+        return self.augmenter.variations(deal_text)
 
-    def create_training_example(self, deal_text: str) -> List[Dict]:
-        """Create training examples from deal text"""
+    def expand_block(self, deal_text: str) -> List[Tuple[Dict, Tuple[str, ...]]]:
+        """Create training examples from deal text, paired with their variation rules"""
         try:
             # Parse original deal
             parsed_deals = self.parser.parse_deals(deal_text)
@@ -86,7 +66,7 @@ class TrainingDataGenerator:
             
             # Create examples
             examples = []
-            for variation in variations:
+            for variation, rules in variations:
                 for parsed_deal in parsed_deals:
                     example = {
                         "messages": [
@@ -104,7 +84,7 @@ class TrainingDataGenerator:
                             }
                         ]
                     }
-                    examples.append(example)
+                    examples.append((example, rules))
                     
             return examples
             
@@ -112,8 +92,32 @@ class TrainingDataGenerator:
             logger.error(f"Error processing deal: {str(e)}")
             return []
 
-    def process_data_file(self, input_file: str, output_file: str):
-        """Process data file and create training dataset"""
+    def create_training_example(self, deal_text: str) -> List[Dict]:
+        """Create training examples from deal text"""
+        return [example for example, _ in self.expand_block(deal_text)]
+
+    def _load_manifest(self, output_file: str) -> Optional[Dict]:
+        """Load the previous manifest if it still describes the output file"""
+        manifest_path = manifest_path_for(output_file)
+        if not manifest_path.exists() or not Path(output_file).exists():
+            return None
+        with open(manifest_path, 'r', encoding='utf-8') as f:
+            manifest = json.load(f)
+        if manifest.get('version') != MANIFEST_VERSION:
+            return None
+        # A hand-edited output can no longer be spliced safely
+        if os.path.getsize(output_file) != manifest.get('output_size'):
+            return None
+        return manifest
+
+    def process_data_file(self, input_file: str, output_file: str, incremental: bool = True):
+        """Process data file and create training dataset.
+
+        In incremental mode each block's examples are recorded in a
+        manifest by block fingerprint and rules version. Unchanged blocks
+        are copied byte-for-byte from the previous output; only new or
+        changed blocks are parsed and expanded again.
+        """
         with Progress(
             SpinnerColumn(),
             TextColumn("[progress.description]{task.description}"),
@@ -136,36 +140,103 @@ class TrainingDataGenerator:
                 f"[cyan]Processing {total_deals} deals...", 
                 total=total_deals
             )
-            
-            # Generate training examples
-            all_examples = []
-            for i, deal in enumerate(deals, 1):
-                progress.update(main_task, description=f"[cyan]Deal {i}/{total_deals}")
-                examples = self.create_training_example(deal)
-                all_examples.extend(examples)
-                progress.advance(main_task)
-                
-            # Save progress
-            progress.update(main_task, description="[green]Saving examples...")
-            
-            # Save as JSONL
+
+            # Previous segments reusable under the current rules
+            previous = {}
+            manifest = self._load_manifest(output_file) if incremental else None
+            if manifest:
+                previous = {
+                    block['hash']: block
+                    for block in manifest['blocks']
+                    if block['rules_version'] == self.rules_version
+                }
+
             output_path = Path(output_file)
             output_path.parent.mkdir(exist_ok=True)
-            
-            with open(output_path, 'w', encoding='utf-8') as f:
-                for example in all_examples:
-                    f.write(json.dumps(example, ensure_ascii=False) + '\n')
+            tmp_path = output_path.with_name(output_path.name + '.tmp')
+
+            blocks = []
+            reused = regenerated = total_examples = 0
+            old_output = open(output_path, 'rb') if previous else None
+            try:
+                with open(tmp_path, 'wb') as out:
+                    for i, deal in enumerate(deals, 1):
+                        progress.update(main_task, description=f"[cyan]Deal {i}/{total_deals}")
+                        fingerprint = block_fingerprint(deal)
+                        start = out.tell()
+
+                        segment = previous.get(fingerprint)
+                        if segment:
+                            # Splice the unchanged block's examples from the old output
+                            old_output.seek(segment['start'])
+                            out.write(old_output.read(segment['length']))
+                            examples = segment['examples']
+                            rules = segment['rules']
+                            reused += 1
+                        else:
+                            expanded = self.expand_block(deal)
+                            out.write(''.join(
+                                json.dumps(example, ensure_ascii=False) + '\n'
+                                for example, _ in expanded
+                            ).encode('utf-8'))
+                            examples = len(expanded)
+                            rules = [list(names) for _, names in expanded]
+                            regenerated += 1
+
+                        blocks.append({
+                            'hash': fingerprint,
+                            'rules_version': self.rules_version,
+                            'start': start,
+                            'length': out.tell() - start,
+                            'examples': examples,
+                            # Variation rules behind each example line, in order
+                            'rules': rules
+                        })
+                        total_examples += examples
+                        progress.advance(main_task)
+            finally:
+                if old_output:
+                    old_output.close()
+
+            # Save progress
+            progress.update(main_task, description="[green]Saving examples...")
+            os.replace(tmp_path, output_path)
+
+            with open(manifest_path_for(output_file), 'w', encoding='utf-8') as f:
+                json.dump({
+                    'version': MANIFEST_VERSION,
+                    'source': input_file,
+                    'output_size': os.path.getsize(output_path),
+                    'blocks': blocks
+                }, f)
                     
-            progress.update(main_task, description=f"[green]Done! Generated {len(all_examples)} examples")
+            progress.update(
+                main_task,
+                description=(
+                    f"[green]Done! Generated {total_examples} examples "
+                    f"({regenerated} blocks regenerated, {reused} reused)"
+                )
+            )
 
 def main():
-    generator = TrainingDataGenerator()
-    
-    # Process data copy.md
-    generator.process_data_file(
-        'data/data copy.md',
-        'data/training_data.jsonl'
-    )
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Generate training examples from deal blocks")
+    parser.add_argument("--input", default="data/train_blocks.md",
+                        help="Training blocks from create_validation.py")
+    parser.add_argument("--output", default="data/training_data.jsonl")
+    parser.add_argument("--full", action="store_true", help="Ignore the manifest and rebuild every block")
+    parser.add_argument("--max-variations", type=int, default=24, help="Variations per block, original included")
+    parser.add_argument("--max-rules", type=int, default=3, help="Rules combined into one variation")
+    parser.add_argument("--seed", type=int, default=0, help="Seed for sampling rule combinations")
+    args = parser.parse_args()
+
+    generator = TrainingDataGenerator(Augmenter(
+        max_variations=args.max_variations,
+        max_rules_per_variation=args.max_rules,
+        seed=args.seed
+    ))
+    generator.process_data_file(args.input, args.output, incremental=not args.full)
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
@@ -0,0 +1,72 @@
+import argparse
+import random
+import uuid
+
+from aiohttp import web
+
+class NotionStub:
+    """Minimal stand-in for the Notion pages and database query endpoints.
+
+    Pages are kept in memory and indexed by their "Deal Hash" property.
+    A fraction of requests can be failed with 429 or 503 to exercise the
+    exporter's retry path. Point the bot at it with
+    NOTION_BASE_URL=http://localhost:8765.
+    """
+
+    def __init__(self, failure_rate: float = 0.0, retry_after: float = 1.0):
+        self.failure_rate = failure_rate
+        self.retry_after = retry_after
+        self.pages = {}
+        self.by_key = {}
+
+    def _maybe_fail(self):
+        if random.random() < self.failure_rate:
+            if random.random() < 0.5:
+                raise web.HTTPTooManyRequests(headers={"Retry-After": str(self.retry_after)})
+            raise web.HTTPServiceUnavailable()
+
+    @staticmethod
+    def _deal_hash(properties: dict) -> str:
+        parts = properties.get("Deal Hash", {}).get("rich_text") or []
+        return parts[0]["text"]["content"] if parts else ''
+
+    async def create_page(self, request: web.Request) -> web.Response:
+        self._maybe_fail()
+        key = request.headers.get("Idempotency-Key")
+        if key and key in self.by_key:
+            return web.json_response(self.pages[self.by_key[key]])
+
+        body = await request.json()
+        page = {"object": "page", "id": str(uuid.uuid4()), "properties": body.get("properties", {})}
+        self.pages[page["id"]] = page
+        if key:
+            self.by_key[key] = page["id"]
+        return web.json_response(page)
+
+    async def query_database(self, request: web.Request) -> web.Response:
+        self._maybe_fail()
+        body = await request.json()
+        wanted = body.get("filter", {}).get("rich_text", {}).get("equals")
+        results = [
+            page for page in self.pages.values()
+            if wanted is None or self._deal_hash(page["properties"]) == wanted
+        ]
+        return web.json_response({"object": "list", "results": results[:body.get("page_size", 100)]})
+
+    async def list_pages(self, request: web.Request) -> web.Response:
+        return web.json_response(list(self.pages.values()))
+
+    def app(self) -> web.Application:
+        app = web.Application()
+        app.router.add_post("/v1/pages", self.create_page)
+        app.router.add_post("/v1/databases/{database_id}/query", self.query_database)
+        app.router.add_get("/pages", self.list_pages)
+        return app
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run a local Notion API stub for export testing")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--failure-rate", type=float, default=0.0, help="Share of requests answered with 429/503")
+    args = parser.parse_args()
+
+    web.run_app(NotionStub(args.failure_rate).app(), port=args.port)
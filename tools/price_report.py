@@ -0,0 +1,59 @@
+import argparse
+import os
+import sys
+import time
+from pathlib import Path
+
+from rich.console import Console
+from rich.table import Table
+
+# Add project root to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from core.analytics import BUCKETS, DIMENSIONS, METRICS, PriceAnalytics
+
+def main():
+    parser = argparse.ArgumentParser(description="Time-bucketed price statistics from deals.db")
+    parser.add_argument("--db", default="data/deals.db")
+    parser.add_argument("--metric", choices=METRICS, default="cpa")
+    for dimension in DIMENSIONS:
+        parser.add_argument(f"--{dimension}", help=f"Only deals with this {dimension}")
+    parser.add_argument("--model", help="Only deals with this pricing model, e.g. CPA/CRG")
+    parser.add_argument("--group-by", choices=DIMENSIONS)
+    parser.add_argument("--bucket", choices=BUCKETS, default="week")
+    parser.add_argument("--days", type=int, default=90)
+    parser.add_argument("--fast", action="store_true",
+                        help="Mean/stddev from the rollups only (at most one filter or --group-by)")
+    args = parser.parse_args()
+
+    filters = {d: getattr(args, d) for d in DIMENSIONS if getattr(args, d)}
+    analytics = PriceAnalytics(Path(args.db))
+    start = time.perf_counter()
+
+    if args.fast:
+        if len(filters) + bool(args.group_by) > 1:
+            parser.error("--fast supports one filter or one --group-by")
+        dimension, value = next(iter(filters.items()), (args.group_by or 'all', None))
+        rows = analytics.summary(args.metric, dimension, value, args.model, args.bucket, args.days)
+        columns = ('bucket', 'group', 'n', 'mean', 'std', 'min', 'max')
+    else:
+        rows = analytics.distribution(args.metric, filters, args.group_by, args.model, args.bucket, args.days)
+        columns = ('bucket', 'group', 'n', 'p25', 'p50', 'p75', 'mean', 'min', 'max')
+
+    elapsed = (time.perf_counter() - start) * 1000
+    title = f"{args.metric.upper()} by {args.bucket}, last {args.days} days"
+    if filters:
+        title += " (" + ", ".join(f"{d}={v}" for d, v in filters.items()) + ")"
+    table = Table(title=title)
+    for column in columns:
+        table.add_column(column, justify="left" if column in ('bucket', 'group') else "right")
+    for row in rows:
+        table.add_row(*(
+            f"{row[c]:.4g}" if isinstance(row[c], float) else str(row[c]) for c in columns
+        ))
+    console = Console()
+    console.print(table)
+    console.print(f"{len(rows)} rows in {elapsed:.1f} ms")
+
+if __name__ == "__main__":
+    main()
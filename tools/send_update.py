@@ -0,0 +1,86 @@
+import argparse
+import asyncio
+import itertools
+import json
+import time
+
+import aiohttp
+
+_update_ids = itertools.count(int(time.time()))
+
+def message_update(user_id: int, text: str) -> dict:
+    """A Telegram Update carrying a private text message"""
+    now = int(time.time())
+    update_id = next(_update_ids)
+    user = {"id": user_id, "is_bot": False, "first_name": f"User {user_id}"}
+    return {
+        "update_id": update_id,
+        "message": {
+            "message_id": update_id,
+            "date": now,
+            "chat": {"id": user_id, "type": "private"},
+            "from": user,
+            "text": text
+        }
+    }
+
+def callback_update(user_id: int, data: str, message_id: int = 1) -> dict:
+    """A Telegram Update for an inline button press"""
+    update_id = next(_update_ids)
+    user = {"id": user_id, "is_bot": False, "first_name": f"User {user_id}"}
+    return {
+        "update_id": update_id,
+        "callback_query": {
+            "id": str(update_id),
+            "from": user,
+            "chat_instance": str(user_id),
+            "data": data,
+            "message": {
+                "message_id": message_id,
+                "date": int(time.time()),
+                "chat": {"id": user_id, "type": "private"},
+                "text": ""
+            }
+        }
+    }
+
+async def send_updates(url: str, updates: list, secret_token: str = None, concurrency: int = 10) -> list:
+    """POST updates to a webhook endpoint and return their HTTP statuses"""
+    headers = {"X-Telegram-Bot-Api-Secret-Token": secret_token} if secret_token else None
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async with aiohttp.ClientSession(headers=headers) as session:
+        async def post(update):
+            async with semaphore:
+                async with session.post(url, json=update) as response:
+                    return response.status
+        return await asyncio.gather(*(post(update) for update in updates))
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Post synthetic Telegram updates to a local webhook")
+    parser.add_argument("--url", default="http://localhost:8443/telegram")
+    parser.add_argument("--secret")
+    parser.add_argument("--users", type=int, default=1, help="Distinct users sending updates")
+    parser.add_argument("--text", help="Message text to send from each user")
+    parser.add_argument("--file", help="File whose contents are sent as the message text")
+    parser.add_argument("--callback", help="Callback data to send instead of a message, e.g. next_0")
+    parser.add_argument("--repeat", type=int, default=1, help="Updates per user")
+    args = parser.parse_args()
+
+    text = args.text
+    if args.file:
+        with open(args.file, 'r', encoding='utf-8') as f:
+            text = f.read()
+
+    updates = [
+        callback_update(1000 + user, args.callback) if args.callback else message_update(1000 + user, text or "ping")
+        for _ in range(args.repeat)
+        for user in range(args.users)
+    ]
+    start = time.perf_counter()
+    statuses = asyncio.run(send_updates(args.url, updates, args.secret))
+    print(json.dumps({
+        "sent": len(statuses),
+        "statuses": {str(status): statuses.count(status) for status in set(statuses)},
+        "seconds": round(time.perf_counter() - start, 3)
+    }))
@@ -1,18 +1,19 @@
 import json
+import os
+import sys
 from typing import List, Dict, Any
 import logging
 import re
 
+# Add project root to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from core.geo import FLAG_PATTERN, normalize_geo, region_for, split_geos
+
 logger = logging.getLogger(__name__)
 
 class TrainingDealParser:
     def __init__(self):
-        # Region classifications from DealFormatting.md
-        self.LATAM = ['AR', 'BO', 'BR', 'CL', 'CO', 'CR', 'CU', 'DO', 'EC', 'SV', 'GT', 'HN', 'MX', 'NI', 'PA', 'PY', 'PE', 'UY', 'VE']
-        self.NORDICS = ['DK', 'FI', 'IS', 'NO', 'SE']
-        self.BALTICS = ['EE', 'LV', 'LT']
-        self.TIER1 = ['AU', 'CA', 'FR', 'DE', 'IT', 'JP', 'NL', 'NZ', 'SG', 'ES', 'GB', 'US', 'UK']
-        
         # Source normalizations
         self.SOURCE_MAPPINGS = {
             'fb': 'Facebook',
@@ -106,7 +107,7 @@ class TrainingDealParser:
             new_deal = (
                 bool(re.match(r'^[A-Z]{2}\b', line)) or  # Country code
                 bool(re.match(r'^GEO:?\s*', line, re.IGNORECASE)) or  # GEO: prefix
-                bool(re.match(r'^🇪🇺|^🇺🇸|^🇬🇧', line))  # Flag emoji
+                bool(FLAG_PATTERN.match(line))  # Flag emoji
             )
             
             if new_deal and current_deal:
@@ -183,34 +184,28 @@ class TrainingDealParser:
 
     def _extract_geo(self, text: str) -> str:
         """Extract country code(s)"""
-        # Look for explicit GEO field
-        geo_match = re.search(r'GEO:?\s*([A-Z]{2}(?:\s*[,|]\s*[A-Z]{2})*)', text, re.IGNORECASE)
+        # Look for explicit GEO field: codes, names or flags
+        geo_match = re.search(r'GEO:?[ \t]*([^\n]+)', text, re.IGNORECASE)
         if geo_match:
-            return '|'.join(re.findall(r'[A-Z]{2}', geo_match.group(1)))
+            # The GEO list ends where the prices start
+            codes = split_geos(re.split(r'\d', geo_match.group(1), maxsplit=1)[0])
+            if codes:
+                return '|'.join(codes)
             
-        # Look for country codes at start of lines
-        codes = re.findall(r'^([A-Z]{2})\b', text, re.MULTILINE)
+        # Look for country codes or flags at start of lines
+        codes = []
+        for line in text.splitlines():
+            line_match = re.match(r'^\s*((?:[\U0001F1E6-\U0001F1FF]{2}\s*)+|[A-Z]{2}\b(?:\s*[,|/]\s*[A-Z]{2}\b)*)', line)
+            if line_match:
+                codes.extend(split_geos(line_match.group(1)))
         if codes:
-            return '|'.join(codes)
+            return '|'.join(dict.fromkeys(codes))
             
         return "&"
 
     def _determine_region(self, geo: str) -> str:
-        """Determine region from country code"""
-        if '|' in geo:  # Multiple GEOs
-            geos = geo.split('|')
-            regions = set(self._determine_region(g) for g in geos)
-            return '|'.join(regions)
-            
-        if geo in self.LATAM:
-            return 'LATAM'
-        elif geo in self.NORDICS:
-            return 'NORDICS'
-        elif geo in self.BALTICS:
-            return 'BALTICS'
-        elif geo in self.TIER1:
-            return 'TIER1'
-        return 'TIER3'
+        """Determine region from country code(s)"""
+        return region_for(normalize_geo(geo))
 
     def _extract_source(self, text: str) -> str:
         """Extract and normalize traffic sources"""
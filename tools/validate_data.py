@@ -1,65 +1,172 @@
 import json
+import os
 import sys
+from multiprocessing import Pool
 from pathlib import Path
+from typing import Iterator, List, Tuple
+
+from pydantic import ValidationError
+
+# Add project root to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from core.deal import DealData
+from core.geo import region_for
+
+VALID_ROLES = ('system', 'user', 'assistant')
+
+# (line number, byte offset, [raw lines])
+Chunk = Tuple[int, int, List[bytes]]
+# (line number, byte offset, message)
+LineError = Tuple[int, int, str]
+
+def iter_chunks(file_path: str, chunk_lines: int = 2000) -> Iterator[Chunk]:
+    """Stream a JSONL file as line chunks tagged with their start line and byte offset"""
+    with open(file_path, 'rb') as f:
+        lines = []
+        line_number = 1
+        offset = chunk_offset = 0
+        for line in f:
+            lines.append(line)
+            offset += len(line)
+            if len(lines) >= chunk_lines:
+                yield line_number, chunk_offset, lines
+                line_number += len(lines)
+                chunk_offset = offset
+                lines = []
+        if lines:
+            yield line_number, chunk_offset, lines
+
+def _check_regions(parsed_data: dict) -> List[str]:
+    """Compare the stored region with the region table for every geo"""
+    geo = parsed_data.get('geo') or '&'
+    if geo == '&':
+        return []
+
+    expected = set(region_for('|'.join(code.strip().upper() for code in geo.split('|'))).split('|'))
+    actual = set((parsed_data.get('region') or '').split('|'))
+    if expected != actual:
+        return [f"Region '{parsed_data.get('region')}' does not match geo '{geo}' (expected {'|'.join(sorted(expected))})"]
+    return []
+
+def validate_example(data) -> List[str]:
+    """Validate one decoded training example and return every problem found"""
+    if not isinstance(data, dict) or 'messages' not in data:
+        return ["Missing 'messages' field"]
+
+    messages = data['messages']
+    if not isinstance(messages, list):
+        return ["'messages' must be a list"]
+
+    errors = []
+    assistant_content = None
+    for msg in messages:
+        if not isinstance(msg, dict):
+            errors.append("Each message must be a dictionary")
+            continue
+        if 'role' not in msg or 'content' not in msg:
+            errors.append("Messages must have 'role' and 'content'")
+            continue
+        if msg['role'] not in VALID_ROLES:
+            errors.append(f"Invalid role: {msg['role']}")
+        if msg['role'] == 'assistant':
+            assistant_content = msg['content']
+
+    if assistant_content is None:
+        errors.append("Missing assistant message")
+        return errors
+
+    # The assistant payload must itself be a valid deal
+    try:
+        deal = json.loads(assistant_content)
+    except (json.JSONDecodeError, TypeError):
+        errors.append("Assistant content is not valid JSON")
+        return errors
+
+    parsed_data = deal.get('parsed_data') if isinstance(deal, dict) else None
+    if not isinstance(parsed_data, dict):
+        errors.append("Assistant content has no 'parsed_data' object")
+        return errors
 
-def validate_jsonl(file_path: str) -> bool:
-    """Validate JSONL training data format"""
     try:
-        with open(file_path, 'r', encoding='utf-8') as f:
-            line_number = 0
-            for line in f:
-                line_number += 1
-                try:
-                    data = json.loads(line)
-                    
-                    # Check required fields
-                    if 'messages' not in data:
-                        print(f"Line {line_number}: Missing 'messages' field")
-                        return False
-                        
-                    messages = data['messages']
-                    if not isinstance(messages, list):
-                        print(f"Line {line_number}: 'messages' must be a list")
-                        return False
-                        
-                    # Validate each message
-                    for msg in messages:
-                        if not isinstance(msg, dict):
-                            print(f"Line {line_number}: Each message must be a dictionary")
-                            return False
-                            
-                        if 'role' not in msg or 'content' not in msg:
-                            print(f"Line {line_number}: Messages must have 'role' and 'content'")
-                            return False
-                            
-                        if msg['role'] not in ['system', 'user', 'assistant']:
-                            print(f"Line {line_number}: Invalid role: {msg['role']}")
-                            return False
-                            
-                except json.JSONDecodeError:
-                    print(f"Line {line_number}: Invalid JSON")
-                    return False
-                    
-            print(f"Successfully validated {line_number} examples")
-            return True
-            
-    except Exception as e:
+        DealData(**parsed_data)
+    except ValidationError as e:
+        for error in e.errors():
+            field = '.'.join(str(part) for part in error['loc'])
+            errors.append(f"parsed_data.{field}: {error['msg']}")
+    except (TypeError, ValueError) as e:
+        errors.append(f"parsed_data: {str(e)}")
+
+    errors.extend(_check_regions(parsed_data))
+    return errors
+
+def validate_chunk(chunk: Chunk) -> Tuple[int, List[LineError]]:
+    """Validate a chunk of raw lines; returns the line count and all errors"""
+    line_number, offset, lines = chunk
+    errors = []
+    for line in lines:
+        if line.strip():
+            try:
+                data = json.loads(line)
+            except (json.JSONDecodeError, UnicodeDecodeError):
+                errors.append((line_number, offset, "Invalid JSON"))
+            else:
+                errors.extend((line_number, offset, message) for message in validate_example(data))
+        line_number += 1
+        offset += len(line)
+    return len(lines), errors
+
+def validate_jsonl(file_path: str, workers: int = None, chunk_lines: int = 2000, max_errors: int = 50) -> bool:
+    """Validate JSONL training data format and deal schema.
+
+    The file is streamed in chunks that are validated in parallel; every
+    error is counted, and the first max_errors are printed with their line
+    number and byte offset.
+    """
+    total_lines = 0
+    error_count = 0
+    lines_with_errors = set()
+
+    try:
+        with Pool(processes=workers or os.cpu_count()) as pool:
+            for line_count, errors in pool.imap(validate_chunk, iter_chunks(file_path, chunk_lines)):
+                total_lines += line_count
+                for line_number, offset, message in errors:
+                    error_count += 1
+                    lines_with_errors.add(line_number)
+                    if error_count <= max_errors:
+                        print(f"Line {line_number} (byte {offset}): {message}")
+    except OSError as e:
         print(f"Error reading file: {str(e)}")
         return False
 
+    if error_count > max_errors:
+        print(f"... {error_count - max_errors} more errors not shown")
+
+    if error_count:
+        print(f"Found {error_count} errors on {len(lines_with_errors)} of {total_lines} lines")
+        return False
+
+    print(f"Successfully validated {total_lines} examples")
+    return True
+
 if __name__ == "__main__":
-    if len(sys.argv) != 2:
-        print("Usage: python validate_data.py path/to/training_data.jsonl")
-        sys.exit(1)
-        
-    file_path = sys.argv[1]
-    if not Path(file_path).exists():
-        print(f"File not found: {file_path}")
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Validate training data JSONL")
+    parser.add_argument("file_path", help="path/to/training_data.jsonl")
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--chunk-lines", type=int, default=2000)
+    parser.add_argument("--max-errors", type=int, default=50, help="Errors to print; all are counted")
+    args = parser.parse_args()
+
+    if not Path(args.file_path).exists():
+        print(f"File not found: {args.file_path}")
         sys.exit(1)
-        
-    if validate_jsonl(file_path):
+
+    if validate_jsonl(args.file_path, args.workers, args.chunk_lines, args.max_errors):
         print("Validation successful!")
         sys.exit(0)
     else:
         print("Validation failed!")
-        sys.exit(1)
\ No newline at end of file
+        sys.exit(1)